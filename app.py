@@ -1,17 +1,40 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, g, has_app_context, has_request_context, stream_with_context
 from flask_cors import CORS
+from werkzeug.security import check_password_hash, generate_password_hash
 import pymysql
 from pymysql.err import OperationalError, IntegrityError
-from datetime import datetime
-import traceback
+from datetime import date, datetime, timezone
+from collections import Counter, OrderedDict, deque
+import csv
+import io
+import json
+import math
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import random
+import sys
+import threading
+import time
 import uuid
-from functools import wraps
+from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import atexit
+import bisect
+import copy
+import glob
+import hashlib
+import heapq
 import os
+import re
+import shutil
+import sqlite3
+import tempfile
 
 # NOTE: Use environment variables for any sensitive values. Defaults are intentionally
 # non-secret placeholders so credentials are not committed in the repository.
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'X-Request-ID', 'X-DB-Route'])
 
 # Database configuration
 DB_CONFIG = {
@@ -23,6 +46,327 @@ DB_CONFIG = {
     'port': int(os.getenv('DB_PORT', 3306))
 }
 
+# Connection pool configuration (same env-var scheme as DB_CONFIG)
+DB_POOL_CONFIG = {
+    # Maximum number of connections open at once (idle + checked out)
+    'size': int(os.getenv('DB_POOL_SIZE', 10)),
+    # Seconds to wait for a free connection before giving up
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    # Connections older than this (seconds) are closed and replaced
+    'max_lifetime': int(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+    # Idle connections unused for longer than this (seconds) are pinged before reuse
+    'ping_interval': int(os.getenv('DB_POOL_PING_INTERVAL', 30)),
+    # Connections opened by warm_up() before a worker takes traffic
+    'warm': int(os.getenv('DB_POOL_WARM', 2))
+}
+
+# Read replicas for GET requests: DB_REPLICAS=host[:port],host[:port]
+# (unset keeps every query on DB_CONFIG). Credentials default to DB_CONFIG's.
+REPLICA_CONFIG = {
+    'hosts': [host.strip() for host in os.getenv('DB_REPLICAS', '').split(',') if host.strip()],
+    'user': os.getenv('DB_REPLICA_USER', DB_CONFIG['user']),
+    'password': os.getenv('DB_REPLICA_PASSWORD', DB_CONFIG['password']),
+    'database': os.getenv('DB_REPLICA_NAME', DB_CONFIG['database']),
+    # Pool size per replica
+    'pool_size': int(os.getenv('DB_REPLICA_POOL_SIZE', DB_POOL_CONFIG['size'])),
+    # Idle replica connections are pinged before reuse after this many seconds,
+    # so a replica that went away fails over at checkout rather than mid-query
+    'ping_interval': float(os.getenv('DB_REPLICA_PING_INTERVAL', 1)),
+    # Seconds between health checks of each replica
+    'check_interval': float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5)),
+    # Replicas further behind than this (seconds) are skipped; 0 skips the lag check
+    'max_lag': int(os.getenv('DB_REPLICA_MAX_LAG', 0)),
+    # After a write, that client's reads go to the primary for this many seconds
+    'pin_seconds': int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+}
+
+# ==================== Logging ====================
+
+LOG_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    # 'json' for one JSON object per line, 'text' for human-readable lines
+    'format': os.getenv('LOG_FORMAT', 'json'),
+    # Fraction of DEBUG/INFO records kept; WARNING and above are never sampled
+    'sample_rate': float(os.getenv('LOG_SAMPLE_RATE', 1.0)),
+    # Records waiting for the writer thread; further records are dropped, not blocked on
+    'queue_size': int(os.getenv('LOG_QUEUE_SIZE', 10000))
+}
+
+# Attributes every LogRecord has; anything else was passed via extra= and is logged as a field
+_STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request and drop sampled-out chatty records.
+
+    Runs on the emitting thread, before the record is queued, so the request
+    context is still available.
+    """
+
+    def __init__(self, sample_rate=1.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if has_request_context():
+            record.request_id = g.get('request_id', '-')
+            record.method = request.method
+            record.path = request.path
+        else:
+            record.request_id = '-'
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Render message and traceback now (args may not be safe to share across
+        # threads) but keep the traceback separate from the message
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging():
+    """Route the app logger through a queue to a background writer thread."""
+    log_queue = queue.Queue(maxsize=LOG_CONFIG['queue_size'])
+    handler = DroppingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter(LOG_CONFIG['sample_rate']))
+
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_CONFIG['format'] == 'text':
+        output.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+        ))
+    else:
+        output.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    app_logger = logging.getLogger('college_management')
+    app_logger.setLevel(LOG_CONFIG['level'])
+    app_logger.handlers[:] = [handler]
+    app_logger.propagate = False
+    return app_logger, listener
+
+
+logger, LOG_LISTENER = configure_logging()
+
+@app.before_request
+def assign_request_id():
+    """Use the caller's X-Request-ID or mint one, for log correlation."""
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+
+@app.after_request
+def echo_request_id(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
+# ==================== Metrics ====================
+
+METRICS_CONFIG = {
+    # Queries slower than this (milliseconds) are logged and counted as slow
+    'slow_query_ms': float(os.getenv('SLOW_QUERY_MS', 200))
+}
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _format_labels(names, values, extra=''):
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class MetricCounter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class MetricHistogram:
+    """Fixed-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = sorted((labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items())
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            plain = _format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{plain} {total}')
+            lines.append(f'{self.name}_count{plain} {count}')
+        return lines
+
+
+HTTP_REQUEST_DURATION = MetricHistogram(
+    'http_request_duration_seconds', 'Request latency by route', ('method', 'route', 'status'))
+DB_QUERY_DURATION = MetricHistogram(
+    'db_query_duration_seconds', 'Query execution time by statement', ('statement',))
+DB_QUERY_ROWS = MetricCounter(
+    'db_query_rows_total', 'Rows returned or affected by statement', ('statement',))
+DB_QUERY_ERRORS = MetricCounter(
+    'db_query_errors_total', 'Failed queries by statement', ('statement',))
+DB_SLOW_QUERIES = MetricCounter(
+    'db_slow_queries_total', 'Queries slower than SLOW_QUERY_MS by statement', ('statement',))
+
+def _statement_label(query):
+    words = query.split()
+    verb = words[0].upper() if words else ''
+    match = re.search(r'\b(?:FROM|INTO|UPDATE)\s+`?(\w+)', query, re.IGNORECASE)
+    return f'{verb} {match.group(1)}' if match else verb
+
+_template_label = lru_cache(maxsize=1024)(_statement_label)
+
+def query_label(query):
+    """Low-cardinality label for a query: its verb and main table, e.g. 'SELECT student'.
+
+    Only str templates are cached. pymysql hands executemany() batches back
+    to execute() as formatted bytearrays; those are labelled from their head,
+    which holds the verb and table, without caching.
+    """
+    if isinstance(query, (bytes, bytearray)):
+        return _statement_label(bytes(query[:256]).decode('utf-8', 'replace'))
+    return _template_label(query)
+
+
+class TimedCursorMixin:
+    """Times every execute(); an executemany() batch is labelled by its template."""
+
+    _batch_label = None
+
+    def executemany(self, query, args):
+        self._batch_label = query_label(query)
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._batch_label = None
+
+    def execute(self, query, args=None):
+        label = (self._batch_label or query_label(query),)
+        start = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except Exception:
+            DB_QUERY_ERRORS.inc(label)
+            raise
+        elapsed = time.perf_counter() - start
+        DB_QUERY_DURATION.observe(label, elapsed)
+        if 0 <= self.rowcount < 2 ** 63 - 1:
+            DB_QUERY_ROWS.inc(label, self.rowcount)
+        if elapsed * 1000 >= METRICS_CONFIG['slow_query_ms']:
+            DB_SLOW_QUERIES.inc(label)
+            text = query if isinstance(query, str) else bytes(query[:2000]).decode('utf-8', 'replace')
+            logger.warning("Slow query", extra={
+                'statement': label[0],
+                'duration_ms': round(elapsed * 1000, 1),
+                'query': ' '.join(text.split())[:500]
+            })
+        return result
+
+
+_timed_cursor_classes = {}
+
+def timed_cursor_class(cursor_class):
+    """Cached TimedCursorMixin subclass of a pymysql cursor class."""
+    timed = _timed_cursor_classes.get(cursor_class)
+    if timed is None:
+        timed = type(f'Timed{cursor_class.__name__}', (TimedCursorMixin, cursor_class), {})
+        _timed_cursor_classes[cursor_class] = timed
+    return timed
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(
+            (request.method, route, str(response.status_code)),
+            time.perf_counter() - started
+        )
+    return response
+
 def seed_departments_if_missing():
     """Ensure default departments exist: CSE, IT, AIDS, ECE."""
     connection = get_db_connection()
@@ -30,807 +374,4207 @@ def seed_departments_if_missing():
         return
     try:
         cursor = connection.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS department (
-                dept_id INT PRIMARY KEY AUTO_INCREMENT,
-                name VARCHAR(100) UNIQUE NOT NULL
-            )
-        """)
+        default_departments = ['CSE', 'IT', 'AIDS', 'ECE']
+
+        # department.name has no unique key in the dump schema, so check by name
+        cursor.executemany(
+            "INSERT INTO department (name) SELECT %s FROM DUAL "
+            "WHERE NOT EXISTS (SELECT 1 FROM department WHERE name = %s)",
+            [(name, name) for name in default_departments]
+        )
+        connection.commit()
+    except Exception:
+        logger.exception("Department seed failed")
+    finally:
+        try:
+            cursor.close()
+            connection.close()
+        except Exception:
+            pass
+
+# ==================== Connection Pool ====================
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class PooledConnection:
+    """Checked-out pool connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        if self._released:
+            raise pymysql.err.InterfaceError(0, 'Connection already returned to pool')
+        return getattr(self._raw, name)
+
+    def cursor(self, cursor=None):
+        """Open a cursor whose queries are timed and counted for /metrics."""
+        if self._released:
+            raise pymysql.err.InterfaceError(0, 'Connection already returned to pool')
+        return self._raw.cursor(timed_cursor_class(cursor or self._raw.cursorclass))
+
+    def close(self):
+        """Return the connection to the pool instead of closing the socket."""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw, self._created_at)
+
+    def discard(self):
+        """Close the socket and free the pool slot (e.g. after an aborted stream)."""
+        if not self._released:
+            self._released = True
+            self._pool.release(self._raw, self._created_at, discard=True)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of pymysql connections."""
+
+    def __init__(self, db_config, size=10, timeout=5, max_lifetime=1800, ping_interval=30):
+        self.db_config = db_config
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (raw connection, created_at, last_used)
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counters = {
+            'created': 0,
+            'reused': 0,
+            'reconnected': 0,
+            'expired': 0,
+            'discarded': 0,
+            'timeouts': 0
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self._counters[key] += 1
+
+    def _connect(self):
+        raw = pymysql.connect(
+            host=self.db_config['host'],
+            user=self.db_config['user'],
+            password=self.db_config['password'],
+            database=self.db_config['database'],
+            port=self.db_config['port']
+        )
+        self._count('created')
+        return raw
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Check out a connection, reusing an idle one when it is still healthy."""
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count('timeouts')
+            raise PoolTimeout(f'No database connection available within {self.timeout}s')
+        try:
+            now = time.monotonic()
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    raw, created_at = self._connect(), now
+                    break
+                raw, created_at, last_used = entry
+                if now - created_at > self.max_lifetime:
+                    self._count('expired')
+                    self._discard(raw)
+                    continue
+                if now - last_used > self.ping_interval:
+                    try:
+                        raw.ping(reconnect=False)
+                    except Exception:
+                        # Stale socket (server restart, wait_timeout): open a fresh one
+                        self._discard(raw)
+                        raw, created_at = self._connect(), now
+                        self._count('reconnected')
+                        break
+                self._count('reused')
+                break
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at, discard=False):
+        """Return a raw connection to the idle set, or drop it if unusable."""
+        try:
+            if discard:
+                self._count('discarded')
+                self._discard(raw)
+            elif raw.open:
+                # End any implicit transaction so the next user gets a fresh snapshot
+                raw.rollback()
+                with self._lock:
+                    self._idle.append((raw, created_at, time.monotonic()))
+            else:
+                self._count('discarded')
+        except Exception:
+            self._count('discarded')
+            self._discard(raw)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def warm(self, count):
+        """Open up to count connections ahead of traffic; returns how many opened."""
+        held = []
+        try:
+            for _ in range(min(count, self.size)):
+                held.append(self.acquire())
+        except (OperationalError, PoolTimeout) as e:
+            logger.warning("Pool warm-up stopped early: %s", e)
+        finally:
+            for connection in held:
+                connection.close()
+        return len(held)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        """Return a snapshot of pool size, usage and lifetime counters."""
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                **self._counters
+            }
+
+
+DB_POOL = ConnectionPool(
+    DB_CONFIG,
+    size=DB_POOL_CONFIG['size'],
+    timeout=DB_POOL_CONFIG['timeout'],
+    max_lifetime=DB_POOL_CONFIG['max_lifetime'],
+    ping_interval=DB_POOL_CONFIG['ping_interval']
+)
+
+def get_db_connection(primary=False):
+    """Check out a pooled database connection (close() returns it to the pool)
+
+    Reads of GET requests go to a read replica when any are configured and
+    healthy (see replica_allowed). primary=True always uses DB_CONFIG: for
+    sessions, and for loaders that fill a shared cache, which would keep a
+    lagging replica's rows long after the write that invalidated them.
+    """
+    connection = None
+    if not primary and READ_REPLICAS is not None and replica_allowed():
+        connection = READ_REPLICAS.acquire()
+    if connection is None:
+        try:
+            connection = DB_POOL.acquire()
+        except (OperationalError, PoolTimeout) as e:
+            logger.error("Error connecting to MySQL: %s", e)
+            return None
+    if has_request_context() and READ_REPLICAS is not None:
+        g.setdefault('db_routes', set()).add(getattr(connection, 'replica', 'primary'))
+    if has_app_context():
+        # Tracked so connections left open on early returns are still released
+        g.setdefault('db_connections', []).append(connection)
+    return connection
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    """Return any connection a handler did not close back to the pool."""
+    for connection in g.pop('db_connections', []):
+        connection.close()
+
+def streaming_response(generator, connection, **kwargs):
+    """Response for a generator that owns connection until it is exhausted.
+
+    The request context is torn down before a streamed body is produced, so
+    the connection is detached from teardown; if the client goes away before
+    the generator finishes, the connection is discarded when the response
+    closes.
+    """
+    tracked = g.get('db_connections', [])
+    if connection in tracked:
+        tracked.remove(connection)
+    response = Response(stream_with_context(generator), **kwargs)
+    response.call_on_close(connection.discard)
+    return response
+
+# ==================== Read Replicas ====================
+
+DB_PIN_COOKIE = 'db_primary_until'
+
+
+class ReplicaRouter:
+    """Pools for the read replicas, with health checks and failover.
+
+    Connections are handed out round-robin over the replicas last seen
+    healthy. A replica that refuses a connection is taken out at once; a
+    background thread checks every replica each check_interval seconds
+    (SELECT 1, plus replication lag when max_lag is set) and brings it back
+    when it passes. acquire() returns None when no replica is usable, and
+    the caller falls back to the primary.
+    """
+
+    def __init__(self, hosts, config, pool_config):
+        self.check_interval = config['check_interval']
+        self.max_lag = config['max_lag']
+        self.pin_seconds = config['pin_seconds']
+        self.replicas = []
+        for host in hosts:
+            name, _, port = host.partition(':')
+            db_config = {
+                'host': name,
+                'port': int(port or 3306),
+                'user': config['user'],
+                'password': config['password'],
+                'database': config['database']
+            }
+            self.replicas.append({
+                'name': host,
+                'pool': ConnectionPool(
+                    db_config,
+                    size=config['pool_size'],
+                    timeout=pool_config['timeout'],
+                    max_lifetime=pool_config['max_lifetime'],
+                    ping_interval=config['ping_interval']
+                ),
+                'healthy': True,
+                'lag': None,
+                'error': None,
+                'checked_at': None
+            })
+        self._next = 0
+        self._pins = {}  # session token -> time.time() until which its reads use the primary
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_checker(self):
+        if self._thread is None or self._pid != os.getpid():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name='replica-health', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.check_interval)
+            for replica in self.replicas:
+                self.check(replica)
+
+    def _mark(self, replica, healthy, error=None, lag=None):
+        if replica['healthy'] != healthy:
+            if healthy:
+                logger.info("Read replica %s is back in rotation", replica['name'])
+            else:
+                logger.warning("Read replica %s taken out of rotation: %s", replica['name'], error)
+        replica.update(healthy=healthy, error=error, lag=lag, checked_at=time.time())
+
+    def check(self, replica):
+        """Probe one replica and update its health."""
+        try:
+            connection = replica['pool'].acquire()
+        except (OperationalError, PoolTimeout) as e:
+            self._mark(replica, False, str(e))
+            return
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            lag = None
+            if self.max_lag:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except pymysql.err.ProgrammingError:
+                    # MariaDB and MySQL before 8.0.22
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone() or {}
+                lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+                if lag is None or lag > self.max_lag:
+                    self._mark(replica, False, f'replication lag {lag}s (max {self.max_lag}s)', lag)
+                    return
+            self._mark(replica, True, lag=lag)
+        except Exception as e:
+            connection.discard()
+            self._mark(replica, False, str(e))
+        finally:
+            connection.close()
+
+    def acquire(self):
+        """Connection to a healthy replica, or None if there is none."""
+        self._ensure_checker()
+        healthy = [replica for replica in self.replicas if replica['healthy']]
+        with self._lock:
+            start = self._next
+            self._next += 1
+        for i in range(len(healthy)):
+            replica = healthy[(start + i) % len(healthy)]
+            try:
+                connection = replica['pool'].acquire()
+            except OperationalError as e:
+                self._mark(replica, False, str(e))
+                continue
+            except PoolTimeout:
+                # Busy, not broken: try the next one
+                continue
+            connection.replica = replica['name']
+            return connection
+        return None
+
+    def pin(self, token, until):
+        """Send token's reads to the primary until the given time."""
+        with self._lock:
+            if len(self._pins) > 10000:
+                now = time.time()
+                self._pins = {t: u for t, u in self._pins.items() if u > now}
+            self._pins[token] = until
+
+    def pinned(self, token):
+        with self._lock:
+            return self._pins.get(token, 0) > time.time()
+
+    def warm(self, count):
+        """Open up to count connections on each replica; returns how many opened."""
+        return sum(replica['pool'].warm(count) for replica in self.replicas)
+
+    def close_all(self):
+        for replica in self.replicas:
+            replica['pool'].close_all()
+
+    def stats(self):
+        return [
+            {
+                'name': replica['name'],
+                'healthy': replica['healthy'],
+                'lag': replica['lag'],
+                'error': replica['error'],
+                'checked_at': replica['checked_at'],
+                'pool': replica['pool'].stats()
+            }
+            for replica in self.replicas
+        ]
+
+
+READ_REPLICAS = ReplicaRouter(REPLICA_CONFIG['hosts'], REPLICA_CONFIG, DB_POOL_CONFIG) if REPLICA_CONFIG['hosts'] else None
+
+def replica_allowed():
+    """True when this request's reads may be served by a replica.
+
+    Only GET and HEAD requests qualify, and not for pin_seconds after the
+    same client wrote: the write response sets DB_PIN_COOKIE and pins the
+    session token, so a client always reads its own writes.
+    """
+    if not has_request_context() or request.method not in ('GET', 'HEAD'):
+        return False
+    now = time.time()
+    try:
+        until = float(request.cookies.get(DB_PIN_COOKIE, 0))
+    except ValueError:
+        until = 0
+    # Bounded so a forged cookie cannot pin reads for longer than a real one
+    if now < until <= now + READ_REPLICAS.pin_seconds:
+        return False
+    token = get_bearer_token()
+    return not (token and READ_REPLICAS.pinned(token))
+
+@app.after_request
+def pin_writer_to_primary(response):
+    """After a successful write, keep this client's reads on the primary for a while."""
+    if READ_REPLICAS is None:
+        return response
+    if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+        until = time.time() + READ_REPLICAS.pin_seconds
+        response.set_cookie(DB_PIN_COOKIE, f'{until:.3f}', max_age=READ_REPLICAS.pin_seconds,
+                            httponly=True, samesite='Lax')
+        token = get_bearer_token()
+        if token:
+            READ_REPLICAS.pin(token, until)
+    routes = g.get('db_routes')
+    if routes:
+        response.headers['X-DB-Route'] = ', '.join(sorted(routes))
+    return response
+
+# ==================== Caching ====================
+
+class TTLCache:
+    """Thread-safe in-process cache of loaded values with per-entry expiry.
+
+    Concurrent misses on one key share a single load, and a load that races
+    with invalidate() is not stored, so an invalidation is never overwritten
+    by an older load.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # key -> (value, expires_at)
+        self._generations = {}  # key -> bumped on every invalidate
+        self._load_locks = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss or expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[1] > time.monotonic():
+                    return entry[0]
+                generation = self._generations.get(key, 0)
+            value = loader()
+            with self._lock:
+                if self._generations.get(key, 0) == generation:
+                    self._entries[key] = (value, time.monotonic() + self.ttl)
+            return value
+
+    def invalidate(self, *keys):
+        """Drop the given keys (or everything when called without keys)."""
+        with self._lock:
+            for key in keys or list(set(self._entries) | set(self._generations)):
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+
+# Reference ID sets used to validate bulk uploads without a query per row
+REFERENCE_CACHE = TTLCache(ttl=int(os.getenv('REFERENCE_CACHE_TTL', 60)))
+
+def load_student_ids(cursor):
+    """Set of all student IDs (cached)."""
+    def loader():
+        cursor.execute("SELECT student_id FROM student")
+        return {row[0] for row in cursor.fetchall()}
+    return REFERENCE_CACHE.get_or_load('student_ids', loader)
+
+def load_assessment_max_marks(cursor):
+    """Mapping of assessment_id -> max_marks (cached)."""
+    def loader():
+        cursor.execute("SELECT assessment_id, max_marks FROM assessment")
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    return REFERENCE_CACHE.get_or_load('assessment_max_marks', loader)
+
+def load_programs(cursor):
+    """Mapping of program_id and lower-cased program name -> program_id (cached)."""
+    def loader():
+        cursor.execute("SELECT program_id, name FROM program")
+        programs = {}
+        for program_id, name in cursor.fetchall():
+            programs[program_id] = program_id
+            if name:
+                programs[name.strip().lower()] = program_id
+        return programs
+    return REFERENCE_CACHE.get_or_load('programs', loader)
+
+# Dashboard counts, served from memory between writes
+DASHBOARD_CACHE = TTLCache(ttl=int(os.getenv('DASHBOARD_CACHE_TTL', 30)))
+
+class TableVersions:
+    """Per-table write counters, bumped by notify_write()."""
+
+    def __init__(self):
+        self._versions = Counter()
+        self._lock = threading.Lock()
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] += 1
+
+    def get(self, *tables):
+        """Tuple of the current versions of tables."""
+        with self._lock:
+            return tuple(self._versions[table] for table in tables)
+
+
+TABLE_VERSIONS = TableVersions()
+
+
+class SerializedResponseCache:
+    """Encoded JSON bodies of reference-data endpoints.
+
+    An entry is reused while the versions of the tables it was built from
+    are unchanged. Versions are per process, so entries also expire after
+    ttl seconds to pick up writes handled by other workers. The ETag is a
+    hash of the body, so every worker hands out the same tag for the same
+    data.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}  # key -> dict(versions, body, etag, last_modified, expires_at)
+        self._build_locks = {}
+        self._lock = threading.Lock()
+
+    def _current(self, key, versions):
+        entry = self._entries.get(key)
+        if entry and entry['versions'] == versions and entry['expires_at'] > time.monotonic():
+            return entry
+        return None
+
+    def get_or_build(self, key, tables, loader):
+        """Cached entry for key, calling loader() for fresh data when tables changed."""
+        versions = TABLE_VERSIONS.get(*tables)
+        with self._lock:
+            entry = self._current(key, versions)
+            if entry:
+                return entry
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                entry = self._current(key, versions)
+                if entry:
+                    return entry
+                previous = self._entries.get(key)
+            body = app.json.dumps(loader()).encode('utf-8') + b'\n'
+            etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+            if previous and previous['etag'] == etag:
+                last_modified = previous['last_modified']
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            entry = {
+                'versions': versions,
+                'body': body,
+                'etag': etag,
+                'last_modified': last_modified,
+                'expires_at': time.monotonic() + self.ttl
+            }
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+
+
+REFERENCE_RESPONSES = SerializedResponseCache(ttl=int(os.getenv('REFERENCE_RESPONSE_TTL', 60)))
+
+def cached_reference_response(key, tables, loader):
+    """Conditional JSON response for reference data built from tables.
+
+    Requests whose If-None-Match / If-Modified-Since match the cached entry
+    get a 304 without a database query.
+    """
+    entry = REFERENCE_RESPONSES.get_or_build(key, tables, loader)
+    response = Response(entry['body'], mimetype='application/json')
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    # Let browsers keep the body but revalidate on every use
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def notify_write(*tables):
+    """Invalidate in-process caches derived from the given tables.
+
+    Write handlers call this after a successful commit.
+    """
+    TABLE_VERSIONS.bump(*tables)
+    tables = set(tables)
+    if 'student' in tables:
+        REFERENCE_CACHE.invalidate('student_ids')
+    if 'assessment' in tables:
+        REFERENCE_CACHE.invalidate('assessment_max_marks')
+    if 'program' in tables:
+        REFERENCE_CACHE.invalidate('programs')
+    if tables & {'student', 'faculty', 'course', 'assessment'}:
+        DASHBOARD_CACHE.invalidate('stats')
+    if tables & {'department', 'program'}:
+        # Names and program -> department mapping changed; rebuild on next read
+        DASHBOARD_SUMMARY.invalidate()
+    if tables & {'role', 'permission', 'role_permission'}:
+        PERMISSION_CACHE.invalidate('role_permissions')
+
+# ==================== Authentication ====================
+
+SESSION_CONFIG = {
+    # memory (single process), sqlite (workers on one host) or mysql (any number of hosts)
+    'backend': os.getenv('SESSION_BACKEND', 'memory'),
+    # Session lifetime in seconds
+    'ttl': int(os.getenv('SESSION_TTL', 8 * 3600)),
+    # Upper bound on sessions kept by the in-memory backend
+    'max_entries': int(os.getenv('SESSION_MAX_ENTRIES', 100000)),
+    'sqlite_path': os.getenv('SESSION_SQLITE_PATH', 'sessions.sqlite3'),
+    # Local cache in front of the sqlite/mysql stores; a logout on another
+    # worker takes up to local_cache_ttl seconds to be seen here
+    'local_cache_size': int(os.getenv('SESSION_LOCAL_CACHE_SIZE', 10000)),
+    'local_cache_ttl': int(os.getenv('SESSION_LOCAL_CACHE_TTL', 30)),
+    # Expired sessions are purged at most this often (seconds), on writes
+    'evict_interval': int(os.getenv('SESSION_EVICT_INTERVAL', 300))
+}
+
+
+class SessionStore:
+    """Base for session backends: token -> session dict with expiry."""
+
+    def __init__(self, evict_interval):
+        self.evict_interval = evict_interval
+        self._last_evict = time.time()
+
+    def get(self, token):
+        raise NotImplementedError
+
+    def set(self, token, session, expires_at):
+        raise NotImplementedError
+
+    def delete(self, token):
+        raise NotImplementedError
+
+    def evict_expired(self):
+        """Remove expired sessions; returns how many were removed."""
+        raise NotImplementedError
+
+    def maybe_evict(self):
+        """Run evict_expired() if evict_interval has passed since the last run."""
+        now = time.time()
+        if now - self._last_evict >= self.evict_interval:
+            self._last_evict = now
+            try:
+                removed = self.evict_expired()
+                logger.debug("Evicted %s expired sessions", removed)
+            except Exception:
+                logger.exception("Session eviction failed")
+
+
+class MemorySessionStore(SessionStore):
+    """Process-local LRU of sessions with expiry."""
+
+    def __init__(self, max_entries, evict_interval=300):
+        super().__init__(evict_interval)
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # token -> (session, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._data[token]
+                return None
+            self._data.move_to_end(token)
+            return entry[0]
+
+    def set(self, token, session, expires_at):
+        with self._lock:
+            self._data[token] = (session, expires_at)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        self.maybe_evict()
+
+    def delete(self, token):
+        with self._lock:
+            self._data.pop(token, None)
+
+    def evict_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [token for token, (_, expires_at) in self._data.items() if expires_at <= now]
+            for token in expired:
+                del self._data[token]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file (WAL mode) shared by every worker on the host."""
+
+    def __init__(self, path, evict_interval=300):
+        super().__init__(evict_interval)
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_session ("
+            " token TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_session_expires ON user_session (expires_at)")
+
+    def _connection(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, token):
+        row = self._connection().execute(
+            "SELECT data FROM user_session WHERE token = ? AND expires_at > ?", (token, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, token, session, expires_at):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO user_session (token, data, expires_at) VALUES (?, ?, ?)",
+            (token, json.dumps(session), expires_at)
+        )
+        self.maybe_evict()
+
+    def delete(self, token):
+        self._connection().execute("DELETE FROM user_session WHERE token = ?", (token,))
+
+    def evict_expired(self):
+        return self._connection().execute(
+            "DELETE FROM user_session WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+
+
+class MySQLSessionStore(SessionStore):
+    """Sessions in the application database (user_session), shared across hosts."""
+
+    def _execute(self, query, args=()):
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, args)
+            rows = cursor.fetchall()
+            affected = cursor.rowcount
+            connection.commit()
+            cursor.close()
+            return rows, affected
+        finally:
+            connection.close()
+
+    def get(self, token):
+        rows, _ = self._execute(
+            "SELECT data FROM user_session WHERE token = %s AND expires_at > %s", (token, time.time())
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def set(self, token, session, expires_at):
+        self._execute(
+            "REPLACE INTO user_session (token, data, expires_at) VALUES (%s, %s, %s)",
+            (token, json.dumps(session), expires_at)
+        )
+        self.maybe_evict()
+
+    def delete(self, token):
+        self._execute("DELETE FROM user_session WHERE token = %s", (token,))
+
+    def evict_expired(self):
+        return self._execute("DELETE FROM user_session WHERE expires_at <= %s", (time.time(),))[1]
+
+
+class CachedSessionStore(SessionStore):
+    """Shared store fronted by a small, short-lived local cache.
+
+    Token checks are answered from memory while cached; only misses go to
+    the shared store.
+    """
+
+    def __init__(self, shared, local_size, local_ttl):
+        super().__init__(shared.evict_interval)
+        self.shared = shared
+        self.local_ttl = local_ttl
+        self.local = MemorySessionStore(local_size, evict_interval=max(local_ttl, 1))
+
+    def get(self, token):
+        session = self.local.get(token)
+        if session is None:
+            session = self.shared.get(token)
+            if session is not None:
+                self.local.set(token, session, min(session['expires_at'], time.time() + self.local_ttl))
+        return session
+
+    def set(self, token, session, expires_at):
+        self.shared.set(token, session, expires_at)
+        self.local.set(token, session, min(expires_at, time.time() + self.local_ttl))
+
+    def delete(self, token):
+        self.local.delete(token)
+        self.shared.delete(token)
+
+    def evict_expired(self):
+        return self.shared.evict_expired() + self.local.evict_expired()
+
+
+def create_session_store():
+    """Build the backend selected by SESSION_CONFIG['backend']."""
+    backend = SESSION_CONFIG['backend']
+    if backend == 'memory':
+        return MemorySessionStore(SESSION_CONFIG['max_entries'], SESSION_CONFIG['evict_interval'])
+    if backend == 'sqlite':
+        shared = SQLiteSessionStore(SESSION_CONFIG['sqlite_path'], SESSION_CONFIG['evict_interval'])
+    elif backend == 'mysql':
+        shared = MySQLSessionStore(SESSION_CONFIG['evict_interval'])
+    else:
+        raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
+    return CachedSessionStore(shared, SESSION_CONFIG['local_cache_size'], SESSION_CONFIG['local_cache_ttl'])
+
+
+SESSION_STORE = create_session_store()
+
+def get_bearer_token():
+    """Token from the Authorization: Bearer header, or None."""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    return auth_header.split(' ', 1)[1].strip() or None
+
+def create_session(user):
+    """Store a new session for user and return its token."""
+    token = uuid.uuid4().hex
+    expires_at = time.time() + SESSION_CONFIG['ttl']
+    SESSION_STORE.set(token, {**user, 'expires_at': expires_at}, expires_at)
+    return token
+
+def get_current_user():
+    """Extract user from Bearer token in Authorization header."""
+    token = get_bearer_token()
+    if token is None:
+        return None
+    try:
+        return SESSION_STORE.get(token)
+    except Exception:
+        logger.exception("Session lookup failed")
+        return None
+
+AUTH_CONFIG = {
+    # Threads doing password-hash verification; each one saturates a core
+    'hash_workers': int(os.getenv('AUTH_HASH_WORKERS', max(1, min(4, os.cpu_count() or 1)))),
+    # Verifications allowed to wait for a worker before logins get a 503
+    'hash_queue': int(os.getenv('AUTH_HASH_QUEUE', 32)),
+    # Seconds a login waits for its verification before giving up
+    'hash_timeout': float(os.getenv('AUTH_HASH_TIMEOUT', 10)),
+    # Failed logins allowed per account within attempt_window seconds
+    'max_attempts': int(os.getenv('AUTH_MAX_ATTEMPTS', 5)),
+    'attempt_window': int(os.getenv('AUTH_ATTEMPT_WINDOW', 300)),
+    # last_login updates are buffered and written in one batch this often (seconds)
+    'last_login_flush': float(os.getenv('AUTH_LAST_LOGIN_FLUSH', 10))
+}
+
+ACCOUNT_ROLES = ('admin', 'faculty', 'student')
+
+ACCOUNT_QUERY = """
+    SELECT u.user_id, u.username, u.password_hash, u.is_active, u.person_type, u.linked_person_id,
+           COALESCE(CONCAT(s.first_name, ' ', s.last_name),
+                    CONCAT(f.first_name, ' ', f.last_name),
+                    u.username) AS name
+    FROM useraccount u
+    LEFT JOIN student s ON u.person_type = 'student' AND s.student_id = u.linked_person_id
+    LEFT JOIN faculty f ON u.person_type = 'faculty' AND f.faculty_id = u.linked_person_id
+    WHERE u.username = %s
+"""
+
+
+class LoginBusy(Exception):
+    """Raised when the password-verification pool is saturated."""
+
+
+class PasswordVerifier:
+    """Runs password-hash checks on a bounded thread pool.
+
+    At most hash_workers hashes are computed at once and at most
+    hash_queue more may wait; anything beyond that is refused immediately
+    rather than queueing CPU work the clients will have given up on.
+    """
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Checked for unknown usernames so they cost the same as real ones
+        self._dummy_hash = None
+
+    def _get_executor(self):
+        # Worker threads do not survive a fork, so each process builds its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def verify(self, password_hash, password):
+        """Check password against password_hash (None checks a dummy hash and fails)."""
+        known = password_hash is not None
+        if not known:
+            if self._dummy_hash is None:
+                self._dummy_hash = generate_password_hash(uuid.uuid4().hex)
+            password_hash = self._dummy_hash
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            future = self._get_executor().submit(check_password_hash, password_hash, password)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout) and known
+        except FutureTimeout:
+            raise LoginBusy()
+
+
+class LoginRateLimiter:
+    """Sliding-window count of failed logins per account."""
+
+    def __init__(self, max_attempts, window):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._failures = {}  # username -> deque of failure timestamps
+        self._lock = threading.Lock()
+
+    def retry_after(self, username):
+        """Seconds until username may try again, or 0 if it is not locked out."""
+        now = time.time()
+        with self._lock:
+            failures = self._failures.get(username)
+            if not failures:
+                return 0
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+            if len(failures) < self.max_attempts:
+                if not failures:
+                    del self._failures[username]
+                return 0
+            return int(failures[0] + self.window - now) + 1
+
+    def record_failure(self, username):
+        now = time.time()
+        with self._lock:
+            self._failures.setdefault(username, deque()).append(now)
+            if len(self._failures) > 10000:
+                # Drop accounts whose failures have all aged out
+                cutoff = now - self.window
+                for key in [k for k, v in self._failures.items() if v[-1] <= cutoff]:
+                    del self._failures[key]
+
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
+
+
+class LastLoginWriter:
+    """Buffers last_login stamps and writes them in one batch per interval."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}  # user_id -> datetime
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, user_id):
+        with self._lock:
+            self._pending[user_id] = datetime.now()
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='last-login-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all buffered stamps; they are kept for the next flush on failure."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        connection = get_db_connection()
+        if not connection:
+            self._requeue(pending)
+            return
+        try:
+            cursor = connection.cursor()
+            cursor.executemany(
+                "UPDATE useraccount SET last_login = %s WHERE user_id = %s",
+                [(stamp, user_id) for user_id, stamp in pending.items()]
+            )
+            connection.commit()
+            cursor.close()
+        except Exception:
+            logger.exception("last_login flush failed for %s accounts", len(pending))
+            self._requeue(pending)
+        finally:
+            connection.close()
+
+    def _requeue(self, pending):
+        with self._lock:
+            for user_id, stamp in pending.items():
+                self._pending.setdefault(user_id, stamp)
+
+
+PASSWORD_VERIFIER = PasswordVerifier(AUTH_CONFIG['hash_workers'], AUTH_CONFIG['hash_queue'],
+                                     AUTH_CONFIG['hash_timeout'])
+LOGIN_RATE_LIMITER = LoginRateLimiter(AUTH_CONFIG['max_attempts'], AUTH_CONFIG['attempt_window'])
+LAST_LOGIN_WRITER = LastLoginWriter(AUTH_CONFIG['last_login_flush'])
+atexit.register(LAST_LOGIN_WRITER.flush)
+
+def load_account(username):
+    """useraccount row (with display name) for username, or None."""
+    connection = get_db_connection()
+    if not connection:
+        raise OperationalError('Database connection failed')
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(ACCOUNT_QUERY, (username,))
+        account = cursor.fetchone()
+        cursor.close()
+        return account
+    finally:
+        connection.close()
+
+def seed_admin_account_if_missing():
+    """Create the ADMIN_USERNAME account from ADMIN_PASSWORD when useraccount has no admin."""
+    username = os.getenv('ADMIN_USERNAME', 'admin@college.edu')
+    password = os.getenv('ADMIN_PASSWORD')
+    if not password:
+        return
+    connection = get_db_connection()
+    if not connection:
+        return
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1 FROM useraccount WHERE person_type = 'admin' LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute(
+                "INSERT INTO useraccount (username, password_hash, is_active, person_type) "
+                "VALUES (%s, %s, 1, 'admin')",
+                (username, generate_password_hash(password))
+            )
+            connection.commit()
+            logger.info("Created admin account %s", username)
+        cursor.close()
+    except Exception:
+        logger.exception("Admin account seed failed")
+    finally:
+        connection.close()
+
+# Permission codes checked by route handlers, with their descriptions
+PERMISSIONS = {
+    'student.write': 'Create students',
+    'student.import': 'Bulk import students',
+    'student.delete': 'Delete students',
+    'department.write': 'Create, update and delete departments',
+    'faculty.write': 'Create, update and delete faculty',
+    'score.write': 'Record and update scores',
+    'score.delete': 'Delete scores',
+    'attendance.write': 'Mark attendance',
+    'record.read': "View any student's grades, results and attendance",
+    'directory.search': 'Search student and faculty contacts',
+    'export.read': 'Export tables as CSV',
+    'role.manage': 'View and change role permissions',
+    'schema.migrate': 'Apply pending database migrations'
+}
+
+# Granted when a permission is first created, and used if grants cannot be read
+DEFAULT_ROLE_PERMISSIONS = {
+    'admin': frozenset(PERMISSIONS),
+    'faculty': frozenset({'score.write', 'attendance.write', 'record.read', 'directory.search'}),
+    'student': frozenset()
+}
+
+# role name -> frozenset of permission codes, reloaded on change or expiry
+PERMISSION_CACHE = TTLCache(ttl=int(os.getenv('PERMISSION_CACHE_TTL', 300)))
+
+def seed_role_permissions():
+    """Seed roles and permissions, granting each new permission to its default roles."""
+    connection = get_db_connection()
+    if not connection:
+        return
+    try:
+        cursor = connection.cursor()
+        cursor.executemany("INSERT IGNORE INTO role (name) VALUES (%s)",
+                           [(role,) for role in DEFAULT_ROLE_PERMISSIONS])
+        grants = []
+        for code, description in PERMISSIONS.items():
+            cursor.execute("INSERT IGNORE INTO permission (code, description) VALUES (%s, %s)",
+                           (code, description))
+            if cursor.rowcount:
+                # Only permissions created just now; grants an admin revoked stay revoked
+                grants.extend((role, code) for role, codes in DEFAULT_ROLE_PERMISSIONS.items() if code in codes)
+        if grants:
+            cursor.executemany(
+                """
+                INSERT IGNORE INTO role_permission (role_id, permission_id)
+                SELECT r.role_id, p.permission_id FROM role r, permission p
+                WHERE r.name = %s AND p.code = %s
+                """,
+                grants
+            )
+        connection.commit()
+        cursor.close()
+    except Exception:
+        logger.exception("Role permission seed failed")
+    finally:
+        connection.close()
+    PERMISSION_CACHE.invalidate('role_permissions')
+
+def load_role_permissions():
+    """Mapping of role name -> frozenset of permission codes (cached)."""
+    def loader():
+        connection = get_db_connection(primary=True)
+        if not connection:
+            logger.warning("Role permissions unavailable, using defaults")
+            return DEFAULT_ROLE_PERMISSIONS
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT r.name, p.code
+                FROM role r
+                LEFT JOIN role_permission rp ON rp.role_id = r.role_id
+                LEFT JOIN permission p ON p.permission_id = rp.permission_id
+                """
+            )
+            grants = {}
+            for role, code in cursor.fetchall():
+                codes = grants.setdefault(role, set())
+                if code is not None:
+                    codes.add(code)
+            cursor.close()
+        except Exception:
+            logger.exception("Role permission load failed, using defaults")
+            return DEFAULT_ROLE_PERMISSIONS
+        finally:
+            connection.close()
+        if not grants:
+            logger.warning("No roles defined, using default role permissions")
+            return DEFAULT_ROLE_PERMISSIONS
+        return {role: frozenset(codes) for role, codes in grants.items()}
+    return PERMISSION_CACHE.get_or_load('role_permissions', loader)
+
+def has_permission(user, code):
+    """True if the user's role grants permission code."""
+    return code in load_role_permissions().get(user.get('role'), ())
+
+def require_permission(code):
+    """Decorator to enforce a permission from the role_permission table."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            user = get_current_user()
+            if user is None:
+                return jsonify({'error': 'Unauthorized'}), 401
+            if not has_permission(user, code):
+                return jsonify({'error': 'Forbidden'}), 403
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def can_read_student(user, student_id):
+    """True if user may read this student's marks and attendance: their own, or any with record.read."""
+    if has_permission(user, 'record.read'):
+        return True
+    return (user.get('role') == 'student' and student_id is not None
+            and str(student_id) == str(user.get('linked_person_id')))
+
+def require_student_access(func):
+    """Decorator for per-student reads: allowed to the student themself or with record.read.
+
+    The student is the student_id route argument, else the student_id query
+    parameter; a read without one needs record.read.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        user = get_current_user()
+        if user is None:
+            return jsonify({'error': 'Unauthorized'}), 401
+        if not can_read_student(user, kwargs.get('student_id', request.args.get('student_id'))):
+            return jsonify({'error': 'Forbidden'}), 403
+        return func(*args, **kwargs)
+    return wrapper
+
+@app.route('/api/login', methods=['POST'])
+def login():
+    """Handle user login"""
+    try:
+        data = request.get_json(silent=True) or {}
+        username = (data.get('username') or data.get('email') or '').strip()
+        password = data.get('password') or ''
+        if not username or not password:
+            return jsonify({'error': 'Username and password are required'}), 400
+
+        retry_after = LOGIN_RATE_LIMITER.retry_after(username)
+        if retry_after:
+            response = jsonify({'error': 'Too many failed login attempts, try again later'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+
+        account = load_account(username)
+        usable = account is not None and account['is_active'] and account['person_type'] in ACCOUNT_ROLES
+        if not PASSWORD_VERIFIER.verify(account['password_hash'] if usable else None, password):
+            LOGIN_RATE_LIMITER.record_failure(username)
+            return jsonify({'error': 'Invalid credentials'}), 401
+
+        LOGIN_RATE_LIMITER.reset(username)
+        LAST_LOGIN_WRITER.record(account['user_id'])
+        user = {
+            'user_id': account['user_id'],
+            'email': account['username'],
+            'role': account['person_type'],
+            'name': account['name'],
+            'linked_person_id': account['linked_person_id']
+        }
+        token = create_session(user)
+        return jsonify({
+            'success': True,
+            'token': token,
+            'user': user
+        }), 200
+    except LoginBusy:
+        response = jsonify({'error': 'Login service busy, try again shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    except Exception as e:
+        logger.exception("Login error")
+        return jsonify({'error': 'Login failed'}), 500
+
+@app.route('/api/logout', methods=['POST'])
+def logout():
+    """Invalidate the current session token."""
+    token = get_bearer_token()
+    if token is not None:
+        try:
+            SESSION_STORE.delete(token)
+        except Exception:
+            logger.exception("Session delete failed")
+    return jsonify({'success': True}), 200
+
+@app.route('/api/roles/permissions', methods=['GET'])
+@require_permission('role.manage')
+def get_role_permissions():
+    """Current role -> permission codes mapping."""
+    return jsonify({role: sorted(codes) for role, codes in load_role_permissions().items()}), 200
+
+@app.route('/api/roles/<role_name>/permissions', methods=['PUT'])
+@require_permission('role.manage')
+def set_role_permissions(role_name):
+    """Replace the permission codes granted to a role."""
+    data = request.get_json(silent=True) or {}
+    codes = data.get('permissions')
+    if not isinstance(codes, list) or not all(isinstance(code, str) for code in codes):
+        return jsonify({'error': 'permissions must be a list of permission codes'}), 400
+    unknown = sorted(set(codes) - set(PERMISSIONS))
+    if unknown:
+        return jsonify({'error': f'Unknown permissions: {", ".join(unknown)}'}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT role_id FROM role WHERE name = %s", (role_name,))
+        row = cursor.fetchone()
+        if row is None:
+            return jsonify({'error': 'Role not found'}), 404
+        role_id = row[0]
+        cursor.execute("DELETE FROM role_permission WHERE role_id = %s", (role_id,))
+        if codes:
+            placeholders = ', '.join(['%s'] * len(set(codes)))
+            cursor.execute(
+                f"INSERT INTO role_permission (role_id, permission_id) "
+                f"SELECT %s, permission_id FROM permission WHERE code IN ({placeholders})",
+                [role_id] + sorted(set(codes))
+            )
+        connection.commit()
+        cursor.close()
+        notify_write('role_permission')
+        return jsonify({'role': role_name, 'permissions': sorted(set(codes))}), 200
+    except Exception as e:
+        connection.rollback()
+        logger.exception("Role permission update failed")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        connection.close()
+
+# ==================== Students ====================
+
+# Columns the student list can project, mapped to their SQL expressions.
+# dob is formatted in SQL so rows can be serialized without a Python pass.
+STUDENT_LIST_COLUMNS = {
+    'student_id': 's.student_id',
+    'first_name': 's.first_name',
+    'last_name': 's.last_name',
+    'dob': "DATE_FORMAT(s.dob, '%%Y-%%m-%%d')",
+    'gender': 's.gender',
+    'email': 's.email',
+    'phone': 's.phone',
+    'address': 's.address',
+    'admission_year': 's.admission_year',
+    'status': 's.status',
+    'program_id': 's.program_id',
+    'program_name': 'p.name',
+    'program_level': 'p.level',
+    'department_name': 'd.name',
+    'dept_id': 'd.dept_id',
+    'version': 's.version'
+}
+STUDENT_LIST_PAGE_SIZE = int(os.getenv('STUDENT_LIST_PAGE_SIZE', 100))
+STUDENT_LIST_MAX_PAGE_SIZE = int(os.getenv('STUDENT_LIST_MAX_PAGE_SIZE', 1000))
+
+def parse_int_arg(name, default=None, minimum=None, maximum=None):
+    """Read an integer query-string argument; raises ValueError on bad input."""
+    raw = request.args.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+    if minimum is not None and value < minimum:
+        raise ValueError(f'{name} must be >= {minimum}')
+    if maximum is not None and value > maximum:
+        value = maximum
+    return value
+
+def parse_version(value):
+    """Row version a client last read (body "version" or If-Match), or None if not sent.
+
+    Updates that carry a version only apply if the row still has it; every
+    update bumps it, so a stale client gets 409 instead of silently
+    overwriting someone else's change.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        return int(str(value).strip().strip('"'))
+    except ValueError:
+        raise ValueError('version must be an integer')
+
+@app.route('/api/students', methods=['GET'])
+def get_students():
+    """Get one page of students with their department and program info.
+
+    Query parameters:
+        limit           page size (default STUDENT_LIST_PAGE_SIZE)
+        cursor          student_id to continue after (from X-Next-Cursor)
+        fields          comma-separated columns to return
+        department      dept_id or department name
+        program         program_id
+        admission_year  admission year
+        status          student status, e.g. Active
+
+    The body is a JSON array; when more rows exist the next cursor is sent
+    in the X-Next-Cursor header.
+    """
+    try:
+        limit = parse_int_arg('limit', STUDENT_LIST_PAGE_SIZE, 1, STUDENT_LIST_MAX_PAGE_SIZE)
+        program_id = parse_int_arg('program')
+        admission_year = parse_int_arg('admission_year')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    unknown = [f for f in fields if f not in STUDENT_LIST_COLUMNS]
+    if unknown:
+        return jsonify({'error': f"Unknown field(s): {', '.join(unknown)}"}), 400
+    if not fields:
+        fields = list(STUDENT_LIST_COLUMNS)
+    elif 'student_id' not in fields:
+        # Needed to build the next cursor
+        fields.insert(0, 'student_id')
+
+    conditions = []
+    params = []
+    cursor_after = request.args.get('cursor')
+    if cursor_after:
+        conditions.append('s.student_id > %s')
+        params.append(cursor_after)
+    department = (request.args.get('department') or '').strip()
+    if department:
+        if department.isdigit():
+            conditions.append('p.dept_id = %s')
+            params.append(int(department))
+        else:
+            conditions.append('d.name = %s')
+            params.append(department)
+    if program_id is not None:
+        conditions.append('s.program_id = %s')
+        params.append(program_id)
+    if admission_year is not None:
+        conditions.append('s.admission_year = %s')
+        params.append(admission_year)
+    status = (request.args.get('status') or '').strip()
+    if status:
+        conditions.append('s.status = %s')
+        params.append(status)
+
+    # Only join what the projection or filters actually reference
+    referenced = ' '.join([STUDENT_LIST_COLUMNS[f] for f in fields] + conditions)
+    joins = ''
+    if re.search(r'\b[pd]\.', referenced):
+        joins += ' LEFT JOIN program p ON s.program_id = p.program_id'
+    if re.search(r'\bd\.', referenced):
+        joins += ' LEFT JOIN department d ON p.dept_id = d.dept_id'
+
+    query = (
+        "SELECT " + ', '.join(f"{STUDENT_LIST_COLUMNS[f]} AS {f}" for f in fields) +
+        " FROM student s" + joins +
+        (" WHERE " + ' AND '.join(conditions) if conditions else '') +
+        " ORDER BY s.student_id LIMIT %s"
+    )
+    params.append(limit + 1)
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(query, tuple(params))
+        students = cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+        response = jsonify(students[:limit])
+        if len(students) > limit:
+            response.headers['X-Next-Cursor'] = students[limit - 1]['student_id']
+        return response, 200
+    except OperationalError as e:
+        logger.exception("Error fetching students")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/students', methods=['POST'])
+@require_permission('student.write')
+def add_student():
+    """Add a new student"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.json
+
+        cursor = connection.cursor()
+
+        required_fields = ['student_id', 'first_name', 'last_name', 'email']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        query = """
+            INSERT INTO student 
+            (student_id, first_name, last_name, dob, gender, email, phone, 
+             address, admission_year, status, program_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+
+        values = (
+            data.get('student_id'),
+            data.get('first_name'),
+            data.get('last_name'),
+            data.get('dob') if data.get('dob') else None,
+            data.get('gender', 'Male'),
+            data.get('email'),
+            data.get('phone'),
+            data.get('address'),
+            data.get('admission_year', datetime.now().year),
+            data.get('status', 'Active'),
+            int(data.get('program_id')) if data.get('program_id') else None
+        )
+
+        cursor.execute(query, values)
+        connection.commit()  # Ensure the transaction is committed
+        logger.info("Student added", extra={'student_id': values[0]})
+        notify_write('student')
+        DASHBOARD_SUMMARY.student_added(values[-1], values[-2])
+        SEARCH_INDEX.put_student(values[0], values[1], values[2], values[5], values[6], values[-1])
+        DASHBOARD_SUMMARY.record_activity(
+            'green', 'fas fa-user-graduate', 'Student Added',
+            f"{values[1]} {values[2]} ({values[0]})"
+        )
+
+        cursor.close()
+        connection.close()
+
+        return jsonify({
+            'message': 'Student added successfully',
+            'student_id': data.get('student_id')
+        }), 201
+
+    except IntegrityError as e:
+        logger.warning("Integrity error adding student: %s", e)
+        if 'Duplicate entry' in str(e):
+            return jsonify({'error': 'Student ID or Email already exists'}), 400
+        return jsonify({'error': 'Database integrity error'}), 400
+    except Exception as e:
+        logger.exception("Error adding student")
+        return jsonify({'error': str(e)}), 500
+
+STUDENT_IMPORT_CHUNK_SIZE = int(os.getenv('STUDENT_IMPORT_CHUNK_SIZE', 500))
+STUDENT_IMPORT_MAX_ERRORS = int(os.getenv('STUDENT_IMPORT_MAX_ERRORS', 1000))
+
+# Column widths from smart_exam_cell_student.sql
+STUDENT_FIELD_LIMITS = {
+    'student_id': 20,
+    'first_name': 100,
+    'last_name': 100,
+    'gender': 10,
+    'email': 255,
+    'phone': 20,
+    'status': 20
+}
+
+STUDENT_UPSERT_QUERY = """
+    INSERT INTO student
+    (student_id, first_name, last_name, dob, gender, email, phone,
+     address, admission_year, status, program_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        first_name = VALUES(first_name),
+        last_name = VALUES(last_name),
+        dob = VALUES(dob),
+        gender = VALUES(gender),
+        email = VALUES(email),
+        phone = VALUES(phone),
+        address = VALUES(address),
+        admission_year = VALUES(admission_year),
+        status = VALUES(status),
+        program_id = VALUES(program_id),
+        version = version + 1
+"""
+
+def claim_student_emails(cursor, chunk):
+    """Split an import chunk into rows it may upsert and (number, values) whose email is taken.
+
+    student has two unique keys, so an upsert whose email belongs to another
+    student_id would update that other student. Current owners are read
+    with a locking read (held until the chunk commits) and the chunk is then
+    replayed in order, so an email freed earlier in the chunk can be reused.
+    """
+    student_ids = sorted({values[0] for _, values in chunk})
+    emails = sorted({values[5] for _, values in chunk})
+    cursor.execute(
+        f"SELECT student_id, email FROM student "
+        f"WHERE student_id IN ({', '.join(['%s'] * len(student_ids))}) "
+        f"OR email IN ({', '.join(['%s'] * len(emails))}) FOR UPDATE",
+        (*student_ids, *emails)
+    )
+    email_owner = {}
+    student_email = {}
+    for student_id, email in cursor.fetchall():
+        student_email[student_id] = email
+        if email is not None:
+            # Emails compare case-insensitively under the table's collation
+            email_owner[email.lower()] = student_id
+    accepted, taken = [], []
+    for number, values in chunk:
+        student_id, email = values[0], values[5].lower()
+        owner = email_owner.get(email)
+        if owner is not None and owner != student_id:
+            taken.append((number, values))
+            continue
+        previous = student_email.get(student_id)
+        if previous is not None and email_owner.get(previous.lower()) == student_id:
+            del email_owner[previous.lower()]
+        email_owner[email] = student_id
+        student_email[student_id] = values[5]
+        accepted.append((number, values))
+    return accepted, taken
+
+def parse_student_row(row, programs):
+    """Validate one import row against the student schema; returns (values, error)."""
+    row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+    for field in ('student_id', 'first_name', 'last_name', 'email'):
+        if not row.get(field):
+            return None, f'Missing required field: {field}'
+    for field, limit in STUDENT_FIELD_LIMITS.items():
+        if len(row.get(field, '')) > limit:
+            return None, f'{field} longer than {limit} characters'
+    if '@' not in row['email']:
+        return None, 'Invalid email'
+
+    dob = row.get('dob') or None
+    if dob:
+        try:
+            dob = datetime.strptime(dob, '%Y-%m-%d').date()
+        except ValueError:
+            return None, 'dob must be YYYY-MM-DD'
+    try:
+        admission_year = int(row['admission_year']) if row.get('admission_year') else datetime.now().year
+    except ValueError:
+        return None, 'admission_year must be an integer'
+
+    program_id = None
+    program = row.get('program_id') or row.get('program')
+    if program:
+        key = int(program) if program.isdigit() else program.lower()
+        program_id = programs.get(key)
+        if program_id is None:
+            return None, f'Unknown program: {program}'
+
+    return (
+        row['student_id'],
+        row['first_name'],
+        row['last_name'],
+        dob,
+        row.get('gender') or 'Male',
+        row['email'],
+        row.get('phone') or None,
+        row.get('address') or None,
+        admission_year,
+        row.get('status') or 'Active',
+        program_id
+    ), None
+
+@app.route('/api/students/import', methods=['POST'])
+@require_permission('student.import')
+def import_students():
+    """Create or update students from a CSV upload, streamed row by row.
+
+    Send the CSV as a multipart "file" upload or as a text/csv body. Rows are
+    upserted in chunks of STUDENT_IMPORT_CHUNK_SIZE, each in its own
+    transaction. A program column may hold a program_id or program name.
+    With ?progress=1 the response is NDJSON with one progress line per chunk
+    followed by the summary; otherwise only the summary is returned.
+    """
+    progress = request.args.get('progress') in ('1', 'true')
+    upload = request.files.get('file')
+    if upload is not None:
+        source = upload.stream
+        if progress:
+            # Uploaded files are closed when the view returns, before a streamed body runs
+            source = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+            shutil.copyfileobj(upload.stream, source)
+            source.seek(0)
+        stream = io.TextIOWrapper(source, encoding='utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig')
+    else:
+        return jsonify({'error': 'Upload a CSV file (multipart "file") or send a text/csv body'}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    def run_import():
+        summary = {'processed': 0, 'written': 0, 'failed': 0, 'errors': []}
+        cursor = connection.cursor()
+        chunk = []
+
+        def fail(number, student_id, error):
+            summary['failed'] += 1
+            if len(summary['errors']) < STUDENT_IMPORT_MAX_ERRORS:
+                summary['errors'].append({'row': number, 'student_id': student_id, 'error': error})
+
+        def flush():
+            accepted, taken = claim_student_emails(cursor, chunk)
+            for number, values in taken:
+                fail(number, values[0], 'Duplicate email')
+            if not accepted:
+                connection.rollback()
+                chunk.clear()
+                return
+            try:
+                cursor.executemany(STUDENT_UPSERT_QUERY, [values for _, values in accepted])
+                connection.commit()
+                summary['written'] += len(accepted)
+            except IntegrityError:
+                # Retry row by row so one bad row does not sink the whole chunk
+                connection.rollback()
+                for number, values in accepted:
+                    try:
+                        # Earlier commits released the chunk's locks: claim the email again
+                        if claim_student_emails(cursor, [(number, values)])[1]:
+                            connection.rollback()
+                            fail(number, values[0], 'Duplicate email')
+                            continue
+                        cursor.execute(STUDENT_UPSERT_QUERY, values)
+                        connection.commit()
+                        summary['written'] += 1
+                    except IntegrityError as e:
+                        connection.rollback()
+                        fail(number, values[0], 'Duplicate email' if 'Duplicate entry' in str(e) else 'Database integrity error')
+            chunk.clear()
+
+        try:
+            programs = load_programs(cursor)
+            reader = csv.DictReader(stream)
+            for number, row in enumerate(reader, start=1):
+                summary['processed'] += 1
+                values, error = parse_student_row(row, programs)
+                if error:
+                    fail(number, (row.get('student_id') or '').strip(), error)
+                    continue
+                chunk.append((number, values))
+                if len(chunk) >= STUDENT_IMPORT_CHUNK_SIZE:
+                    flush()
+                    yield {'processed': summary['processed'], 'written': summary['written'], 'failed': summary['failed']}
+            if chunk:
+                flush()
+        except (csv.Error, UnicodeDecodeError) as e:
+            summary['error'] = f'Could not parse CSV: {e}'
+        except Exception as e:
+            connection.rollback()
+            logger.exception("Error importing students")
+            summary['error'] = f'Import aborted: {str(e)}'
+        finally:
+            stream.close()
+            cursor.close()
+            connection.close()
+            if summary['written']:
+                notify_write('student')
+                # Upserts may move students between programs: recount
+                DASHBOARD_SUMMARY.invalidate()
+                SEARCH_INDEX.invalidate()
+                DASHBOARD_SUMMARY.record_activity(
+                    'green', 'fas fa-file-import', 'Students Imported',
+                    f"{summary['written']} student records imported"
+                )
+        summary['done'] = True
+        yield summary
+
+    if progress:
+        lines = (json.dumps(event, default=str) + '\n' for event in run_import())
+        return streaming_response(lines, connection, mimetype='application/x-ndjson')
+
+    summary = None
+    for summary in run_import():
+        pass
+    return jsonify(summary), (500 if 'error' in summary else 200)
+
+# Columns PATCH /api/students/<id> may change
+STUDENT_PATCH_FIELDS = ('first_name', 'last_name', 'dob', 'gender', 'email', 'phone',
+                        'address', 'admission_year', 'status', 'program_id')
+
+def parse_student_patch(data):
+    """Validate a student PATCH body; returns (column -> value, error)."""
+    unknown = [f for f in data if f not in STUDENT_PATCH_FIELDS and f != 'version']
+    if unknown:
+        return None, f"Unknown or read-only field(s): {', '.join(unknown)}"
+    updates = {}
+    for field in STUDENT_PATCH_FIELDS:
+        if field not in data:
+            continue
+        value = data[field]
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == '':
+            if field in ('first_name', 'last_name', 'email'):
+                return None, f'{field} cannot be empty'
+            updates[field] = None
+            continue
+        if field == 'dob':
+            try:
+                value = datetime.strptime(str(value), '%Y-%m-%d').date()
+            except ValueError:
+                return None, 'dob must be YYYY-MM-DD'
+        elif field in ('admission_year', 'program_id'):
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None, f'{field} must be an integer'
+        else:
+            value = str(value)
+            if field in STUDENT_FIELD_LIMITS and len(value) > STUDENT_FIELD_LIMITS[field]:
+                return None, f'{field} longer than {STUDENT_FIELD_LIMITS[field]} characters'
+            if field == 'email' and '@' not in value:
+                return None, 'Invalid email'
+        updates[field] = value
+    if not updates:
+        return None, 'No fields to update'
+    return updates, None
+
+@app.route('/api/students/<student_id>', methods=['PATCH'])
+@require_permission('student.write')
+def update_student(student_id):
+    """Change some fields of a student.
+
+    Send only the fields to change. With "version" (or If-Match) set to the
+    version last read, the update is refused with 409 if the student has
+    changed since. The response carries the new version.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        expected = parse_version(data.get('version', request.headers.get('If-Match')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    updates, error = parse_student_patch(data)
+    if error:
+        return jsonify({'error': error}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(
+            "SELECT student_id, first_name, last_name, email, phone, program_id, status, version "
+            "FROM student WHERE student_id = %s FOR UPDATE",
+            (student_id,)
+        )
+        current = cursor.fetchone()
+        if not current:
+            connection.rollback()
+            return jsonify({'error': 'Student not found'}), 404
+        if expected is not None and current['version'] != expected:
+            connection.rollback()
+            return jsonify({'error': 'Student was changed by someone else; reload and retry',
+                            'version': current['version']}), 409
+        assignments = ', '.join(f'{column} = %s' for column in updates)
+        cursor.execute(f"UPDATE student SET {assignments}, version = version + 1 WHERE student_id = %s",
+                       (*updates.values(), student_id))
+        connection.commit()
+        cursor.close()
+        connection.close()
+    except IntegrityError as e:
+        connection.rollback()
+        logger.warning("Integrity error updating student: %s", e)
+        if 'Duplicate entry' in str(e):
+            return jsonify({'error': 'Email already exists'}), 400
+        return jsonify({'error': 'Invalid program reference'}), 400
+    except Exception as e:
+        logger.exception("Error updating student")
+        return jsonify({'error': str(e)}), 500
+
+    notify_write('student')
+    updated = {**current, **updates}
+    if (updated['program_id'], updated['status']) != (current['program_id'], current['status']):
+        DASHBOARD_SUMMARY.student_removed(current['program_id'], current['status'])
+        DASHBOARD_SUMMARY.student_added(updated['program_id'], updated['status'])
+    SEARCH_INDEX.put_student(student_id, updated['first_name'], updated['last_name'], updated['email'],
+                             updated['phone'], updated['program_id'])
+    return jsonify({
+        'message': 'Student updated successfully',
+        'student_id': student_id,
+        'version': current['version'] + 1
+    }), 200
+
+@app.route('/api/students/<student_id>', methods=['DELETE'])
+@require_permission('student.delete')
+def delete_student(student_id):
+    """Delete a student with their enrollment, attendance and scores (?mode=archive keeps copies)"""
+    try:
+        archive = bulk_delete_mode({})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        job = BulkDelete(connection, archive)
+        job.remove_students([student_id])
+        job.close()
+        if not job.students:
+            return jsonify({'error': 'Student not found'}), 404
+        notify_write('student', 'section_result', *STUDENT_CHILD_TABLES)
+        DASHBOARD_SUMMARY.student_removed(job.students[0][1], job.students[0][2])
+        SEARCH_INDEX.remove('student', job.students[0][0])
+        
+        return jsonify({'message': 'Student archived successfully' if archive else 'Student deleted successfully'}), 200
+        
+    except Exception as e:
+        logger.exception("Error deleting student")
+        return jsonify({'error': str(e)}), 500
+
+# ==================== Departments ====================
+
+@app.route('/api/departments', methods=['GET'])
+def get_departments():
+    """Get all departments"""
+    def loader():
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("SELECT * FROM department ORDER BY name")
+            departments = cursor.fetchall()
+            cursor.close()
+            return departments
+        finally:
+            connection.close()
+
+    try:
+        return cached_reference_response('departments', ('department',), loader)
+    except OperationalError as e:
+        logger.error("Error fetching departments: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/departments', methods=['POST'])
+@require_permission('department.write')
+def add_department():
+    """Create a new department"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.json or {}
+        name = (data.get('name') or '').strip()
+        if not name:
+            return jsonify({'error': 'Department name is required'}), 400
+
+        cursor = connection.cursor()
+        cursor.execute("INSERT INTO department (name) VALUES (%s)", (name,))
+        connection.commit()
+        notify_write('department')
+
+        new_id = cursor.lastrowid
+        cursor.close()
+        connection.close()
+        return jsonify({'dept_id': new_id, 'name': name}), 201
+    except IntegrityError:
+        return jsonify({'error': 'Department already exists'}), 400
+    except Exception as e:
+        logger.error("Error adding department: %s", e)
+        return jsonify({'error': 'Failed to add department'}), 500
+
+@app.route('/api/departments/<int:dept_id>', methods=['PUT'])
+@require_permission('department.write')
+def update_department(dept_id: int):
+    """Update department name"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.json or {}
+        name = (data.get('name') or '').strip()
+        if not name:
+            return jsonify({'error': 'Department name is required'}), 400
+
+        cursor = connection.cursor()
+        cursor.execute("UPDATE department SET name=%s WHERE dept_id=%s", (name, dept_id))
+        connection.commit()
+        notify_write('department')
+        affected = cursor.rowcount
+        cursor.close()
+        connection.close()
+        if affected == 0:
+            return jsonify({'error': 'Department not found'}), 404
+        return jsonify({'dept_id': dept_id, 'name': name}), 200
+    except IntegrityError:
+        return jsonify({'error': 'Another department with this name already exists'}), 400
+    except Exception as e:
+        logger.error("Error updating department: %s", e)
+        return jsonify({'error': 'Failed to update department'}), 500
+
+@app.route('/api/departments/<int:dept_id>', methods=['DELETE'])
+@require_permission('department.write')
+def delete_department(dept_id: int):
+    """Delete a department.
+
+    With ?cascade=1 its programs, students, courses, sections, assessments
+    and their enrollment, attendance and scores are removed too, in bounded
+    chunks (see BulkDelete.department); this also needs student.delete.
+    ?mode=archive keeps copies in the history tables, and ?progress=1
+    streams NDJSON progress as for bulk student deletes.
+    """
+    if request.args.get('cascade') in ('1', 'true'):
+        return purge_department(dept_id)
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM department WHERE dept_id=%s", (dept_id,))
+        connection.commit()
+        notify_write('department')
+        affected = cursor.rowcount
+        cursor.close()
+        connection.close()
+        if affected == 0:
+            return jsonify({'error': 'Department not found'}), 404
+        return jsonify({'success': True}), 200
+    except IntegrityError as e:
+        # Likely foreign key constraint due to programs/courses referencing department
+        return jsonify({'error': 'Cannot delete department referenced by other records; use ?cascade=1'}), 400
+    except Exception as e:
+        logger.error("Error deleting department: %s", e)
+        return jsonify({'error': 'Failed to delete department'}), 500
+
+def purge_department(dept_id):
+    """Cascade branch of delete_department."""
+    if not has_permission(get_current_user(), 'student.delete'):
+        return jsonify({'error': 'Forbidden'}), 403
+    try:
+        archive = bulk_delete_mode({})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    cursor = connection.cursor()
+    cursor.execute("SELECT name FROM department WHERE dept_id = %s", (dept_id,))
+    existing = cursor.fetchone()
+    cursor.close()
+    if not existing:
+        connection.close()
+        return jsonify({'error': 'Department not found'}), 404
+
+    job = BulkDelete(connection, archive)
+
+    def finish(job, summary):
+        if job.removed:
+            notify_write('department', 'program', 'course', 'faculty', 'section_result', *ARCHIVE_TABLES)
+            DASHBOARD_SUMMARY.invalidate()
+            # Faculty documents carry dept_id
+            SEARCH_INDEX.invalidate()
+            DASHBOARD_SUMMARY.record_activity(
+                'red', 'fas fa-building', 'Department Archived' if job.archive else 'Department Deleted',
+                f"{existing[0]} and {len(job.students)} students {'archived' if job.archive else 'deleted'}"
+            )
+        summary['dept_id'] = dept_id
+        return summary
+
+    return bulk_delete_response(job, job.department(dept_id), finish, 'Department delete aborted')
+
+# ==================== Programs ====================
+
+@app.route('/api/programs', methods=['GET'])
+def get_programs():
+    """Get all programs with department info"""
+    def loader():
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("""
+                SELECT p.*, d.name as department_name
+                FROM program p
+                LEFT JOIN department d ON p.dept_id = d.dept_id
+                ORDER BY p.name
+            """)
+            programs = cursor.fetchall()
+            cursor.close()
+            return programs
+        finally:
+            connection.close()
+
+    try:
+        return cached_reference_response('programs', ('program', 'department'), loader)
+    except OperationalError as e:
+        logger.error("Error fetching programs: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ==================== Faculty ====================
+
+@app.route('/api/faculty', methods=['GET'])
+def get_faculty():
+    """Get all faculty members"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        query = """
+            SELECT f.*, d.name as department_name
+            FROM faculty f
+            LEFT JOIN department d ON f.dept_id = d.dept_id
+            ORDER BY f.faculty_id
+        """
+        cursor.execute(query)
+        faculty = cursor.fetchall()
+        cursor.close()
+        connection.close()
+        return jsonify(faculty), 200
+    except OperationalError as e:
+        logger.error("Error fetching faculty: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/faculty', methods=['POST'])
+@require_permission('faculty.write')
+def add_faculty():
+    """Add a new faculty member"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.json or {}
+        required = ['first_name', 'last_name', 'email', 'designation', 'dept_id']
+        for field in required:
+            if not data.get(field):
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+
+        cursor = connection.cursor()
+        query = (
+            "INSERT INTO faculty (first_name, last_name, designation, email, phone, dept_id) "
+            "VALUES (%s, %s, %s, %s, %s, %s)"
+        )
+        values = (
+            data.get('first_name').strip(),
+            data.get('last_name').strip(),
+            data.get('designation').strip(),
+            data.get('email').strip(),
+            (data.get('phone') or '').strip() or None,
+            int(data.get('dept_id'))
+        )
+        cursor.execute(query, values)
+        connection.commit()
+        notify_write('faculty')
+        new_id = cursor.lastrowid
+        DASHBOARD_SUMMARY.faculty_added(values[2], values[5])
+        SEARCH_INDEX.put_faculty(new_id, values[0], values[1], values[3], values[4], values[2], values[5])
+        DASHBOARD_SUMMARY.record_activity(
+            'green', 'fas fa-chalkboard-teacher', 'Faculty Added',
+            f"{values[0]} {values[1]}, {values[2]}"
+        )
+        cursor.close()
+        connection.close()
+        return jsonify({'faculty_id': new_id}), 201
+    except IntegrityError as e:
+        return jsonify({'error': 'Duplicate or invalid data'}), 400
+    except Exception as e:
+        logger.exception("Error adding faculty")
+        return jsonify({'error': 'Failed to add faculty'}), 500
+
+@app.route('/api/faculty/<int:faculty_id>', methods=['PUT'])
+@require_permission('faculty.write')
+def update_faculty(faculty_id: int):
+    """Update an existing faculty member"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.json or {}
+        fields = []
+        values = []
+        for col in ['first_name', 'last_name', 'designation', 'email', 'phone', 'dept_id']:
+            if col in data and data.get(col) is not None:
+                fields.append(f"{col}=%s")
+                if col == 'dept_id':
+                    values.append(int(data.get(col)))
+                else:
+                    values.append(data.get(col))
+        if not fields:
+            return jsonify({'error': 'No fields to update'}), 400
+        values.append(faculty_id)
+
+        cursor = connection.cursor()
+        previous = None
+        if 'designation' in data or 'dept_id' in data:
+            # Old grouping keys, to move the dashboard counts incrementally
+            cursor.execute("SELECT designation, dept_id FROM faculty WHERE faculty_id=%s FOR UPDATE", (faculty_id,))
+            previous = cursor.fetchone()
+        cursor.execute(f"UPDATE faculty SET {', '.join(fields)} WHERE faculty_id=%s", tuple(values))
+        affected = cursor.rowcount
+        cursor.execute(
+            "SELECT first_name, last_name, email, phone, designation, dept_id FROM faculty WHERE faculty_id=%s",
+            (faculty_id,)
+        )
+        current = cursor.fetchone()
+        connection.commit()
+        notify_write('faculty')
+        if current:
+            SEARCH_INDEX.put_faculty(faculty_id, *current)
+        if previous:
+            DASHBOARD_SUMMARY.faculty_removed(*previous)
+            DASHBOARD_SUMMARY.faculty_added(
+                data['designation'] if data.get('designation') is not None else previous[0],
+                int(data['dept_id']) if data.get('dept_id') is not None else previous[1]
+            )
+        cursor.close()
+        connection.close()
+        if affected == 0:
+            return jsonify({'error': 'Faculty not found'}), 404
+        return jsonify({'success': True}), 200
+    except IntegrityError:
+        return jsonify({'error': 'Duplicate or invalid data'}), 400
+    except Exception as e:
+        logger.error("Error updating faculty: %s", e)
+        return jsonify({'error': 'Failed to update faculty'}), 500
+
+@app.route('/api/faculty/<int:faculty_id>', methods=['DELETE'])
+@require_permission('faculty.write')
+def delete_faculty(faculty_id: int):
+    """Delete a faculty member"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT designation, dept_id FROM faculty WHERE faculty_id=%s", (faculty_id,))
+        previous = cursor.fetchone()
+        cursor.execute("DELETE FROM faculty WHERE faculty_id=%s", (faculty_id,))
+        connection.commit()
+        notify_write('faculty')
+        affected = cursor.rowcount
+        if previous and affected:
+            DASHBOARD_SUMMARY.faculty_removed(*previous)
+            SEARCH_INDEX.remove('faculty', faculty_id)
+        cursor.close()
+        connection.close()
+        if affected == 0:
+            return jsonify({'error': 'Faculty not found'}), 404
+        return jsonify({'success': True}), 200
+    except IntegrityError:
+        return jsonify({'error': 'Cannot delete faculty referenced by other records'}), 400
+    except Exception as e:
+        logger.error("Error deleting faculty: %s", e)
+        return jsonify({'error': 'Failed to delete faculty'}), 500
+
+# ==================== Courses ====================
+
+@app.route('/api/courses', methods=['GET'])
+def get_courses():
+    """Get all courses"""
+    def loader():
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute("""
+                SELECT c.*, d.name as department_name
+                FROM course c
+                LEFT JOIN department d ON c.dept_id = d.dept_id
+                ORDER BY c.course_id
+            """)
+            courses = cursor.fetchall()
+            cursor.close()
+            return courses
+        finally:
+            connection.close()
+
+    try:
+        return cached_reference_response('courses', ('course', 'department'), loader)
+    except OperationalError as e:
+        logger.error("Error fetching courses: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+# ==================== Bulk Deletes ====================
+
+BULK_DELETE_CONFIG = {
+    # Students removed per transaction, together with the rows that reference them
+    'student_chunk': int(os.getenv('BULK_DELETE_STUDENT_CHUNK', 200)),
+    # Rows removed per transaction from any other table
+    'row_chunk': int(os.getenv('BULK_DELETE_ROW_CHUNK', 1000)),
+    # Largest student_ids list accepted in one request
+    'max_ids': int(os.getenv('BULK_DELETE_MAX_IDS', 50000)),
+    # Seconds to sleep between chunks, to leave room for other writers on a busy server
+    'pause': float(os.getenv('BULK_DELETE_PAUSE', 0))
+}
+
+BULK_DELETE_MODES = ('delete', 'archive')
+
+# Tables a bulk delete may remove rows from, with their primary key. In
+# archive mode rows are first copied to <table>_history (migrate_history_tables).
+ARCHIVE_TABLES = {
+    'department': 'dept_id',
+    'program': 'program_id',
+    'course': 'course_id',
+    'section': 'section_id',
+    'assessment': 'assessment_id',
+    'student': 'student_id',
+    'enrollment': 'enrollment_id',
+    'attendance': 'attendance_id',
+    'score': 'score_id'
+}
+
+# Tables with a student_id column, emptied for a student in the same transaction as the student
+STUDENT_CHILD_TABLES = ('enrollment', 'attendance', 'score')
+
+
+class BulkDelete:
+    """One bulk delete or archive run, on a connection it owns.
+
+    Work is split into chunks that are each locked, moved and committed on
+    their own, so no lock is held for longer than one chunk and concurrent
+    readers only ever wait on a chunk. A run that stops part way leaves
+    whole chunks done; running it again picks up the rest.
+    """
+
+    def __init__(self, connection, archive=False):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.archive = archive
+        self.removed = Counter()  # table -> rows removed
+        self.students = []  # (student_id, program_id, status) of removed students
+        self._columns = {}
+
+    def _column_list(self, table):
+        if table not in self._columns:
+            self.cursor.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY ordinal_position",
+                (table,)
+            )
+            self._columns[table] = ', '.join(f'`{row[0]}`' for row in self.cursor.fetchall())
+        return self._columns[table]
+
+    def _move(self, table, condition, params):
+        """Archive (in archive mode) and delete the rows of table matching condition, uncommitted."""
+        if self.archive:
+            columns = self._column_list(table)
+            # REPLACE so a student archived, re-created and archived again keeps its latest copy
+            self.cursor.execute(
+                f"REPLACE INTO `{table}_history` ({columns}) SELECT {columns} FROM `{table}` WHERE {condition}",
+                params
+            )
+        self.cursor.execute(f"DELETE FROM `{table}` WHERE {condition}", params)
+        self.removed[table] += self.cursor.rowcount
+
+    def _pause(self):
+        if BULK_DELETE_CONFIG['pause']:
+            time.sleep(BULK_DELETE_CONFIG['pause'])
+
+    def progress(self):
+        return {'students': len(self.students), 'removed': dict(self.removed)}
+
+    def remove_students(self, student_ids):
+        """Remove one chunk of students and their child rows in a single transaction.
+
+        The students are locked first, so no enrollment, attendance or score
+        row can be added for them (the foreign key check waits on the lock)
+        between the archive copy and the delete.
+        """
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        self.cursor.execute(
+            f"SELECT student_id, program_id, status FROM student WHERE student_id IN ({placeholders}) FOR UPDATE",
+            list(student_ids)
+        )
+        found = self.cursor.fetchall()
+        if found:
+            ids = [row[0] for row in found]
+            condition = f"student_id IN ({', '.join(['%s'] * len(ids))})"
+            # Stored results are derived data: dropped, not archived, and their sections re-ranked
+            self.cursor.execute(f"SELECT DISTINCT section_id FROM section_result WHERE {condition}", ids)
+            sections = sorted(row[0] for row in self.cursor.fetchall())
+            if sections:
+                lock_sections(self.cursor, sections)
+                self.cursor.execute(f"DELETE FROM section_result WHERE {condition}", ids)
+                self.removed['section_result'] += self.cursor.rowcount
+            for table in STUDENT_CHILD_TABLES:
+                self._move(table, condition, ids)
+            self._move('student', condition, ids)
+            if sections:
+                rank_results(self.cursor, sections)
+        self.connection.commit()
+        self.students.extend(found)
+
+    def students_by_id(self, student_ids):
+        """Remove the given students, yielding progress after each chunk."""
+        size = BULK_DELETE_CONFIG['student_chunk']
+        for start in range(0, len(student_ids), size):
+            if start:
+                self._pause()
+            self.remove_students(student_ids[start:start + size])
+            yield self.progress()
+
+    def students_where(self, condition, params):
+        """Remove the students matching condition, yielding progress after each chunk."""
+        size = BULK_DELETE_CONFIG['student_chunk']
+        after = ''
+        while True:
+            # Keyset order rather than re-reading from the start, so ids that
+            # vanish concurrently cannot make the loop spin
+            self.cursor.execute(
+                f"SELECT student_id FROM student WHERE ({condition}) AND student_id > %s "
+                "ORDER BY student_id LIMIT %s",
+                (*params, after, size)
+            )
+            ids = [row[0] for row in self.cursor.fetchall()]
+            self.connection.commit()
+            if not ids:
+                return
+            self.remove_students(ids)
+            yield self.progress()
+            if len(ids) < size:
+                return
+            after = ids[-1]
+            self._pause()
+
+    def rows_where(self, table, condition, params):
+        """Remove the rows of table matching condition, row_chunk rows per transaction."""
+        key = ARCHIVE_TABLES[table]
+        size = BULK_DELETE_CONFIG['row_chunk']
+        while True:
+            self.cursor.execute(
+                f"SELECT `{key}` FROM `{table}` WHERE {condition} ORDER BY `{key}` LIMIT %s FOR UPDATE",
+                (*params, size)
+            )
+            keys = [row[0] for row in self.cursor.fetchall()]
+            if keys:
+                self._move(table, f"`{key}` IN ({', '.join(['%s'] * len(keys))})", keys)
+            self.connection.commit()
+            if not keys:
+                return
+            yield self.progress()
+            if len(keys) < size:
+                return
+            self._pause()
+
+    def department(self, dept_id):
+        """Remove a department and everything under it, children first.
+
+        Students of its programs go with their own rows; other students'
+        enrollment, attendance and scores in its sections go next, then its
+        assessments, sections, courses and programs. Faculty are people, not
+        department data: they are kept and their dept_id is cleared.
+        """
+        programs = "program_id IN (SELECT program_id FROM program WHERE dept_id = %s)"
+        courses = "course_id IN (SELECT course_id FROM course WHERE dept_id = %s)"
+        sections = f"section_id IN (SELECT section_id FROM section WHERE {courses})"
+        yield from self.students_where(programs, (dept_id,))
+        self.cursor.execute(f"DELETE FROM section_result WHERE {sections}", (dept_id,))
+        self.removed['section_result'] += self.cursor.rowcount
+        self.connection.commit()
+        for table, condition in (
+            ('score', f"assessment_id IN (SELECT assessment_id FROM assessment WHERE {sections})"),
+            ('enrollment', sections),
+            ('attendance', sections),
+            ('assessment', sections),
+            ('section', courses),
+            ('course', 'dept_id = %s'),
+            ('program', 'dept_id = %s')
+        ):
+            yield from self.rows_where(table, condition, (dept_id,))
+        self.cursor.execute("UPDATE faculty SET dept_id = NULL WHERE dept_id = %s", (dept_id,))
+        detached = self.cursor.rowcount
+        self._move('department', 'dept_id = %s', (dept_id,))
+        self.connection.commit()
+        progress = self.progress()
+        progress['faculty_detached'] = detached
+        yield progress
 
-        default_departments = [
-            ('CSE',),
-            ('IT',),
-            ('AIDS',),
-            ('ECE',)
-        ]
+    def close(self):
+        self.cursor.close()
+        self.connection.close()
 
-        cursor.executemany(
-            "INSERT IGNORE INTO department (name) VALUES (%s)",
-            default_departments
-        )
-        connection.commit()
-    except Exception:
-        pass
-    finally:
+
+def bulk_delete_response(job, events, finish, failure_message):
+    """Run a BulkDelete generator, as NDJSON progress lines with ?progress=1 or as one summary.
+
+    finish(job, summary) runs once the work stops (even part way) and
+    returns the summary to send; it is where caches are brought up to date.
+    """
+    def run():
+        summary = None
         try:
-            cursor.close()
-            connection.close()
-        except Exception:
-            pass
+            for summary in events:
+                yield summary
+            summary = dict(summary or job.progress())
+        except Exception as e:
+            job.connection.rollback()
+            logger.exception(failure_message)
+            summary = job.progress()
+            summary['error'] = f'{failure_message}: {str(e)}'
+        finally:
+            job.close()
+        summary['mode'] = 'archive' if job.archive else 'delete'
+        summary['done'] = True
+        yield finish(job, summary)
+
+    if request.args.get('progress') in ('1', 'true'):
+        lines = (json.dumps(event, default=str) + '\n' for event in run())
+        return streaming_response(lines, job.connection, mimetype='application/x-ndjson')
 
-def get_db_connection():
-    """Create and return a database connection"""
+    summary = None
+    for summary in run():
+        pass
+    return jsonify(summary), (500 if 'error' in summary else 200)
+
+def bulk_delete_mode(data):
+    """True for archive mode; raises ValueError on an unknown mode."""
+    mode = (data.get('mode') or request.args.get('mode') or 'delete').lower()
+    if mode not in BULK_DELETE_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(BULK_DELETE_MODES)}")
+    return mode == 'archive'
+
+@app.route('/api/students/bulk-delete', methods=['POST'])
+@require_permission('student.delete')
+def bulk_delete_students():
+    """Delete or archive many students with their enrollment, attendance and scores.
+
+    JSON body: either "student_ids" (a list) or a "program_id" and/or
+    "admission_year" filter, plus "mode": "delete" (default) or "archive".
+    Students are removed BULK_DELETE_STUDENT_CHUNK at a time, each chunk in
+    its own transaction. With ?progress=1 the response is NDJSON with one
+    progress line per chunk followed by the summary.
+    """
+    data = request.get_json(silent=True) or {}
     try:
-        connection = pymysql.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            database=DB_CONFIG['database'],
-            port=DB_CONFIG['port']
-        )
-        print("Database connection successful")
-        return connection
-    except OperationalError as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
+        archive = bulk_delete_mode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    student_ids = data.get('student_ids')
+    filters = {name: data.get(name) for name in ('program_id', 'admission_year') if data.get(name) is not None}
+    if student_ids is not None and filters:
+        return jsonify({'error': 'Give either student_ids or program_id/admission_year, not both'}), 400
+    if student_ids is not None:
+        if not isinstance(student_ids, list) or not all(isinstance(s, str) and s for s in student_ids):
+            return jsonify({'error': 'student_ids must be a list of student IDs'}), 400
+        if len(student_ids) > BULK_DELETE_CONFIG['max_ids']:
+            return jsonify({'error': f"At most {BULK_DELETE_CONFIG['max_ids']} student_ids per request"}), 400
+        student_ids = list(dict.fromkeys(student_ids))
+    elif filters:
+        try:
+            filters = {name: int(value) for name, value in filters.items()}
+        except (TypeError, ValueError):
+            return jsonify({'error': 'program_id and admission_year must be integers'}), 400
+    else:
+        return jsonify({'error': 'student_ids, program_id or admission_year is required'}), 400
 
-# Ensure score table exists with a minimal schema
-def ensure_score_table_if_missing():
     connection = get_db_connection()
     if not connection:
-        return
-    try:
-        cursor = connection.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS score (
-                score_id INT PRIMARY KEY AUTO_INCREMENT,
-                student_id VARCHAR(50) NOT NULL,
-                course_id INT NOT NULL,
-                score DECIMAL(5,2) NOT NULL,
-                semester VARCHAR(20),
-                exam_date DATE,
-                INDEX idx_score_student (student_id)
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    job = BulkDelete(connection, archive)
+    if student_ids is not None:
+        events = job.students_by_id(student_ids)
+    else:
+        condition = ' AND '.join(f'{name} = %s' for name in filters)
+        events = job.students_where(condition, tuple(filters.values()))
+
+    def finish(job, summary):
+        if job.students:
+            notify_write('student', 'section_result', *STUDENT_CHILD_TABLES)
+            for student_id, program_id, status in job.students:
+                DASHBOARD_SUMMARY.student_removed(program_id, status)
+                SEARCH_INDEX.remove('student', student_id)
+            DASHBOARD_SUMMARY.record_activity(
+                'red', 'fas fa-user-minus', 'Students Archived' if job.archive else 'Students Deleted',
+                f"{len(job.students)} student records {'archived' if job.archive else 'deleted'}"
             )
-            """
-        )
-        connection.commit()
-    except Exception:
-        pass
-    finally:
+        return summary
+
+    return bulk_delete_response(job, events, finish, 'Bulk student delete aborted')
+
+# ==================== Search ====================
+
+SEARCH_CONFIG = {
+    # Seconds between full rebuilds, which fold in writes made by other workers
+    'refresh': int(os.getenv('SEARCH_INDEX_REFRESH', 300)),
+    'default_limit': int(os.getenv('SEARCH_DEFAULT_LIMIT', 10)),
+    'max_limit': int(os.getenv('SEARCH_MAX_LIMIT', 50)),
+    # Share of a term's trigrams a token must contain to count as a fuzzy match
+    'min_similarity': float(os.getenv('SEARCH_MIN_SIMILARITY', 0.5))
+}
+
+def search_terms(value):
+    """Lower-cased alphanumeric words of value."""
+    return [term for term in re.split(r'[^0-9a-z]+', str(value).lower()) if term]
+
+def trigrams(token):
+    """Padded trigrams, so short and misspelled words still share a few."""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """In-memory prefix and trigram index over student and faculty contacts.
+
+    Documents are keyed ('student', student_id) or ('faculty', faculty_id).
+    Tokens are kept in a sorted list of (token, key) for prefix lookups by
+    bisection, and every token's trigrams map to the keys containing it for
+    typo-tolerant and infix matches. Write handlers update the index in
+    place; a full rebuild every SEARCH_INDEX_REFRESH seconds runs in the
+    background while the previous index keeps serving.
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._ready = False  # set by the first successful build
+        self._pending = None  # deltas made while a rebuild runs, replayed onto its result
+        self._docs = {}
+        self._doc_tokens = {}
+        self._tokens = []
+        self._trigrams = {}
+
+    def invalidate(self):
+        """Force a rebuild on the next query."""
+        with self._lock:
+            self._built_at = None
+
+    def ensure_built(self):
+        """Build on first use; refresh in the background once stale."""
+        with self._lock:
+            built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < self.refresh_interval:
+            return
+        if not self._ready:
+            with self._build_lock:
+                if not self._ready:
+                    self._rebuild()
+        elif self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._background_rebuild, name='search-index', daemon=True).start()
+
+    def _background_rebuild(self):
         try:
-            cursor.close()
-            connection.close()
+            self._rebuild()
         except Exception:
-            pass
+            logger.exception("Search index rebuild failed")
+        finally:
+            self._build_lock.release()
 
-# ==================== Authentication ====================
+    def _rebuild(self):
+        with self._lock:
+            self._pending = []
+        try:
+            connection = get_db_connection(primary=True)
+            if not connection:
+                raise OperationalError('Database connection failed')
+            try:
+                cursor = connection.cursor()
+                cursor.execute("SELECT student_id, first_name, last_name, email, phone, program_id FROM student")
+                students = cursor.fetchall()
+                cursor.execute("SELECT faculty_id, first_name, last_name, email, phone, designation, dept_id FROM faculty")
+                faculty = cursor.fetchall()
+                cursor.close()
+            finally:
+                connection.close()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
 
-SESSIONS = {}
+        fresh = SearchIndex(self.refresh_interval)
+        for row in students:
+            fresh._add(*self._student_doc(*row), bulk=True)
+        for row in faculty:
+            fresh._add(*self._faculty_doc(*row), bulk=True)
+        fresh._tokens.sort()
+        with self._lock:
+            for method, args in self._pending:
+                getattr(fresh, method)(*args)
+            self._pending = None
+            self._docs, self._doc_tokens = fresh._docs, fresh._doc_tokens
+            self._tokens, self._trigrams = fresh._tokens, fresh._trigrams
+            self._built_at = time.monotonic()
+            self._ready = True
+        logger.info("Search index built: %s students, %s faculty", len(students), len(faculty))
 
-def get_current_user():
-    """Extract user from Bearer token in Authorization header."""
-    auth_header = request.headers.get('Authorization', '')
-    if not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ', 1)[1].strip()
-    return SESSIONS.get(token)
+    @staticmethod
+    def _student_doc(student_id, first_name, last_name, email, phone, program_id):
+        doc = {'type': 'student', 'id': student_id, 'name': f"{first_name or ''} {last_name or ''}".strip(),
+               'email': email, 'phone': phone, 'program_id': program_id}
+        return ('student', student_id), doc
 
-def require_roles(*allowed_roles):
-    """Decorator to enforce role-based access control."""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            user = get_current_user()
-            if user is None:
-                return jsonify({'error': 'Unauthorized'}), 401
-            if allowed_roles and user.get('role') not in allowed_roles:
-                return jsonify({'error': 'Forbidden'}), 403
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+    @staticmethod
+    def _faculty_doc(faculty_id, first_name, last_name, email, phone, designation, dept_id):
+        doc = {'type': 'faculty', 'id': faculty_id, 'name': f"{first_name or ''} {last_name or ''}".strip(),
+               'email': email, 'phone': phone, 'designation': designation, 'dept_id': dept_id}
+        return ('faculty', faculty_id), doc
 
-@app.route('/api/login', methods=['POST'])
-def login():
-    """Handle user login"""
-    try:
-        data = request.json
-        email = data.get('email')
-        password = data.get('password')
-        
-        # Demo users (passwords redacted). For real deployments, integrate with
-        # a proper user store and do NOT keep passwords in source control.
-        valid_users = {
-            'admin@college.edu': {'password': '<REDACTED_PASSWORD>', 'role': 'admin', 'name': 'Admin User'},
-            'faculty@college.edu': {'password': '<REDACTED_PASSWORD>', 'role': 'faculty', 'name': 'Faculty User'},
-            'student@college.edu': {'password': '<REDACTED_PASSWORD>', 'role': 'student', 'name': 'Student User'}
-        }
-        
-        if email in valid_users and valid_users[email]['password'] == password:
-            token = uuid.uuid4().hex
-            SESSIONS[token] = {
-                'email': email,
-                'role': valid_users[email]['role'],
-                'name': valid_users[email]['name']
-            }
-            return jsonify({
-                'success': True,
-                'token': token,
-                'user': {
-                    'email': email,
-                    'role': valid_users[email]['role'],
-                    'name': valid_users[email]['name']
-                }
-            }), 200
-        else:
-            return jsonify({'error': 'Invalid credentials'}), 401
-    except Exception as e:
-        print(f"Login error: {e}")
-        return jsonify({'error': 'Login failed'}), 500
+    @staticmethod
+    def _doc_token_set(doc):
+        tokens = set(search_terms(doc['name']))
+        if doc['type'] == 'student':
+            tokens.add(str(doc['id']).lower())
+        if doc.get('email'):
+            local = doc['email'].lower().split('@', 1)[0]
+            tokens.add(local)
+            tokens.update(search_terms(local))
+        if doc.get('phone'):
+            digits = re.sub(r'\D', '', doc['phone'])
+            if digits:
+                tokens.add(digits)
+        return tokens
 
-@app.route('/api/logout', methods=['POST'])
-def logout():
-    """Invalidate the current session token."""
-    user = get_current_user()
-    if user is None:
-        return jsonify({'success': True}), 200
-    auth_header = request.headers.get('Authorization', '')
-    token = auth_header.split(' ', 1)[1].strip() if ' ' in auth_header else ''
-    if token in SESSIONS:
-        del SESSIONS[token]
-    return jsonify({'success': True}), 200
+    # _add/_remove assume the caller holds self._lock (or owns an unshared index)
+    def _add(self, key, doc, bulk=False):
+        """Index doc; bulk appends unsorted and leaves sorting _tokens to the caller."""
+        if not bulk:
+            self._remove(key)
+        tokens = self._doc_token_set(doc)
+        self._docs[key] = doc
+        self._doc_tokens[key] = tokens
+        for token in tokens:
+            if bulk:
+                self._tokens.append((token, key))
+            else:
+                bisect.insort(self._tokens, (token, key))
+            for trigram in trigrams(token):
+                self._trigrams.setdefault(trigram, set()).add(key)
 
-# ==================== Students ====================
+    def _remove(self, key):
+        tokens = self._doc_tokens.pop(key, None)
+        if tokens is None:
+            return
+        del self._docs[key]
+        for token in tokens:
+            i = bisect.bisect_left(self._tokens, (token, key))
+            if i < len(self._tokens) and self._tokens[i] == (token, key):
+                del self._tokens[i]
+            for trigram in trigrams(token):
+                keys = self._trigrams.get(trigram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._trigrams[trigram]
 
-@app.route('/api/students', methods=['GET'])
-def get_students():
-    """Get all students with their department and program info"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    try:
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        query = """
-            SELECT 
-                s.student_id,
-                s.first_name,
-                s.last_name,
-                s.dob,
-                s.gender,
-                s.email,
-                s.phone,
-                s.address,
-                s.admission_year,
-                s.status,
-                s.program_id,
-                p.name as program_name,
-                p.level as program_level,
-                d.name as department_name,
-                d.dept_id
-            FROM student s
-            LEFT JOIN program p ON s.program_id = p.program_id
-            LEFT JOIN department d ON p.dept_id = d.dept_id
-            ORDER BY s.student_id
+    def _delta(self, method, *args):
+        with self._lock:
+            # Before the first build there is nothing to patch: the build reads the change
+            if self._ready:
+                getattr(self, method)(*args)
+            if self._pending is not None:
+                self._pending.append((method, args))
+
+    def put_student(self, student_id, first_name, last_name, email, phone, program_id):
+        self._delta('_add', *self._student_doc(student_id, first_name, last_name, email, phone, program_id))
+
+    def put_faculty(self, faculty_id, first_name, last_name, email, phone, designation, dept_id):
+        self._delta('_add', *self._faculty_doc(faculty_id, first_name, last_name, email, phone,
+                                               designation, dept_id))
+
+    def remove(self, kind, doc_id):
+        self._delta('_remove', (kind, doc_id))
+
+    def _prefix_range(self, term):
+        """Slice of _tokens whose tokens start with term."""
+        return (bisect.bisect_left(self._tokens, (term,)),
+                bisect.bisect_left(self._tokens, (term + '\uffff',)))
+
+    def _score(self, key, terms, kind):
+        """Summed score of key over all terms (None unless every term matches).
+
+        3 for an exact token, 2 for a token prefix, otherwise the best share
+        of the term's trigrams found in one token if at least min_similarity.
         """
-        cursor.execute(query)
-        students = cursor.fetchall()
-        
-        for student in students:
-            if student['dob']:
-                student['dob'] = student['dob'].strftime('%Y-%m-%d')
-        
-        cursor.close()
-        connection.close()
-        return jsonify(students), 200
+        if kind and key[0] != kind:
+            return None
+        tokens = self._doc_tokens[key]
+        total = 0
+        for term in terms:
+            if term in tokens:
+                total += 3
+            elif any(token.startswith(term) for token in tokens):
+                total += 2
+            elif len(term) >= 3:
+                term_trigrams = trigrams(term)
+                best = max(len(term_trigrams & trigrams(token)) for token in tokens) / len(term_trigrams)
+                if best < SEARCH_CONFIG['min_similarity']:
+                    return None
+                total += best
+            else:
+                return None
+        return total
+
+    def _fuzzy_candidates(self, term):
+        """Keys sharing enough trigrams with term to possibly pass _score, most shared first."""
+        term_trigrams = trigrams(term)
+        needed = math.ceil(SEARCH_CONFIG['min_similarity'] * len(term_trigrams))
+        common = max(len(self._docs) // 4, 100)
+        counts = Counter()
+        for trigram in term_trigrams:
+            keys = self._trigrams.get(trigram, ())
+            if len(keys) > common:
+                # Too common to narrow anything down; _score still counts it
+                needed -= 1
+                continue
+            counts.update(keys)
+        if needed <= 0:
+            return list(self._docs)
+        # Most shared trigrams first, so callers can stop once they have enough
+        return [key for key, count in counts.most_common() if count >= needed]
+
+    def search(self, query, kind=None, limit=10):
+        """Top limit documents matching every term of query, best first.
+
+        Candidates come from the most selective term's prefix range, with
+        trigram matching as a fallback when prefixes find too few; only a
+        few times limit candidates are scored, so common prefixes stay cheap.
+        """
+        self.ensure_built()
+        terms = sorted(set(search_terms(query)))
+        if not terms:
+            return []
+        wanted = limit * 4
+        with self._lock:
+            ranges = {term: self._prefix_range(term) for term in terms}
+            driver = min(terms, key=lambda term: ranges[term][1] - ranges[term][0])
+            found = {}
+            start, stop = ranges[driver]
+            for i in range(start, stop):
+                key = self._tokens[i][1]
+                if key not in found:
+                    score = self._score(key, terms, kind)
+                    if score is not None:
+                        found[key] = score
+                        if len(found) >= wanted:
+                            break
+            if len(found) < limit and len(driver) >= 3:
+                for key in self._fuzzy_candidates(driver):
+                    if key not in found:
+                        score = self._score(key, terms, kind)
+                        if score is not None:
+                            found[key] = score
+                            if len(found) >= wanted:
+                                break
+            ranked = heapq.nsmallest(limit, found.items(),
+                                     key=lambda item: (-item[1], self._docs[item[0]]['name'], str(item[0][1])))
+            return [dict(self._docs[key], score=round(score, 3)) for key, score in ranked]
+
+
+SEARCH_INDEX = SearchIndex(SEARCH_CONFIG['refresh'])
+
+@app.route('/api/search', methods=['GET'])
+@require_permission('directory.search')
+def search_people():
+    """Type-ahead search over students and faculty.
+
+    Query parameters:
+        q      text to match against names, emails, student_id and phone
+        type   student or faculty (default both)
+        limit  number of results (default SEARCH_DEFAULT_LIMIT)
+    """
+    query = (request.args.get('q') or '').strip()
+    kind = request.args.get('type') or None
+    if kind not in (None, 'student', 'faculty'):
+        return jsonify({'error': 'type must be student or faculty'}), 400
+    try:
+        limit = parse_int_arg('limit', SEARCH_CONFIG['default_limit'], 1, SEARCH_CONFIG['max_limit'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    started = time.perf_counter()
+    try:
+        results = SEARCH_INDEX.search(query, kind, limit)
     except OperationalError as e:
-        print(f"Error fetching students: {e}")
-        traceback.print_exc()
+        logger.error("Error building search index: %s", e)
         return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'query': query,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 3)
+    }), 200
 
-# Add debugging logs to verify data and query execution
-@app.route('/api/students', methods=['POST'])
-@require_roles('admin')
-def add_student():
-    """Add a new student"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+# ==================== Scores ====================
 
-    try:
-        data = request.json
-        print("Received data:", data)  # Debugging log
+SCORE_LIST_PAGE_SIZE = int(os.getenv('SCORE_LIST_PAGE_SIZE', 100))
+SCORE_LIST_MAX_PAGE_SIZE = int(os.getenv('SCORE_LIST_MAX_PAGE_SIZE', 1000))
 
-        cursor = connection.cursor()
+@app.route('/api/scores', methods=['GET'])
+def get_scores():
+    """Get one page of scores with student, assessment and course details.
 
-        required_fields = ['student_id', 'first_name', 'last_name', 'email']
-        for field in required_fields:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+    Query parameters:
+        limit          page size (default SCORE_LIST_PAGE_SIZE)
+        cursor         score_id to continue after (from X-Next-Cursor)
+        student_id     only this student's scores
+        assessment_id  only this assessment
+        section_id     only assessments of this section
 
-        query = """
-            INSERT INTO student 
-            (student_id, first_name, last_name, dob, gender, email, phone, 
-             address, admission_year, status, program_id)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+    Every join is a primary-key lookup, and each filter is served by the
+    score.student_id / score.assessment_id indexes (which carry score_id, so
+    the keyset order needs no sort).
+    """
+    try:
+        limit = parse_int_arg('limit', SCORE_LIST_PAGE_SIZE, 1, SCORE_LIST_MAX_PAGE_SIZE)
+        after = parse_int_arg('cursor')
+        assessment_id = parse_int_arg('assessment_id')
+        section_id = parse_int_arg('section_id')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        values = (
-            data.get('student_id'),
-            data.get('first_name'),
-            data.get('last_name'),
-            data.get('dob') if data.get('dob') else None,
-            data.get('gender', 'Male'),
-            data.get('email'),
-            data.get('phone'),
-            data.get('address'),
-            data.get('admission_year', datetime.now().year),
-            data.get('status', 'Active'),
-            int(data.get('program_id')) if data.get('program_id') else None
-        )
+    conditions = []
+    params = []
+    if after is not None:
+        conditions.append('sc.score_id > %s')
+        params.append(after)
+    student_id = (request.args.get('student_id') or '').strip()
+    if student_id:
+        conditions.append('sc.student_id = %s')
+        params.append(student_id)
+    if assessment_id is not None:
+        conditions.append('sc.assessment_id = %s')
+        params.append(assessment_id)
+    if section_id is not None:
+        conditions.append('sc.assessment_id IN (SELECT assessment_id FROM assessment WHERE section_id = %s)')
+        params.append(section_id)
 
-        print("Executing query:", query)  # Debugging log
-        print("With values:", values)  # Debugging log
+    query = (
+        "SELECT sc.score_id, sc.student_id,"
+        " CONCAT(s.first_name, ' ', s.last_name) AS student_name,"
+        " sc.assessment_id, a.title AS assessment_title, a.type AS assessment_type, a.max_marks,"
+        " a.section_id, c.course_id, c.title AS course_title,"
+        " sc.marks_obtained AS score, sc.marks_obtained, sc.version"
+        " FROM score sc"
+        " LEFT JOIN student s ON s.student_id = sc.student_id"
+        " LEFT JOIN assessment a ON a.assessment_id = sc.assessment_id"
+        " LEFT JOIN section sec ON sec.section_id = a.section_id"
+        " LEFT JOIN course c ON c.course_id = sec.course_id" +
+        (" WHERE " + ' AND '.join(conditions) if conditions else '') +
+        " ORDER BY sc.score_id LIMIT %s"
+    )
+    params.append(limit + 1)
 
-        cursor.execute(query, values)
-        connection.commit()  # Ensure the transaction is committed
-        print("Transaction committed")  # Debugging log
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
 
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(query, tuple(params))
+        scores = cursor.fetchall()
         cursor.close()
         connection.close()
 
-        return jsonify({
-            'message': 'Student added successfully',
-            'student_id': data.get('student_id')
-        }), 201
-
-    except IntegrityError as e:
-        print(f"Integrity error: {e}")
-        if 'Duplicate entry' in str(e):
-            return jsonify({'error': 'Student ID or Email already exists'}), 400
-        return jsonify({'error': 'Database integrity error'}), 400
+        response = jsonify(scores[:limit])
+        if len(scores) > limit:
+            response.headers['X-Next-Cursor'] = str(scores[limit - 1]['score_id'])
+        return response, 200
     except Exception as e:
-        print(f"Error adding student: {e}")
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Error fetching scores")
+        return jsonify({'error': f'Failed to fetch scores: {str(e)}'}), 500
 
-@app.route('/api/students/<student_id>', methods=['DELETE'])
-@require_roles('admin')
-def delete_student(student_id):
-    """Delete a student"""
+@app.route('/api/scores', methods=['POST'])
+@require_permission('score.write')
+def add_score():
+    """Add a new score"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
-        cursor.execute("SELECT student_id FROM student WHERE student_id = %s", (student_id,))
-        if not cursor.fetchone():
-            return jsonify({'error': 'Student not found'}), 404
+        data = request.json or {}
+
+        required = ['student_id', 'assessment_id', 'marks_obtained']
+        for field in required:
+            if not data.get(field):
+                return jsonify({'error': f'Missing required field: {field}'}), 400
         
-        # Delete related records first
-        cursor.execute("DELETE FROM enrollment WHERE student_id = %s", (student_id,))
-        cursor.execute("DELETE FROM attendance WHERE student_id = %s", (student_id,))
-        cursor.execute("DELETE FROM score WHERE student_id = %s", (student_id,))
+        cursor = connection.cursor()
+        query = """
+            INSERT INTO score (student_id, assessment_id, marks_obtained)
+            VALUES (%s, %s, %s)
+        """
+        values = (
+            str(data.get('student_id')).strip(),
+            int(data.get('assessment_id')),
+            float(data.get('marks_obtained'))
+        )
         
-        # Delete the student
-        query = "DELETE FROM student WHERE student_id = %s"
-        cursor.execute(query, (student_id,))
+        cursor.execute(query, values)
+        new_id = cursor.lastrowid
+        refresh_results(cursor, [(values[0], values[1])])
         connection.commit()
+        notify_write('score', 'section_result')
+        DASHBOARD_SUMMARY.record_activity(
+            'orange', 'fas fa-clipboard-check', 'Score Recorded',
+            f"{values[0]} - Assessment {values[1]}: {values[2]}"
+        )
         
         cursor.close()
         connection.close()
+        return jsonify({'score_id': new_id, 'message': 'Score added successfully'}), 201
         
-        return jsonify({'message': 'Student deleted successfully'}), 200
-        
+    except IntegrityError as e:
+        logger.warning("Integrity error adding score: %s", e)
+        return jsonify({'error': 'Invalid student or course reference'}), 400
     except Exception as e:
-        print(f"Error deleting student: {e}")
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Error adding score")
+        return jsonify({'error': f'Failed to add score: {str(e)}'}), 500
 
-# ==================== Departments ====================
+SCORE_BULK_MAX_ROWS = int(os.getenv('SCORE_BULK_MAX_ROWS', 50000))
+SCORE_BULK_CHUNK_SIZE = int(os.getenv('SCORE_BULK_CHUNK_SIZE', 1000))
+
+def read_bulk_rows():
+    """Rows from a JSON array, a {'rows': [...]} object, or a CSV body/upload."""
+    upload = request.files.get('file')
+    if upload is not None:
+        return list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+    if request.mimetype == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.get_data(as_text=True))))
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('rows')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of rows or a CSV upload')
+    return data
+
+@app.route('/api/scores/bulk', methods=['POST'])
+@require_permission('score.write')
+def add_scores_bulk():
+    """Insert many scores in one transaction and report each row's outcome.
+
+    Accepts a JSON array (or {"rows": [...]}) of objects, a text/csv body, or a
+    multipart "file" upload with student_id, assessment_id, marks_obtained
+    columns. A student/assessment pair that already has a score is updated
+    in place (status "updated"), so re-uploading a corrected sheet replaces
+    marks rather than duplicating rows. Other valid rows are inserted with
+    chunked executemany; invalid rows are skipped and reported.
+    """
+    try:
+        rows = read_bulk_rows()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({'error': str(e)}), 400
+    if not rows:
+        return jsonify({'error': 'No rows supplied'}), 400
+    if len(rows) > SCORE_BULK_MAX_ROWS:
+        return jsonify({'error': f'At most {SCORE_BULK_MAX_ROWS} rows per upload'}), 400
 
-@app.route('/api/departments', methods=['GET'])
-def get_departments():
-    """Get all departments"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        query = "SELECT * FROM department ORDER BY name"
-        cursor.execute(query)
-        departments = cursor.fetchall()
+        cursor = connection.cursor()
+        student_ids = load_student_ids(cursor)
+        max_marks = load_assessment_max_marks(cursor)
+
+        results = []
+        parsed = []  # (row number, values)
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                results.append({'row': number, 'status': 'rejected', 'error': 'Row must be an object'})
+                continue
+            missing = [f for f in ('student_id', 'assessment_id', 'marks_obtained')
+                       if row.get(f) in (None, '')]
+            if missing:
+                results.append({'row': number, 'status': 'rejected',
+                                'error': f"Missing required field: {missing[0]}"})
+                continue
+            try:
+                values = (
+                    str(row['student_id']).strip(),
+                    int(row['assessment_id']),
+                    float(row['marks_obtained'])
+                )
+                if not math.isfinite(values[2]):
+                    raise ValueError
+            except (TypeError, ValueError):
+                results.append({'row': number, 'status': 'rejected',
+                                'error': 'assessment_id must be an integer and marks_obtained a finite number'})
+                continue
+            results.append(None)
+            parsed.append((number, values))
+
+        # IDs missing from the cached sets may be newer than the cache: check them once
+        unknown_students = {v[0] for _, v in parsed if v[0] not in student_ids}
+        unknown_assessments = {v[1] for _, v in parsed if v[1] not in max_marks}
+        if unknown_students:
+            placeholders = ', '.join(['%s'] * len(unknown_students))
+            cursor.execute(f"SELECT student_id FROM student WHERE student_id IN ({placeholders})",
+                           tuple(unknown_students))
+            student_ids = student_ids | {r[0] for r in cursor.fetchall()}
+            REFERENCE_CACHE.invalidate('student_ids')
+        if unknown_assessments:
+            placeholders = ', '.join(['%s'] * len(unknown_assessments))
+            cursor.execute(f"SELECT assessment_id, max_marks FROM assessment WHERE assessment_id IN ({placeholders})",
+                           tuple(unknown_assessments))
+            max_marks = {**max_marks, **{r[0]: r[1] for r in cursor.fetchall()}}
+            REFERENCE_CACHE.invalidate('assessment_max_marks')
+
+        accepted = []
+        seen = set()
+        for number, values in parsed:
+            student_id, assessment_id, marks = values
+            error = None
+            if (student_id, assessment_id) in seen:
+                error = 'Duplicate student/assessment in upload'
+            elif student_id not in student_ids:
+                error = f'Unknown student_id: {student_id}'
+            elif assessment_id not in max_marks:
+                error = f'Unknown assessment_id: {assessment_id}'
+            elif marks < 0 or (max_marks[assessment_id] is not None and marks > float(max_marks[assessment_id])):
+                error = f'marks_obtained must be between 0 and {max_marks[assessment_id]}'
+            if error:
+                results[number - 1] = {'row': number, 'status': 'rejected', 'error': error}
+            else:
+                results[number - 1] = {'row': number, 'status': 'accepted'}
+                seen.add((student_id, assessment_id))
+                accepted.append((number, values))
+
+        query = "INSERT INTO score (student_id, assessment_id, marks_obtained) VALUES (%s, %s, %s)"
+        connection.begin()
+        updated = 0
+        for start in range(0, len(accepted), SCORE_BULK_CHUNK_SIZE):
+            chunk = accepted[start:start + SCORE_BULK_CHUNK_SIZE]
+            # score has no unique (student_id, assessment_id) key: look for existing rows
+            cursor.execute(
+                f"SELECT score_id, student_id, assessment_id FROM score "
+                f"WHERE (student_id, assessment_id) IN ({', '.join(['(%s, %s)'] * len(chunk))}) FOR UPDATE",
+                [value for _, values in chunk for value in values[:2]]
+            )
+            existing = {}
+            for score_id, student_id, assessment_id in cursor.fetchall():
+                existing.setdefault((student_id, assessment_id), []).append(score_id)
+            inserts, updates = [], []
+            for number, values in chunk:
+                score_ids = existing.get(values[:2])
+                if score_ids is None:
+                    inserts.append(values)
+                    continue
+                # Every copy gets the new mark, so a lower correction is not hidden by MAX()
+                updates.extend((score_id, {'marks_obtained': values[2]}) for score_id in score_ids)
+                results[number - 1]['status'] = 'updated'
+                updated += 1
+            if updates:
+                cursor.execute(*score_case_update(updates))
+            if inserts:
+                cursor.executemany(query, inserts)
+        accepted = [values for _, values in accepted]
+        refresh_results(cursor, [(student_id, assessment_id) for student_id, assessment_id, _ in accepted])
+        connection.commit()
+        notify_write('score', 'section_result')
+        if accepted:
+            DASHBOARD_SUMMARY.record_activity(
+                'orange', 'fas fa-clipboard-check', 'Scores Uploaded',
+                f"{len(accepted)} scores recorded"
+            )
         cursor.close()
         connection.close()
-        return jsonify(departments), 200
-    except OperationalError as e:
-        print(f"Error fetching departments: {e}")
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/departments', methods=['POST'])
-@require_roles('admin')
-def add_department():
-    """Create a new department"""
+        return jsonify({
+            'accepted': len(accepted),
+            'inserted': len(accepted) - updated,
+            'updated': updated,
+            'rejected': len(rows) - len(accepted),
+            'results': results
+        }), 201 if accepted else 400
+
+    except IntegrityError as e:
+        connection.rollback()
+        logger.warning("Integrity error in bulk score insert: %s", e)
+        return jsonify({'error': 'Invalid student or assessment reference; no scores were added'}), 400
+    except Exception as e:
+        connection.rollback()
+        logger.exception("Error adding scores in bulk")
+        return jsonify({'error': f'Failed to add scores: {str(e)}'}), 500
+
+# Columns a score update may change
+SCORE_UPDATE_FIELDS = ('student_id', 'assessment_id', 'marks_obtained')
+
+def parse_score_fields(data):
+    """Typed score columns present (and not null) in data; raises ValueError."""
+    fields = {}
+    try:
+        for col in SCORE_UPDATE_FIELDS:
+            if col in data and data.get(col) is not None:
+                if col == 'assessment_id':
+                    fields[col] = int(data.get(col))
+                elif col == 'marks_obtained':
+                    fields[col] = float(data.get(col))
+                    if not math.isfinite(fields[col]):
+                        raise ValueError
+                else:
+                    fields[col] = str(data.get(col)).strip()
+    except (TypeError, ValueError):
+        raise ValueError('assessment_id must be an integer and marks_obtained a finite number')
+    return fields
+
+def lock_max_marks(cursor, assessment_ids):
+    """assessment_id -> max_marks for assessment_ids, read under a shared lock."""
+    assessment_ids = list(set(assessment_ids))
+    if not assessment_ids:
+        return {}
+    cursor.execute(
+        f"SELECT assessment_id, max_marks FROM assessment "
+        f"WHERE assessment_id IN ({', '.join(['%s'] * len(assessment_ids))}) LOCK IN SHARE MODE",
+        assessment_ids
+    )
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+def score_marks_error(fields, marks, assessment_id, limits):
+    """Why an update would leave a score out of its assessment's range, or None."""
+    if 'marks_obtained' not in fields and 'assessment_id' not in fields:
+        return None
+    if assessment_id not in limits:
+        return f'Unknown assessment_id: {assessment_id}'
+    marks = fields.get('marks_obtained', marks)
+    limit = limits[assessment_id]
+    if marks is not None and (marks < 0 or (limit is not None and marks > float(limit))):
+        return f'marks_obtained must be between 0 and {limit}'
+    return None
+
+@app.route('/api/scores/<int:score_id>', methods=['PUT'])
+@require_permission('score.write')
+def update_score(score_id: int):
+    """Update an existing score (409 if "version"/If-Match is given and stale)"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-
     try:
         data = request.json or {}
-        name = (data.get('name') or '').strip()
-        if not name:
-            return jsonify({'error': 'Department name is required'}), 400
-
+        try:
+            fields = parse_score_fields(data)
+            expected = parse_version(data.get('version', request.headers.get('If-Match')))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not fields:
+            return jsonify({'error': 'No fields to update'}), 400
         cursor = connection.cursor()
-        cursor.execute("CREATE TABLE IF NOT EXISTS department (dept_id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(100) UNIQUE NOT NULL)")
-        cursor.execute("INSERT INTO department (name) VALUES (%s)", (name,))
+        cursor.execute("SELECT student_id, assessment_id, version, marks_obtained FROM score "
+                       "WHERE score_id=%s FOR UPDATE", (score_id,))
+        current = cursor.fetchone()
+        if current is None:
+            connection.rollback()
+            return jsonify({'error': 'Score not found'}), 404
+        if expected is not None and current[2] != expected:
+            connection.rollback()
+            return jsonify({'error': 'Score was changed by someone else; reload and retry', 'version': current[2]}), 409
+        assessment_id = fields.get('assessment_id', current[1])
+        error = score_marks_error(fields, current[3], assessment_id, lock_max_marks(cursor, [assessment_id]))
+        if error:
+            connection.rollback()
+            return jsonify({'error': error}), 400
+        cursor.execute(
+            f"UPDATE score SET {', '.join(f'{col}=%s' for col in fields)}, version=version+1 WHERE score_id=%s",
+            (*fields.values(), score_id)
+        )
+        # The score may have moved to another student or assessment: refresh both results
+        refresh_results(cursor, [current[:2], (fields.get('student_id', current[0]),
+                                                fields.get('assessment_id', current[1]))])
         connection.commit()
-
-        new_id = cursor.lastrowid
         cursor.close()
         connection.close()
-        return jsonify({'dept_id': new_id, 'name': name}), 201
-    except IntegrityError:
-        return jsonify({'error': 'Department already exists'}), 400
+        notify_write('score', 'section_result')
+        return jsonify({'success': True, 'version': current[2] + 1}), 200
     except Exception as e:
-        print(f"Error adding department: {e}")
-        return jsonify({'error': 'Failed to add department'}), 500
+        logger.error("Error updating score: %s", e)
+        return jsonify({'error': 'Failed to update score'}), 500
+
+def score_case_update(items):
+    """One UPDATE applying each (score_id, fields) pair via CASE and bumping version."""
+    ids = [score_id for score_id, _ in items]
+    assignments, params = [], []
+    for col in SCORE_UPDATE_FIELDS:
+        cases = [(score_id, fields[col]) for score_id, fields in items if col in fields]
+        if not cases:
+            continue
+        assignments.append(f"{col} = CASE score_id {' '.join(['WHEN %s THEN %s'] * len(cases))} ELSE {col} END")
+        for score_id, value in cases:
+            params.extend((score_id, value))
+    assignments.append('version = version + 1')
+    query = f"UPDATE score SET {', '.join(assignments)} WHERE score_id IN ({', '.join(['%s'] * len(ids))})"
+    return query, params + ids
+
+@app.route('/api/scores', methods=['PATCH'])
+@require_permission('score.write')
+def update_scores_batch():
+    """Apply many score corrections in one transaction.
+
+    JSON body: an array (or {"updates": [...]}) of objects with score_id,
+    the fields to change (marks_obtained, assessment_id, student_id) and
+    optionally the version last read. Either every update is applied, or
+    none is and each failing item is reported: 409 if any was changed
+    concurrently (stale version), 400 otherwise. Rows are locked, checked
+    and written SCORE_BULK_CHUNK_SIZE at a time, one CASE-based UPDATE per
+    chunk.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('updates')
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'Expected a non-empty JSON array of updates'}), 400
+    if len(data) > SCORE_BULK_MAX_ROWS:
+        return jsonify({'error': f'At most {SCORE_BULK_MAX_ROWS} updates per request'}), 400
+
+    results = []
+    items = []  # (score_id, fields, expected version)
+    seen = set()
+    for number, item in enumerate(data, start=1):
+        if not isinstance(item, dict):
+            results.append({'item': number, 'status': 'rejected', 'error': 'Update must be an object'})
+            continue
+        try:
+            score_id = int(item.get('score_id'))
+        except (TypeError, ValueError):
+            results.append({'item': number, 'score_id': item.get('score_id'), 'status': 'rejected',
+                            'error': 'score_id must be an integer'})
+            continue
+        try:
+            fields = parse_score_fields(item)
+            expected = parse_version(item.get('version'))
+            error = None
+        except ValueError as e:
+            error = str(e)
+        if error is None and not fields:
+            error = 'No fields to update'
+        elif error is None and score_id in seen:
+            error = 'Duplicate score_id in request'
+        if error:
+            results.append({'item': number, 'score_id': score_id, 'status': 'rejected', 'error': error})
+            continue
+        seen.add(score_id)
+        results.append(None)
+        items.append((number, score_id, fields, expected))
+    if len(items) < len(data):
+        return jsonify({'updated': 0, 'results': [r for r in results if r]}), 400
 
-@app.route('/api/departments/<int:dept_id>', methods=['PUT'])
-@require_roles('admin')
-def update_department(dept_id: int):
-    """Update department name"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
 
     try:
-        data = request.json or {}
-        name = (data.get('name') or '').strip()
-        if not name:
-            return jsonify({'error': 'Department name is required'}), 400
-
         cursor = connection.cursor()
-        cursor.execute("UPDATE department SET name=%s WHERE dept_id=%s", (name, dept_id))
+        connection.begin()
+        failures = []
+        touched = []  # (student_id, assessment_id) before and after each update
+        for start in range(0, len(items), SCORE_BULK_CHUNK_SIZE):
+            chunk = items[start:start + SCORE_BULK_CHUNK_SIZE]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"SELECT score_id, version, assessment_id, student_id, marks_obtained FROM score "
+                f"WHERE score_id IN ({placeholders}) FOR UPDATE",
+                [score_id for _, score_id, _, _ in chunk]
+            )
+            current = {row[0]: row[1:] for row in cursor.fetchall()}
+            # Ranges come from the assessments as they stand in this transaction, not the cache
+            limits = lock_max_marks(cursor, [fields.get('assessment_id', current[score_id][1])
+                                             for _, score_id, fields, _ in chunk if score_id in current])
+            for number, score_id, fields, expected in chunk:
+                if score_id not in current:
+                    failures.append({'item': number, 'score_id': score_id, 'status': 'not_found'})
+                    continue
+                version, assessment_id, student_id, marks = current[score_id]
+                if expected is not None and version != expected:
+                    failures.append({'item': number, 'score_id': score_id, 'status': 'conflict', 'version': version})
+                    continue
+                touched.append((student_id, assessment_id))
+                assessment_id = fields.get('assessment_id', assessment_id)
+                touched.append((fields.get('student_id', student_id), assessment_id))
+                error = score_marks_error(fields, marks, assessment_id, limits)
+                if error:
+                    failures.append({'item': number, 'score_id': score_id, 'status': 'rejected', 'error': error})
+                    continue
+                results[number - 1] = {'item': number, 'score_id': score_id, 'status': 'updated',
+                                       'version': version + 1}
+            if not failures:
+                cursor.execute(*score_case_update([(score_id, fields) for _, score_id, fields, _ in chunk]))
+        if failures:
+            connection.rollback()
+            conflict = any(f['status'] == 'conflict' for f in failures)
+            return jsonify({'updated': 0, 'results': failures}), 409 if conflict else 400
+        refresh_results(cursor, touched)
         connection.commit()
-        affected = cursor.rowcount
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Department not found'}), 404
-        return jsonify({'dept_id': dept_id, 'name': name}), 200
-    except IntegrityError:
-        return jsonify({'error': 'Another department with this name already exists'}), 400
+    except IntegrityError as e:
+        connection.rollback()
+        logger.warning("Integrity error in batch score update: %s", e)
+        return jsonify({'error': 'Invalid student or assessment reference; no scores were updated'}), 400
     except Exception as e:
-        print(f"Error updating department: {e}")
-        return jsonify({'error': 'Failed to update department'}), 500
+        connection.rollback()
+        logger.exception("Error updating scores in batch")
+        return jsonify({'error': f'Failed to update scores: {str(e)}'}), 500
 
-@app.route('/api/departments/<int:dept_id>', methods=['DELETE'])
-@require_roles('admin')
-def delete_department(dept_id: int):
-    """Delete a department"""
+    notify_write('score', 'section_result')
+    DASHBOARD_SUMMARY.record_activity(
+        'orange', 'fas fa-clipboard-check', 'Scores Corrected',
+        f"{len(items)} scores updated"
+    )
+    return jsonify({'updated': len(items), 'results': results}), 200
+
+@app.route('/api/scores/<int:score_id>', methods=['DELETE'])
+@require_permission('score.delete')
+def delete_score(score_id: int):
+    """Delete a score"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-
     try:
         cursor = connection.cursor()
-        cursor.execute("DELETE FROM department WHERE dept_id=%s", (dept_id,))
+        cursor.execute("SELECT student_id, assessment_id FROM score WHERE score_id=%s FOR UPDATE", (score_id,))
+        existing = cursor.fetchone()
+        if existing is None:
+            connection.rollback()
+            return jsonify({'error': 'Score not found'}), 404
+        cursor.execute("DELETE FROM score WHERE score_id=%s", (score_id,))
+        refresh_results(cursor, [existing])
         connection.commit()
-        affected = cursor.rowcount
+        notify_write('score', 'section_result')
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Department not found'}), 404
         return jsonify({'success': True}), 200
-    except IntegrityError as e:
-        # Likely foreign key constraint due to programs/courses referencing department
-        return jsonify({'error': 'Cannot delete department referenced by other records'}), 400
     except Exception as e:
-        print(f"Error deleting department: {e}")
-        return jsonify({'error': 'Failed to delete department'}), 500
+        logger.error("Error deleting score: %s", e)
+        return jsonify({'error': 'Failed to delete score'}), 500
 
-# ==================== Programs ====================
+# ==================== Grades ====================
+
+# (minimum percentage, letter grade, grade point), highest band first
+GRADE_SCALE = (
+    (90, 'O', 10),
+    (80, 'A+', 9),
+    (70, 'A', 8),
+    (60, 'B+', 7),
+    (50, 'B', 6),
+    (40, 'C', 5),
+    (0, 'F', 0)
+)
+
+def build_grade_query(enrollment_filter, score_filter):
+    """One set-based query grading every enrollment matched by enrollment_filter.
+
+    Each assessment contributes marks / max_marks * weight_percent; the
+    percentage is the weighted total over the section's total weight, or raw
+    marks over max marks when no assessment carries a weight. Missing scores
+    count as zero, and duplicate score rows for the same assessment count once.
+    """
+    letter = ' '.join(f"WHEN t.percentage >= {minimum} THEN '{grade}'" for minimum, grade, _ in GRADE_SCALE)
+    points = ' '.join(f"WHEN t.percentage >= {minimum} THEN {point}" for minimum, _, point in GRADE_SCALE)
+    return f"""
+        SELECT t.*,
+               CASE WHEN t.percentage IS NULL THEN NULL {letter} END AS letter_grade,
+               CASE WHEN t.percentage IS NULL THEN NULL {points} END AS grade_point
+        FROM (
+            SELECT e.section_id,
+                   e.student_id,
+                   s.first_name,
+                   s.last_name,
+                   c.course_id,
+                   c.title AS course_title,
+                   COUNT(a.assessment_id) AS assessments,
+                   COUNT(sc.marks_obtained) AS assessments_scored,
+                   SUM(a.weight_percent) AS total_weight,
+                   ROUND(SUM(COALESCE(sc.marks_obtained, 0) / NULLIF(a.max_marks, 0) * a.weight_percent), 2)
+                       AS weighted_total,
+                   ROUND(CASE
+                       WHEN SUM(a.weight_percent) > 0 THEN
+                           100 * SUM(COALESCE(sc.marks_obtained, 0) / NULLIF(a.max_marks, 0) * a.weight_percent)
+                               / SUM(a.weight_percent)
+                       ELSE 100 * SUM(COALESCE(sc.marks_obtained, 0)) / NULLIF(SUM(a.max_marks), 0)
+                   END, 2) AS percentage
+            FROM enrollment e
+            JOIN section sec ON sec.section_id = e.section_id
+            LEFT JOIN course c ON c.course_id = sec.course_id
+            LEFT JOIN student s ON s.student_id = e.student_id
+            LEFT JOIN assessment a ON a.section_id = e.section_id
+            LEFT JOIN (
+                SELECT student_id, assessment_id, MAX(marks_obtained) AS marks_obtained
+                FROM score
+                WHERE {score_filter}
+                GROUP BY student_id, assessment_id
+            ) sc ON sc.assessment_id = a.assessment_id AND sc.student_id = e.student_id
+            WHERE {enrollment_filter}
+            GROUP BY e.section_id, e.student_id, s.first_name, s.last_name, c.course_id, c.title
+        ) t
+    """
+
+def grade_row(row):
+    """JSON-friendly numbers for one graded row."""
+    for key in ('total_weight', 'weighted_total', 'percentage'):
+        if row[key] is not None:
+            row[key] = float(row[key])
+    return row
+
+@app.route('/api/grades/sections/<int:section_id>', methods=['GET'])
+@require_permission('record.read')
+def get_section_grades(section_id: int):
+    """Weighted totals and letter grades for every student in a section"""
+    query = build_grade_query(
+        'e.section_id = %s',
+        'assessment_id IN (SELECT assessment_id FROM assessment WHERE section_id = %s)'
+    ) + " ORDER BY t.percentage DESC, t.student_id"
 
-@app.route('/api/programs', methods=['GET'])
-def get_programs():
-    """Get all programs with department info"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
         cursor = connection.cursor(pymysql.cursors.DictCursor)
-        query = """
-            SELECT p.*, d.name as department_name
-            FROM program p
-            LEFT JOIN department d ON p.dept_id = d.dept_id
-            ORDER BY p.name
-        """
-        cursor.execute(query)
-        programs = cursor.fetchall()
+        # Placeholders appear in textual order: the score subquery comes first
+        cursor.execute(query, (section_id, section_id))
+        results = [grade_row(row) for row in cursor.fetchall()]
         cursor.close()
         connection.close()
-        return jsonify(programs), 200
+        return jsonify({
+            'section_id': section_id,
+            'student_count': len(results),
+            'results': results
+        }), 200
     except OperationalError as e:
-        print(f"Error fetching programs: {e}")
+        logger.error("Error computing section grades: %s", e)
         return jsonify({'error': str(e)}), 500
 
-# ==================== Faculty ====================
+@app.route('/api/grades/students/<student_id>', methods=['GET'])
+@require_student_access
+def get_student_grades(student_id):
+    """Weighted totals and letter grades for one student across their sections"""
+    query = build_grade_query('e.student_id = %s', 'student_id = %s') + " ORDER BY t.section_id"
 
-@app.route('/api/faculty', methods=['GET'])
-def get_faculty():
-    """Get all faculty members"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
         cursor = connection.cursor(pymysql.cursors.DictCursor)
-        query = """
-            SELECT f.*, d.name as department_name
-            FROM faculty f
-            LEFT JOIN department d ON f.dept_id = d.dept_id
-            ORDER BY f.faculty_id
-        """
-        cursor.execute(query)
-        faculty = cursor.fetchall()
+        cursor.execute(query, (student_id, student_id))
+        results = [grade_row(row) for row in cursor.fetchall()]
         cursor.close()
         connection.close()
-        return jsonify(faculty), 200
+        return jsonify({'student_id': student_id, 'results': results}), 200
     except OperationalError as e:
-        print(f"Error fetching faculty: {e}")
+        logger.error("Error computing student grades: %s", e)
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/faculty', methods=['POST'])
-@require_roles('admin')
-def add_faculty():
-    """Add a new faculty member"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+# ==================== Results ====================
 
-    try:
-        data = request.json or {}
-        required = ['first_name', 'last_name', 'email', 'designation', 'dept_id']
-        for field in required:
-            if not data.get(field):
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+# Stored per (section, student) by refresh_results(); same numbers as build_grade_query
+RESULT_COLUMNS = ('section_id', 'student_id', 'course_id', 'assessments', 'assessments_scored',
+                  'total_weight', 'weighted_total', 'percentage', 'letter_grade', 'grade_point')
+RESULT_SELECT = f"SELECT {', '.join(RESULT_COLUMNS)}, section_rank, updated_at FROM section_result"
 
-        cursor = connection.cursor()
-        query = (
-            "INSERT INTO faculty (first_name, last_name, designation, email, phone, dept_id) "
-            "VALUES (%s, %s, %s, %s, %s, %s)"
+def lock_sections(cursor, section_ids):
+    """Lock section rows in id order; serializes result refreshes per section without deadlocks."""
+    placeholders = ', '.join(['%s'] * len(section_ids))
+    cursor.execute(f"SELECT section_id FROM section WHERE section_id IN ({placeholders}) "
+                   "ORDER BY section_id FOR UPDATE", tuple(section_ids))
+    cursor.fetchall()
+
+def store_results(cursor, enrollment_filter, score_filter, params):
+    """Insert freshly computed section_result rows for the matched enrollments (ranks unset)."""
+    columns = ', '.join(RESULT_COLUMNS)
+    cursor.execute(
+        f"INSERT INTO section_result ({columns}) "
+        f"SELECT {columns} FROM ({build_grade_query(enrollment_filter, score_filter)}) g",
+        params
+    )
+
+def rank_results(cursor, section_ids=None):
+    """Store each result's RANK() by percentage within its section (all sections when None)."""
+    where, params = '', ()
+    if section_ids is not None:
+        where = f"WHERE section_id IN ({', '.join(['%s'] * len(section_ids))})"
+        params = tuple(section_ids)
+    cursor.execute(
+        f"""
+        UPDATE section_result r
+        JOIN (
+            SELECT section_id, student_id,
+                   CASE WHEN percentage IS NULL THEN NULL
+                        ELSE RANK() OVER (PARTITION BY section_id ORDER BY percentage DESC) END AS section_rank
+            FROM section_result
+            {where}
+        ) ranked ON ranked.section_id = r.section_id AND ranked.student_id = r.student_id
+        SET r.section_rank = ranked.section_rank
+        WHERE NOT (r.section_rank <=> ranked.section_rank)
+        """,
+        params
+    )
+
+def refresh_results(cursor, pairs):
+    """Bring stored results up to date after score writes, in the caller's transaction.
+
+    pairs are the (student_id, assessment_id) whose scores changed. Only
+    those students' rows are recomputed (a student no longer enrolled loses
+    the row); their sections are then re-ranked.
+    """
+    pairs = {(student_id, assessment_id) for student_id, assessment_id in pairs
+             if student_id is not None and assessment_id is not None}
+    if not pairs:
+        return
+    assessment_ids = sorted({assessment_id for _, assessment_id in pairs})
+    cursor.execute(
+        f"SELECT assessment_id, section_id FROM assessment "
+        f"WHERE assessment_id IN ({', '.join(['%s'] * len(assessment_ids))})",
+        tuple(assessment_ids)
+    )
+    sections = dict(cursor.fetchall())
+    by_section = {}
+    for student_id, assessment_id in pairs:
+        if sections.get(assessment_id) is not None:
+            by_section.setdefault(sections[assessment_id], set()).add(student_id)
+    if not by_section:
+        return
+    lock_sections(cursor, sorted(by_section))
+    for section_id, student_ids in sorted(by_section.items()):
+        student_ids = sorted(student_ids)
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cursor.execute(f"DELETE FROM section_result WHERE section_id = %s AND student_id IN ({placeholders})",
+                       (section_id, *student_ids))
+        store_results(
+            cursor,
+            f'e.section_id = %s AND e.student_id IN ({placeholders})',
+            f'assessment_id IN (SELECT assessment_id FROM assessment WHERE section_id = %s) '
+            f'AND student_id IN ({placeholders})',
+            # The score subquery's placeholders come first; both filters take the same values
+            (section_id, *student_ids) * 2
         )
-        values = (
-            data.get('first_name').strip(),
-            data.get('last_name').strip(),
-            data.get('designation').strip(),
-            data.get('email').strip(),
-            (data.get('phone') or '').strip() or None,
-            int(data.get('dept_id'))
+    rank_results(cursor, sorted(by_section))
+
+def rebuild_results(connection, section_ids=None):
+    """Recompute stored results from scratch, one committed transaction per section.
+
+    For changes refresh_results() does not see: enrollments, assessment
+    weights or max marks edited in the database. Returns the sections rebuilt.
+    """
+    cursor = connection.cursor()
+    if section_ids is None:
+        cursor.execute("DELETE FROM section_result WHERE section_id NOT IN (SELECT section_id FROM section)")
+        cursor.execute("SELECT section_id FROM section ORDER BY section_id")
+        section_ids = [row[0] for row in cursor.fetchall()]
+        connection.commit()
+    for section_id in section_ids:
+        lock_sections(cursor, [section_id])
+        cursor.execute("DELETE FROM section_result WHERE section_id = %s", (section_id,))
+        store_results(
+            cursor,
+            'e.section_id = %s',
+            'assessment_id IN (SELECT assessment_id FROM assessment WHERE section_id = %s)',
+            (section_id, section_id)
         )
-        cursor.execute(query, values)
+        rank_results(cursor, [section_id])
         connection.commit()
-        new_id = cursor.lastrowid
-        cursor.close()
-        connection.close()
-        return jsonify({'faculty_id': new_id}), 201
-    except IntegrityError as e:
-        return jsonify({'error': 'Duplicate or invalid data'}), 400
-    except Exception as e:
-        print(f"Error adding faculty: {e}")
-        traceback.print_exc()
-        return jsonify({'error': 'Failed to add faculty'}), 500
+    cursor.close()
+    return len(section_ids)
 
-@app.route('/api/faculty/<int:faculty_id>', methods=['PUT'])
-@require_roles('admin')
-def update_faculty(faculty_id: int):
-    """Update an existing faculty member"""
+@app.route('/api/results/<int:section_id>/<student_id>', methods=['GET'])
+@require_student_access
+def get_result(section_id: int, student_id):
+    """One student's stored result in one section (a primary-key read)"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
 
     try:
-        data = request.json or {}
-        fields = []
-        values = []
-        for col in ['first_name', 'last_name', 'designation', 'email', 'phone', 'dept_id']:
-            if col in data and data.get(col) is not None:
-                fields.append(f"{col}=%s")
-                if col == 'dept_id':
-                    values.append(int(data.get(col)))
-                else:
-                    values.append(data.get(col))
-        if not fields:
-            return jsonify({'error': 'No fields to update'}), 400
-        values.append(faculty_id)
-
-        cursor = connection.cursor()
-        cursor.execute(f"UPDATE faculty SET {', '.join(fields)} WHERE faculty_id=%s", tuple(values))
-        connection.commit()
-        affected = cursor.rowcount
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(RESULT_SELECT + " WHERE section_id = %s AND student_id = %s", (section_id, student_id))
+        row = cursor.fetchone()
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Faculty not found'}), 404
-        return jsonify({'success': True}), 200
-    except IntegrityError:
-        return jsonify({'error': 'Duplicate or invalid data'}), 400
-    except Exception as e:
-        print(f"Error updating faculty: {e}")
-        return jsonify({'error': 'Failed to update faculty'}), 500
+        if row is None:
+            return jsonify({'error': 'Result not found'}), 404
+        return jsonify(grade_row(row)), 200
+    except OperationalError as e:
+        logger.error("Error fetching result: %s", e)
+        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/faculty/<int:faculty_id>', methods=['DELETE'])
-@require_roles('admin')
-def delete_faculty(faculty_id: int):
-    """Delete a faculty member"""
+@app.route('/api/results/students/<student_id>', methods=['GET'])
+@require_student_access
+def get_student_results(student_id):
+    """A student's stored results across their sections"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM faculty WHERE faculty_id=%s", (faculty_id,))
-        connection.commit()
-        affected = cursor.rowcount
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(RESULT_SELECT + " WHERE student_id = %s ORDER BY section_id", (student_id,))
+        results = [grade_row(row) for row in cursor.fetchall()]
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Faculty not found'}), 404
-        return jsonify({'success': True}), 200
-    except IntegrityError:
-        return jsonify({'error': 'Cannot delete faculty referenced by other records'}), 400
-    except Exception as e:
-        print(f"Error deleting faculty: {e}")
-        return jsonify({'error': 'Failed to delete faculty'}), 500
-
-# ==================== Courses ====================
+        return jsonify({'student_id': student_id, 'results': results}), 200
+    except OperationalError as e:
+        logger.error("Error fetching student results: %s", e)
+        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/courses', methods=['GET'])
-def get_courses():
-    """Get all courses"""
+@app.route('/api/results/sections/<int:section_id>', methods=['GET'])
+@require_permission('record.read')
+def get_section_results(section_id: int):
+    """A section's stored results, best first"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
         cursor = connection.cursor(pymysql.cursors.DictCursor)
-        query = """
-            SELECT c.*, d.name as department_name
-            FROM course c
-            LEFT JOIN department d ON c.dept_id = d.dept_id
-            ORDER BY c.course_id
-        """
-        cursor.execute(query)
-        courses = cursor.fetchall()
+        cursor.execute(RESULT_SELECT + " WHERE section_id = %s ORDER BY section_rank IS NULL, section_rank, student_id",
+                       (section_id,))
+        results = [grade_row(row) for row in cursor.fetchall()]
         cursor.close()
         connection.close()
-        return jsonify(courses), 200
+        return jsonify({'section_id': section_id, 'student_count': len(results), 'results': results}), 200
     except OperationalError as e:
-        print(f"Error fetching courses: {e}")
+        logger.error("Error fetching section results: %s", e)
         return jsonify({'error': str(e)}), 500
 
-# ==================== Scores ====================
+@app.route('/api/results/rebuild', methods=['POST'])
+@require_permission('score.write')
+def rebuild_results_endpoint():
+    """Recompute stored results for one section ({"section_id": n}) or all of them"""
+    data = request.get_json(silent=True) or {}
+    section_ids = None
+    if data.get('section_id') is not None:
+        try:
+            section_ids = [int(data['section_id'])]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'section_id must be an integer'}), 400
 
-@app.route('/api/scores', methods=['GET'])
-def get_scores():
-    """Get all scores with student and course info if available"""
-    print("=== DEBUG: get_scores() called ===")
     connection = get_db_connection()
     if not connection:
-        print("ERROR: Database connection failed")
         return jsonify({'error': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
-        # Simple query to get all scores
-        query = "SELECT * FROM score ORDER BY score_id"
-        print(f"DEBUG: Executing query: {query}")
-        cursor.execute(query)
-        scores = cursor.fetchall()
-        print(f"DEBUG: Found {len(scores)} scores in database")
-        print(f"DEBUG: Scores data: {scores}")
-        
-        # Format the data for frontend
-        formatted_scores = []
-        for row in scores:
-            formatted_row = {
-                'score_id': row['score_id'],
-                'student_id': row['student_id'],
-                'student_name': row['student_id'],  # Use student_id as name for now
-                'assessment_id': row['assessment_id'],
-                'course_title': f"Assessment {row['assessment_id']}",  # Use assessment_id as title for now
-                'score': row['marks_obtained'],  # Use marks_obtained as score
-                'marks_obtained': row['marks_obtained']
-            }
-            formatted_scores.append(formatted_row)
-        
-        print(f"DEBUG: Formatted scores: {formatted_scores}")
-        cursor.close()
+        rebuilt = rebuild_results(connection, section_ids)
         connection.close()
-        return jsonify(formatted_scores), 200
-        
     except Exception as e:
-        print(f"ERROR: Error fetching scores: {e}")
-        traceback.print_exc()
-        return jsonify({'error': f'Failed to fetch scores: {str(e)}'}), 500
+        connection.rollback()
+        logger.exception("Error rebuilding results")
+        return jsonify({'error': f'Failed to rebuild results: {str(e)}'}), 500
+    notify_write('section_result')
+    return jsonify({'success': True, 'sections_rebuilt': rebuilt}), 200
+
+# ==================== Attendance ====================
+
+ATTENDANCE_STATUSES = ('Present', 'Absent', 'Late', 'Excused')
+# Statuses that count towards the attendance percentage
+ATTENDANCE_PRESENT_STATUSES = ('Present', 'Late')
+ATTENDANCE_PAGE_SIZE = int(os.getenv('ATTENDANCE_PAGE_SIZE', 500))
+ATTENDANCE_MAX_PAGE_SIZE = int(os.getenv('ATTENDANCE_MAX_PAGE_SIZE', 5000))
+ATTENDANCE_BULK_MAX_ROWS = int(os.getenv('ATTENDANCE_BULK_MAX_ROWS', 5000))
+# Enrollment statuses marked when a whole section is taken (NULL is the column default, Enrolled)
+ATTENDANCE_ENROLLMENT_STATUSES = ('Enrolled',)
+
+def parse_date_arg(name):
+    """Read a YYYY-MM-DD query-string argument; raises ValueError on bad input."""
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        return datetime.strptime(raw, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{name} must be YYYY-MM-DD')
+
+def parse_class_date(data):
+    """class_date (or attendance_date) of a request body as a date; raises ValueError."""
+    raw = data.get('class_date') or data.get('attendance_date')
+    if not raw:
+        raise ValueError('class_date is required')
+    try:
+        return date.fromisoformat(raw)
+    except (TypeError, ValueError):
+        raise ValueError('class_date must be YYYY-MM-DD')
+
+def attendance_filters():
+    """WHERE conditions and params shared by the attendance read endpoints.
+
+    Filters line up with the (section_id, class_date) and
+    (student_id, class_date) indexes on attendance.
+    """
+    conditions = []
+    params = []
+    section_id = parse_int_arg('section_id')
+    if section_id is not None:
+        conditions.append('a.section_id = %s')
+        params.append(section_id)
+    student_id = (request.args.get('student_id') or '').strip()
+    if student_id:
+        conditions.append('a.student_id = %s')
+        params.append(student_id)
+    date_from = parse_date_arg('from')
+    if date_from:
+        conditions.append('a.class_date >= %s')
+        params.append(date_from)
+    date_to = parse_date_arg('to')
+    if date_to:
+        conditions.append('a.class_date <= %s')
+        params.append(date_to)
+    return conditions, params
+
+def resolve_section_id(cursor, data):
+    """section_id from the payload, or the latest section of its course_id."""
+    if data.get('section_id'):
+        return int(data['section_id'])
+    if data.get('course_id'):
+        cursor.execute(
+            "SELECT section_id FROM section WHERE course_id = %s ORDER BY year DESC, section_id DESC LIMIT 1",
+            (int(data['course_id']),)
+        )
+        row = cursor.fetchone()
+        if row:
+            return row[0]
+    return None
+
+@app.route('/api/attendance', methods=['GET'])
+@require_student_access
+def get_attendance():
+    """Attendance records, newest class first.
+
+    Query parameters: section_id, student_id, from, to (YYYY-MM-DD), limit,
+    cursor (from X-Next-Cursor).
+    """
+    try:
+        conditions, params = attendance_filters()
+        limit = parse_int_arg('limit', ATTENDANCE_PAGE_SIZE, 1, ATTENDANCE_MAX_PAGE_SIZE)
+        cursor_before = request.args.get('cursor')
+        if cursor_before:
+            before_date, _, before_id = cursor_before.partition(':')
+            before_date = datetime.strptime(before_date, '%Y-%m-%d').date()
+            conditions.append('(a.class_date < %s OR (a.class_date = %s AND a.attendance_id < %s))')
+            params.extend([before_date, before_date, int(before_id)])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = (
+        "SELECT a.attendance_id, a.section_id, a.student_id, s.first_name, s.last_name,"
+        " CONCAT(s.first_name, ' ', s.last_name) AS student_name,"
+        " c.course_id, c.title AS course_title,"
+        " DATE_FORMAT(a.class_date, '%%Y-%%m-%%d') AS attendance_date,"
+        " a.status, a.remarks"
+        " FROM attendance a"
+        " LEFT JOIN student s ON a.student_id = s.student_id"
+        " LEFT JOIN section sec ON a.section_id = sec.section_id"
+        " LEFT JOIN course c ON sec.course_id = c.course_id" +
+        (" WHERE " + ' AND '.join(conditions) if conditions else '') +
+        " ORDER BY a.class_date DESC, a.attendance_id DESC LIMIT %s"
+    )
+    params.append(limit + 1)
 
-@app.route('/api/scores', methods=['POST'])
-@require_roles('admin', 'faculty')
-def add_score():
-    """Add a new score"""
-    print("=== DEBUG: add_score() called ===")
-    print(f"DEBUG: Request data: {request.json}")
-    
     connection = get_db_connection()
     if not connection:
-        print("ERROR: Database connection failed")
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
-        data = request.json or {}
-        print(f"DEBUG: Parsed data: {data}")
-        
-        required = ['student_id', 'assessment_id', 'marks_obtained']
-        for field in required:
-            if not data.get(field):
-                print(f"ERROR: Missing required field: {field}")
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        cursor = connection.cursor()
-        query = """
-            INSERT INTO score (student_id, assessment_id, marks_obtained)
-            VALUES (%s, %s, %s)
-        """
-        values = (
-            str(data.get('student_id')).strip(),
-            int(data.get('assessment_id')),
-            float(data.get('marks_obtained'))
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(query, tuple(params))
+        records = cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+        response = jsonify(records[:limit])
+        if len(records) > limit:
+            last = records[limit - 1]
+            response.headers['X-Next-Cursor'] = f"{last['attendance_date']}:{last['attendance_id']}"
+        return response, 200
+    except OperationalError as e:
+        logger.error("Error fetching attendance: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/attendance', methods=['POST'])
+@require_permission('attendance.write')
+def add_attendance():
+    """Mark one student for one class (re-marking updates the existing record)"""
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        student_id = str(data.get('student_id') or '').strip()
+        status = data.get('status', 'Present')
+        if not student_id:
+            return jsonify({'error': 'student_id and class_date are required'}), 400
+        try:
+            class_date = parse_class_date(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if status not in ATTENDANCE_STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(ATTENDANCE_STATUSES)}"}), 400
+
+        cursor = connection.cursor()
+        section_id = resolve_section_id(cursor, data)
+        if section_id is None:
+            return jsonify({'error': 'section_id (or a course_id with a section) is required'}), 400
+
+        cursor.execute(
+            """
+            INSERT INTO attendance (section_id, student_id, class_date, status, remarks)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE status = VALUES(status), remarks = VALUES(remarks)
+            """,
+            (section_id, student_id, class_date, status, data.get('remarks') or None)
         )
-        
-        print(f"DEBUG: Executing query: {query}")
-        print(f"DEBUG: With values: {values}")
-        
-        cursor.execute(query, values)
         connection.commit()
-        new_id = cursor.lastrowid
-        print(f"DEBUG: Successfully added score with ID: {new_id}")
-        
+        notify_write('attendance')
         cursor.close()
         connection.close()
-        return jsonify({'score_id': new_id, 'message': 'Score added successfully'}), 201
-        
-    except IntegrityError as e:
-        print(f"ERROR: Integrity error: {e}")
-        return jsonify({'error': 'Invalid student or course reference'}), 400
+        return jsonify({'message': 'Attendance saved', 'section_id': section_id}), 201
+    except IntegrityError:
+        return jsonify({'error': 'Invalid student or section reference'}), 400
     except Exception as e:
-        print(f"ERROR: Error adding score: {e}")
-        traceback.print_exc()
-        return jsonify({'error': f'Failed to add score: {str(e)}'}), 500
+        logger.exception("Error saving attendance")
+        return jsonify({'error': 'Failed to save attendance'}), 500
 
-@app.route('/api/scores/<int:score_id>', methods=['PUT'])
-@require_roles('admin', 'faculty')
-def update_score(score_id: int):
-    """Update an existing score"""
+@app.route('/api/attendance/bulk', methods=['POST'])
+@require_permission('attendance.write')
+def mark_section_attendance():
+    """Mark a whole section for one date in a single statement.
+
+    Body: section_id (or course_id), class_date, optional default status and
+    optional records [{student_id, status, remarks}] (at most
+    ATTENDANCE_BULK_MAX_ROWS). Without records every student currently
+    enrolled in the section (not dropped) gets the default status.
+    """
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
+
     try:
-        data = request.json or {}
-        fields = []
-        values = []
-        for col in ['student_id', 'assessment_id', 'marks_obtained']:
-            if col in data and data.get(col) is not None:
-                fields.append(f"{col}=%s")
-                if col == 'assessment_id':
-                    values.append(int(data.get(col)))
-                elif col == 'marks_obtained':
-                    values.append(float(data.get(col)))
-                else:
-                    values.append(data.get(col))
-        if not fields:
-            return jsonify({'error': 'No fields to update'}), 400
-        values.append(score_id)
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        default_status = data.get('status', 'Present')
+        records = data.get('records')
+        try:
+            class_date = parse_class_date(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if default_status not in ATTENDANCE_STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(ATTENDANCE_STATUSES)}"}), 400
+        if records is not None and (not isinstance(records, list) or not records):
+            return jsonify({'error': 'records must be a non-empty list (omit it to mark the whole section)'}), 400
+        if records is not None and len(records) > ATTENDANCE_BULK_MAX_ROWS:
+            return jsonify({'error': f'At most {ATTENDANCE_BULK_MAX_ROWS} records per request'}), 400
+        for index, record in enumerate(records or ()):
+            if not isinstance(record, dict):
+                return jsonify({'error': f'records[{index}] must be an object', 'index': index}), 400
+            student_id = record.get('student_id')
+            if not isinstance(student_id, (str, int)) or not str(student_id).strip():
+                return jsonify({'error': f'records[{index}]: student_id is required', 'index': index}), 400
+            if record.get('status', default_status) not in ATTENDANCE_STATUSES:
+                return jsonify({'error': f"records[{index}]: status must be one of {', '.join(ATTENDANCE_STATUSES)}",
+                                'index': index}), 400
+
         cursor = connection.cursor()
-        cursor.execute(f"UPDATE score SET {', '.join(fields)} WHERE score_id=%s", tuple(values))
+        section_id = resolve_section_id(cursor, data)
+        if section_id is None:
+            return jsonify({'error': 'section_id (or a course_id with a section) is required'}), 400
+
+        if records is not None:
+            values = []
+            for record in records:
+                values.extend([section_id, str(record['student_id']).strip(), class_date,
+                               record.get('status', default_status), record.get('remarks') or None])
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(records))
+            cursor.execute(
+                "INSERT INTO attendance (section_id, student_id, class_date, status, remarks) "
+                f"VALUES {placeholders} "
+                "ON DUPLICATE KEY UPDATE status = VALUES(status), remarks = VALUES(remarks)",
+                tuple(values)
+            )
+        else:
+            enrolled = ', '.join(['%s'] * len(ATTENDANCE_ENROLLMENT_STATUSES))
+            cursor.execute(
+                f"""
+                INSERT INTO attendance (section_id, student_id, class_date, status)
+                SELECT e.section_id, e.student_id, %s, %s
+                FROM enrollment e
+                WHERE e.section_id = %s AND COALESCE(e.status, 'Enrolled') IN ({enrolled})
+                ON DUPLICATE KEY UPDATE status = VALUES(status)
+                """,
+                (class_date, default_status, section_id, *ATTENDANCE_ENROLLMENT_STATUSES)
+            )
         connection.commit()
+        notify_write('attendance')
         affected = cursor.rowcount
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Score not found'}), 404
-        return jsonify({'success': True}), 200
+        return jsonify({
+            'message': 'Attendance saved',
+            'section_id': section_id,
+            'class_date': class_date.isoformat(),
+            'affected_rows': affected
+        }), 201
+    except IntegrityError:
+        connection.rollback()
+        return jsonify({'error': 'Invalid student or section reference; no attendance was saved'}), 400
     except Exception as e:
-        print(f"Error updating score: {e}")
-        return jsonify({'error': 'Failed to update score'}), 500
+        connection.rollback()
+        logger.exception("Error marking section attendance")
+        return jsonify({'error': 'Failed to save attendance'}), 500
+
+@app.route('/api/attendance/summary', methods=['GET'])
+@require_student_access
+def get_attendance_summary():
+    """Per-student attendance percentage, aggregated in SQL.
+
+    Query parameters: section_id, student_id, from, to (YYYY-MM-DD).
+    """
+    try:
+        conditions, params = attendance_filters()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    present = ', '.join(['%s'] * len(ATTENDANCE_PRESENT_STATUSES))
+    query = (
+        "SELECT a.student_id, s.first_name, s.last_name, a.section_id,"
+        " COUNT(*) AS total_classes,"
+        f" SUM(a.status IN ({present})) AS attended,"
+        " SUM(a.status = 'Absent') AS absent,"
+        f" ROUND(100 * SUM(a.status IN ({present})) / COUNT(*), 2) AS attendance_percent"
+        " FROM attendance a"
+        " LEFT JOIN student s ON a.student_id = s.student_id" +
+        (" WHERE " + ' AND '.join(conditions) if conditions else '') +
+        " GROUP BY a.student_id, a.section_id, s.first_name, s.last_name"
+        " ORDER BY a.student_id, a.section_id"
+    )
+    params = list(ATTENDANCE_PRESENT_STATUSES) * 2 + params
 
-@app.route('/api/scores/<int:score_id>', methods=['DELETE'])
-@require_roles('admin')
-def delete_score(score_id: int):
-    """Delete a score"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
+
     try:
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM score WHERE score_id=%s", (score_id,))
-        connection.commit()
-        affected = cursor.rowcount
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
         cursor.close()
         connection.close()
-        if affected == 0:
-            return jsonify({'error': 'Score not found'}), 404
-        return jsonify({'success': True}), 200
-    except Exception as e:
-        print(f"Error deleting score: {e}")
-        return jsonify({'error': 'Failed to delete score'}), 500
+        for row in rows:
+            row['attended'] = int(row['attended'] or 0)
+            row['absent'] = int(row['absent'] or 0)
+            row['attendance_percent'] = float(row['attendance_percent'] or 0)
+        return jsonify(rows), 200
+    except OperationalError as e:
+        logger.error("Error fetching attendance summary: %s", e)
+        return jsonify({'error': str(e)}), 500
 
-# ==================== Dashboard Statistics ====================
+# ==================== Exports ====================
+
+# Full-table export queries, streamed row by row with an unbuffered cursor
+EXPORT_QUERIES = {
+    'students': """
+        SELECT s.student_id, s.first_name, s.last_name, s.dob, s.gender, s.email,
+               s.phone, s.address, s.admission_year, s.status, s.program_id,
+               p.name AS program_name, d.dept_id, d.name AS department_name
+        FROM student s
+        LEFT JOIN program p ON s.program_id = p.program_id
+        LEFT JOIN department d ON p.dept_id = d.dept_id
+        ORDER BY s.student_id
+    """,
+    'faculty': """
+        SELECT f.faculty_id, f.first_name, f.last_name, f.designation, f.email,
+               f.phone, f.dept_id, d.name AS department_name
+        FROM faculty f
+        LEFT JOIN department d ON f.dept_id = d.dept_id
+        ORDER BY f.faculty_id
+    """,
+    'courses': """
+        SELECT c.course_id, c.title, c.credits, c.dept_id, d.name AS department_name
+        FROM course c
+        LEFT JOIN department d ON c.dept_id = d.dept_id
+        ORDER BY c.course_id
+    """,
+    'scores': """
+        SELECT score_id, student_id, assessment_id, marks_obtained
+        FROM score
+        ORDER BY score_id
+    """
+}
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))
+
+def format_export_value(value):
+    """Render a column value for NDJSON/CSV output (dates, decimals as strings)."""
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+@app.route('/api/export/<table>', methods=['GET'])
+@require_permission('export.read')
+def export_table(table):
+    """Stream a full table as NDJSON (default) or CSV (?format=csv)"""
+    query = EXPORT_QUERIES.get(table)
+    if not query:
+        return jsonify({'error': f'Unknown export: {table}'}), 404
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
 
-@app.route('/api/dashboard/stats', methods=['GET'])
-def get_dashboard_stats():
-    """Get dashboard statistics"""
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
-    
+
     try:
-        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        cursor.execute(query)
+    except Exception as e:
+        logger.error("Error starting %s export: %s", table, e)
+        connection.discard()
+        return jsonify({'error': f'Failed to export {table}'}), 500
 
-        total_students = 0
-        total_faculty = 0
-        total_courses = 0
-        total_assessments = 0
+    columns = [col[0] for col in cursor.description]
 
+    def generate():
+        completed = False
         try:
-            cursor.execute("SELECT COUNT(*) as count FROM student WHERE status = 'Active'")
-            row = cursor.fetchone()
-            total_students = row['count'] if row and 'count' in row else 0
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if fmt == 'csv':
+                writer.writerow(columns)
+                yield buffer.getvalue()
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                buffer.seek(0)
+                buffer.truncate()
+                for row in rows:
+                    if fmt == 'csv':
+                        writer.writerow([format_export_value(row[col]) for col in columns])
+                    else:
+                        buffer.write(json.dumps({col: format_export_value(row[col]) for col in columns}))
+                        buffer.write('\n')
+                yield buffer.getvalue()
+            completed = True
         except Exception as e:
-            print(f"Dashboard stat 'students' failed: {e}")
+            logger.error("Error streaming %s export: %s", table, e)
+        finally:
+            if completed:
+                cursor.close()
+                connection.close()
+            else:
+                # Unread rows are still on the socket; drop it rather than drain it
+                connection.discard()
 
-        try:
-            cursor.execute("SELECT COUNT(*) as count FROM faculty")
-            row = cursor.fetchone()
-            total_faculty = row['count'] if row and 'count' in row else 0
-        except Exception as e:
-            print(f"Dashboard stat 'faculty' failed: {e}")
+    if fmt == 'csv':
+        mimetype, extension = 'text/csv', 'csv'
+    else:
+        mimetype, extension = 'application/x-ndjson', 'ndjson'
+    return streaming_response(
+        generate(),
+        connection,
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={table}.{extension}'}
+    )
 
-        try:
-            cursor.execute("SELECT COUNT(*) as count FROM course")
-            row = cursor.fetchone()
-            total_courses = row['count'] if row and 'count' in row else 0
-        except Exception as e:
-            print(f"Dashboard stat 'courses' failed: {e}")
+# ==================== Dashboard Statistics ====================
 
-        try:
-            cursor.execute("SELECT COUNT(*) as count FROM assessment")
-            row = cursor.fetchone()
-            total_assessments = row['count'] if row and 'count' in row else 0
-        except Exception as e:
-            print(f"Dashboard stat 'assessments' failed: {e}")
+DASHBOARD_STATS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM student WHERE status = 'Active') AS total_students,
+        (SELECT COUNT(*) FROM faculty) AS total_faculty,
+        (SELECT COUNT(*) FROM course) AS total_courses,
+        (SELECT COUNT(*) FROM assessment) AS total_assessments
+"""
 
+def query_dashboard_stats():
+    """Fetch all dashboard counts in a single round-trip."""
+    connection = get_db_connection(primary=True)
+    if not connection:
+        raise OperationalError('Database connection failed')
+    try:
+        cursor = connection.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(DASHBOARD_STATS_QUERY)
+        row = cursor.fetchone() or {}
         cursor.close()
+        return {key: int(row.get(key) or 0) for key in (
+            'total_students', 'total_faculty', 'total_courses', 'total_assessments'
+        )}
+    finally:
         connection.close()
 
-        return jsonify({
-            'total_students': total_students,
-            'total_faculty': total_faculty,
-            'total_courses': total_courses,
-            'total_assessments': total_assessments
-        }), 200
-
+@app.route('/api/dashboard/stats', methods=['GET'])
+def get_dashboard_stats():
+    """Get dashboard statistics (cached; invalidated by write handlers)"""
+    try:
+        return jsonify(DASHBOARD_CACHE.get_or_load('stats', query_dashboard_stats)), 200
     except Exception as e:
-        print(f"Error fetching dashboard stats: {e}")
-        try:
-            cursor.close()
-            connection.close()
-        except Exception:
-            pass
+        logger.error("Error fetching dashboard stats: %s", e)
         # Return zeros on unexpected errors to avoid breaking the UI
         return jsonify({
             'total_students': 0,
@@ -839,30 +4583,422 @@ def get_dashboard_stats():
             'total_assessments': 0
         }), 200
 
+# ==================== Dashboard Summary ====================
+
+DASHBOARD_SUMMARY_REFRESH = int(os.getenv('DASHBOARD_SUMMARY_REFRESH', 300))
+# Seconds before rebuilding again when writes raced the last rebuild
+DASHBOARD_SUMMARY_RETRY = int(os.getenv('DASHBOARD_SUMMARY_RETRY', 5))
+# Recent-activity feed: rows written per flush interval, re-read per refresh interval
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', 2))
+ACTIVITY_REFRESH_INTERVAL = float(os.getenv('ACTIVITY_REFRESH_INTERVAL', 5))
+
+class ActivityFeed:
+    """Recent-activity entries, shared by all worker processes through activity_log.
+
+    record() shows an entry in this process at once and buffers it; a
+    background thread writes the buffer every flush_interval seconds. The
+    newest rows are re-read in the background once the feed is older than
+    refresh_interval, so other workers' entries appear within seconds and
+    reads never wait on the database.
+    """
+
+    def __init__(self, size, flush_interval, refresh_interval):
+        self.size = size
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._io_lock = threading.Lock()  # a flush and a re-read never overlap, so no entry shows twice
+        self._entries = deque(maxlen=size)  # newest first
+        self._pending = []  # recorded here, not yet written; oldest first
+        self._loaded_at = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def record(self, color, icon, title, description):
+        entry = {'color': color, 'icon': icon, 'title': title, 'description': description, 'at': time.time()}
+        with self._lock:
+            self._entries.appendleft(entry)
+            self._pending.append(entry)
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries; they are kept for the next flush on failure."""
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return
+        with self._io_lock:
+            self._write(pending)
+
+    def _write(self, pending):
+        connection = get_db_connection(primary=True)
+        if not connection:
+            return
+        try:
+            cursor = connection.cursor()
+            cursor.executemany(
+                "INSERT INTO activity_log (color, icon, title, description, created_at) VALUES (%s, %s, %s, %s, %s)",
+                [(e['color'], e['icon'], e['title'], e['description'], datetime.fromtimestamp(e['at']))
+                 for e in pending]
+            )
+            connection.commit()
+            cursor.close()
+            with self._lock:
+                del self._pending[:len(pending)]
+        except Exception:
+            logger.exception("Activity flush failed for %s entries", len(pending))
+        finally:
+            connection.close()
+
+    def entries(self):
+        """Newest entries first; starts a background re-read when the feed is stale."""
+        loaded_at = self._loaded_at
+        if (loaded_at is None or time.monotonic() - loaded_at >= self.refresh_interval) \
+                and self._refresh_lock.acquire(blocking=False):
+            threading.Thread(target=self._background_refresh, name='activity-feed', daemon=True).start()
+        with self._lock:
+            return list(self._entries)
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Activity feed refresh failed")
+            # Retry after a full interval rather than on every read
+            self._loaded_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self):
+        """Replace the feed with the newest activity_log rows plus entries not yet written."""
+        with self._io_lock:
+            self._read()
+
+    def _read(self):
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT color, icon, title, description, created_at FROM activity_log "
+                "ORDER BY activity_id DESC LIMIT %s",
+                (self.size,)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            connection.close()
+        stored = [{'color': r[0], 'icon': r[1], 'title': r[2], 'description': r[3],
+                   'at': r[4].timestamp() if r[4] else None} for r in rows]
+        with self._lock:
+            self._entries = deque((list(reversed(self._pending)) + stored)[:self.size], maxlen=self.size)
+            self._loaded_at = time.monotonic()
+
+
+class DashboardSummary:
+    """In-memory aggregates behind the per-role dashboard endpoints.
+
+    Built with GROUP BY queries on first use and then adjusted in place by
+    the write handlers, so reads never touch the database. Every
+    DASHBOARD_SUMMARY_REFRESH seconds (or after invalidate()) a rebuild
+    folds in writes made by other worker processes; it runs in the
+    background while the previous aggregates keep serving. Students are
+    counted when Active, as in /api/dashboard/stats.
+    """
+
+    def __init__(self, refresh_interval, activity_size=20):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_at = None
+        self._ready = False  # set by the first successful build
+        self._version = 0  # bumped by every delta, to detect deltas racing a rebuild
+        self.departments = {}  # dept_id -> name
+        self.programs = {}  # program_id -> (name, dept_id)
+        self.students_by_program = Counter()
+        self.students_by_department = Counter()
+        self.faculty_by_designation = Counter()
+        self.faculty_by_department = Counter()
+        self.activity = ActivityFeed(activity_size, ACTIVITY_FLUSH_INTERVAL, ACTIVITY_REFRESH_INTERVAL)
+
+    def invalidate(self):
+        """Rebuild (in the background once built) on the next read."""
+        with self._lock:
+            self._built_at = None
+
+    def _fresh(self):
+        return self._built_at is not None and time.monotonic() - self._built_at < self.refresh_interval
+
+    def ensure_built(self):
+        """Build on first use; refresh in the background once stale."""
+        if self._fresh():
+            return
+        if not self._ready:
+            with self._build_lock:
+                if not self._ready:
+                    self._rebuild()
+        elif self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._background_rebuild, name='dashboard-summary', daemon=True).start()
+
+    def _background_rebuild(self):
+        try:
+            self._rebuild()
+        except Exception:
+            logger.exception("Dashboard summary rebuild failed")
+        finally:
+            self._build_lock.release()
+
+    def _rebuild(self):
+        connection = get_db_connection(primary=True)
+        if not connection:
+            raise OperationalError('Database connection failed')
+        try:
+            with self._lock:
+                version = self._version
+            cursor = connection.cursor()
+            cursor.execute("SELECT dept_id, name FROM department")
+            departments = dict(cursor.fetchall())
+            cursor.execute("SELECT program_id, name, dept_id FROM program")
+            programs = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            cursor.execute("SELECT program_id, COUNT(*) FROM student WHERE status = 'Active' GROUP BY program_id")
+            students_by_program = Counter(dict(cursor.fetchall()))
+            cursor.execute("SELECT designation, dept_id, COUNT(*) FROM faculty GROUP BY designation, dept_id")
+            faculty_by_designation = Counter()
+            faculty_by_department = Counter()
+            for designation, dept_id, count in cursor.fetchall():
+                faculty_by_designation[designation] += count
+                faculty_by_department[dept_id] += count
+            cursor.close()
+        finally:
+            connection.close()
+
+        students_by_department = Counter()
+        for program_id, count in students_by_program.items():
+            students_by_department[programs.get(program_id, (None, None))[1]] += count
+
+        with self._lock:
+            self.departments = departments
+            self.programs = programs
+            self.students_by_program = students_by_program
+            self.students_by_department = students_by_department
+            self.faculty_by_designation = faculty_by_designation
+            self.faculty_by_department = faculty_by_department
+            self._ready = True
+            self._built_at = time.monotonic()
+            if self._version != version:
+                # A delta applied while the queries ran may or may not be in them: rebuild again soon
+                self._built_at -= self.refresh_interval - min(DASHBOARD_SUMMARY_RETRY, self.refresh_interval)
+
+    def _apply(self, counters):
+        with self._lock:
+            self._version += 1
+            if not self._ready:
+                return  # the first build reads the committed state
+            for counter, key, delta in counters:
+                counter[key] += delta
+
+    def student_added(self, program_id, status, delta=1):
+        if status != 'Active':
+            return
+        dept_id = self.programs.get(program_id, (None, None))[1]
+        self._apply([(self.students_by_program, program_id, delta),
+                     (self.students_by_department, dept_id, delta)])
+
+    def student_removed(self, program_id, status):
+        self.student_added(program_id, status, delta=-1)
+
+    def faculty_added(self, designation, dept_id, delta=1):
+        self._apply([(self.faculty_by_designation, designation, delta),
+                     (self.faculty_by_department, dept_id, delta)])
+
+    def faculty_removed(self, designation, dept_id):
+        self.faculty_added(designation, dept_id, delta=-1)
+
+    def record_activity(self, color, icon, title, description):
+        self.activity.record(color, icon, title, description)
+
+    def snapshot(self):
+        """Consistent copy of the aggregates for serialization."""
+        self.ensure_built()
+        with self._lock:
+            summary = {
+                'departments': dict(self.departments),
+                'programs': dict(self.programs),
+                'students_by_program': Counter(self.students_by_program),
+                'students_by_department': Counter(self.students_by_department),
+                'faculty_by_designation': Counter(self.faculty_by_designation),
+                'faculty_by_department': Counter(self.faculty_by_department)
+            }
+        summary['activity'] = self.activity.entries()
+        return summary
+
+
+DASHBOARD_SUMMARY = DashboardSummary(DASHBOARD_SUMMARY_REFRESH)
+atexit.register(DASHBOARD_SUMMARY.activity.flush)
+
+def describe_age(timestamp):
+    """Human-friendly age of an activity entry."""
+    if timestamp is None:
+        return 'Earlier'
+    seconds = time.time() - timestamp
+    if seconds < 60:
+        return 'Just now'
+    if seconds < 3600:
+        return f'{int(seconds // 60)} min ago'
+    if seconds < 86400:
+        return f'{int(seconds // 3600)} h ago'
+    return f'{int(seconds // 86400)} days ago'
+
+def load_dashboard_summary():
+    """Snapshot of DASHBOARD_SUMMARY, or None when it cannot be built."""
+    try:
+        return DASHBOARD_SUMMARY.snapshot()
+    except Exception as e:
+        logger.error("Error building dashboard summary: %s", e)
+        return None
+
+def count_rows(counter, key_name, names=None):
+    """Counter -> list of {key_name, [name], count} dicts, largest first."""
+    rows = []
+    for key, count in counter.most_common():
+        if count <= 0:
+            continue
+        row = {key_name: key, 'count': count}
+        if names is not None:
+            row['department_name'] = names.get(key)
+        rows.append(row)
+    return rows
+
+@app.route('/api/dashboard/student-stats', methods=['GET'])
+def get_student_stats():
+    """Student counts per department and per program"""
+    summary = load_dashboard_summary()
+    if summary is None:
+        return jsonify({'error': 'Failed to load student statistics'}), 500
+
+    by_program = count_rows(summary['students_by_program'], 'program_id')
+    for row in by_program:
+        name, dept_id = summary['programs'].get(row['program_id'], (None, None))
+        row['program_name'] = name
+        row['department_name'] = summary['departments'].get(dept_id)
+    by_department = count_rows(summary['students_by_department'], 'dept_id', summary['departments'])
+    return jsonify({
+        'total_students': sum(row['count'] for row in by_department),
+        'by_department': by_department,
+        'by_program': by_program
+    }), 200
+
+@app.route('/api/dashboard/faculty-stats', methods=['GET'])
+def get_faculty_stats():
+    """Faculty counts per designation and per department"""
+    summary = load_dashboard_summary()
+    if summary is None:
+        return jsonify({'error': 'Failed to load faculty statistics'}), 500
+
+    by_designation = count_rows(summary['faculty_by_designation'], 'designation')
+    return jsonify({
+        'total_faculty': sum(row['count'] for row in by_designation),
+        'by_designation': by_designation,
+        'by_department': count_rows(summary['faculty_by_department'], 'dept_id', summary['departments'])
+    }), 200
+
+@app.route('/api/dashboard/recent-activity', methods=['GET'])
+def get_recent_activity():
+    """Most recent inserts, newest first"""
+    summary = load_dashboard_summary()
+    if summary is None:
+        return jsonify([]), 200
+
+    return jsonify([
+        {
+            'color': entry['color'],
+            'icon': entry['icon'],
+            'title': entry['title'],
+            'description': entry['description'],
+            'time': describe_age(entry['at'])
+        }
+        for entry in summary['activity']
+    ]), 200
+
 # ==================== Health Check ====================
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    connection = get_db_connection()
+    connection = get_db_connection(primary=True)
     if connection:
         connection.close()
-        return jsonify({
+        body = {
             'status': 'healthy',
             'database': 'connected',
-            'message': 'Backend is running successfully'
-        }), 200
+            'message': 'Backend is running successfully',
+            'pool': DB_POOL.stats()
+        }
+        status = 200
     else:
-        return jsonify({
+        body = {
             'status': 'unhealthy',
             'database': 'disconnected',
-            'message': 'Database connection failed'
-        }), 500
+            'message': 'Database connection failed',
+            'pool': DB_POOL.stats()
+        }
+        status = 500
+    if READ_REPLICAS is not None:
+        # Replicas are optional capacity: reads fail over to the primary, so they do not affect status
+        body['replicas'] = READ_REPLICAS.stats()
+    return jsonify(body), status
+
+@app.route('/api/health/pool', methods=['GET'])
+def pool_stats():
+    """Connection pool statistics"""
+    if READ_REPLICAS is not None:
+        return jsonify({**DB_POOL.stats(), 'replicas': READ_REPLICAS.stats()}), 200
+    return jsonify(DB_POOL.stats()), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics"""
+    lines = []
+    for metric in (HTTP_REQUEST_DURATION, DB_QUERY_DURATION, DB_QUERY_ROWS,
+                   DB_QUERY_ERRORS, DB_SLOW_QUERIES):
+        lines.extend(metric.render())
+
+    pool = DB_POOL.stats()
+    for key in ('size', 'in_use', 'idle'):
+        lines.append(f'# TYPE db_pool_{key} gauge')
+        lines.append(f'db_pool_{key} {pool[key]}')
+    for key in ('created', 'reused', 'reconnected', 'expired', 'discarded', 'timeouts'):
+        lines.append(f'# TYPE db_pool_{key}_total counter')
+        lines.append(f'db_pool_{key}_total {pool[key]}')
+
+    if READ_REPLICAS is not None:
+        replicas = READ_REPLICAS.stats()
+        lines.append('# TYPE db_replica_healthy gauge')
+        lines.extend(f'db_replica_healthy{{replica="{r["name"]}"}} {int(r["healthy"])}' for r in replicas)
+        lines.append('# TYPE db_replica_pool_in_use gauge')
+        lines.extend(f'db_replica_pool_in_use{{replica="{r["name"]}"}} {r["pool"]["in_use"]}' for r in replicas)
+
+    dropped = sum(getattr(h, 'dropped', 0) for h in logger.handlers)
+    lines.append('# TYPE log_records_dropped_total counter')
+    lines.append(f'log_records_dropped_total {dropped}')
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/debug/scores', methods=['GET'])
+@require_permission('schema.migrate')
 def debug_scores():
     """Debug endpoint to check score table structure and data"""
-    print("=== DEBUG: debug_scores() called ===")
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -873,18 +5009,16 @@ def debug_scores():
         # Check if score table exists and show its structure
         cursor.execute("DESCRIBE score")
         table_structure = cursor.fetchall()
-        print(f"DEBUG: Score table structure: {table_structure}")
         
         # Count total records
         cursor.execute("SELECT COUNT(*) as count FROM score")
         count_result = cursor.fetchone()
         total_count = count_result['count'] if count_result else 0
-        print(f"DEBUG: Total records in score table: {total_count}")
         
         # Get all records
         cursor.execute("SELECT * FROM score LIMIT 10")
         all_scores = cursor.fetchall()
-        print(f"DEBUG: Sample scores: {all_scores}")
+        logger.debug("Score table has %s rows, %s columns", total_count, len(table_structure))
         
         cursor.close()
         connection.close()
@@ -909,14 +5043,13 @@ def debug_scores():
         }), 200
         
     except Exception as e:
-        print(f"ERROR in debug_scores: {e}")
-        traceback.print_exc()
+        logger.exception("Error in debug_scores")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/sample/scores', methods=['POST'])
+@require_permission('schema.migrate')
 def add_sample_scores():
     """Add sample score data for testing"""
-    print("=== DEBUG: add_sample_scores() called ===")
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
@@ -924,9 +5057,6 @@ def add_sample_scores():
     try:
         cursor = connection.cursor()
         
-        # Disable foreign key checks temporarily
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
-        
         # Sample score data using correct column names
         sample_scores = [
             ('STU001', 1, 85.5),
@@ -936,27 +5066,32 @@ def add_sample_scores():
             ('STU004', 2, 95.5),
         ]
         
-        print(f"DEBUG: About to add {len(sample_scores)} sample scores")
-        
         query = """
             INSERT INTO score (student_id, assessment_id, marks_obtained)
             VALUES (%s, %s, %s)
         """
         
-        added_count = 0
-        for i, score_data in enumerate(sample_scores):
+        # Disable foreign key checks temporarily
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            added = []
+            for score_data in sample_scores:
+                try:
+                    cursor.execute(query, score_data)
+                    added.append(score_data[:2])
+                except Exception:
+                    logger.exception("Could not add sample score %s", score_data)
+            added_count = len(added)
+            refresh_results(cursor, added)
+        finally:
+            # The connection goes back to the pool: never with checks still off
             try:
-                print(f"DEBUG: Attempting to add score {i+1}: {score_data}")
-                cursor.execute(query, score_data)
-                added_count += 1
-                print(f"DEBUG: Successfully added sample score: {score_data}")
-            except Exception as e:
-                print(f"ERROR: Could not add sample score {score_data}: {e}")
-                traceback.print_exc()
-        
-        # Re-enable foreign key checks
-        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            except Exception:
+                connection.discard()
+                raise
         connection.commit()
+        notify_write('score', 'section_result')
         cursor.close()
         connection.close()
         
@@ -966,8 +5101,7 @@ def add_sample_scores():
         }), 201
         
     except Exception as e:
-        print(f"ERROR in add_sample_scores: {e}")
-        traceback.print_exc()
+        logger.exception("Error in add_sample_scores")
         return jsonify({'error': str(e)}), 500
 
 # ==================== Error Handlers ====================
@@ -992,7 +5126,6 @@ def home():
 def show_tables():
     connection = get_db_connection()
     if not connection:
-        print("Database connection failed")  # Debugging log
         return "<h1>Database connection failed</h1>", 500
 
     try:
@@ -1001,17 +5134,16 @@ def show_tables():
         # Fetch students
         cursor.execute("SELECT * FROM student")
         students = cursor.fetchall()
-        print("Fetched students:", students)  # Debugging log
 
         # Fetch faculty
         cursor.execute("SELECT * FROM faculty")
         faculty = cursor.fetchall()
-        print("Fetched faculty:", faculty)  # Debugging log
 
         # Fetch departments
         cursor.execute("SELECT * FROM department")
         departments = cursor.fetchall()
-        print("Fetched departments:", departments)  # Debugging log
+        logger.debug("Fetched %s students, %s faculty, %s departments",
+                     len(students), len(faculty), len(departments))
 
         cursor.close()
         connection.close()
@@ -1020,19 +5152,395 @@ def show_tables():
         return render_template('index.html', students=students, faculty=faculty, departments=departments)
 
     except Exception as e:
-        print(f"Error fetching data: {e}")
+        logger.error("Error fetching data: %s", e)
         return "<h1>Error fetching data</h1>", 500
 
+# ==================== Migrations ====================
+
+MIGRATION_CONFIG = {
+    # Directory holding the smart_exam_cell_*.sql schema dumps
+    'schema_dir': os.getenv('SCHEMA_DIR', os.path.dirname(os.path.abspath(__file__))),
+    # Seconds to wait for another process's migration run to finish
+    'lock_timeout': int(os.getenv('MIGRATION_LOCK_TIMEOUT', 60))
+}
+
+MIGRATION_LOCK = 'college_management_migrations'
+
+
+class MigrationError(Exception):
+    """Raised when pending schema migrations cannot be applied."""
+
+
+def existing_tables(cursor):
+    cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+    return {row[0] for row in cursor.fetchall()}
+
+def add_index_if_missing(cursor, table, name, columns, unique=False):
+    """Add an index unless one with that name exists (MySQL has no ADD INDEX IF NOT EXISTS)."""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+        (table, name)
+    )
+    if cursor.fetchone() is None:
+        kind = 'UNIQUE KEY' if unique else 'KEY'
+        cursor.execute(f"ALTER TABLE `{table}` ADD {kind} `{name}` ({columns}), ALGORITHM=INPLACE, LOCK=NONE")
+
+def add_column_if_missing(cursor, table, name, definition):
+    """Add a column unless the table already has it."""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1",
+        (table, name)
+    )
+    if cursor.fetchone() is None:
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{name}` {definition}, ALGORITHM=INSTANT")
+
+def load_base_schema():
+    """(table, CREATE TABLE IF NOT EXISTS ...) from the schema dumps, referenced tables first."""
+    statements = {}
+    for path in sorted(glob.glob(os.path.join(MIGRATION_CONFIG['schema_dir'], 'smart_exam_cell_*.sql'))):
+        with open(path, encoding='utf-8') as f:
+            dump = f.read()
+        for table, body, options in re.findall(r'CREATE TABLE `(\w+)` \((.*?)\n\)([^;]*);', dump, re.DOTALL):
+            options = re.sub(r'\s*AUTO_INCREMENT=\d+', '', options)
+            statements[table] = f'CREATE TABLE IF NOT EXISTS `{table}` ({body}\n){options}'
+
+    ordered = []
+    def visit(table, seen=()):
+        if table in ordered or table not in statements or table in seen:
+            return
+        for parent in re.findall(r'REFERENCES `(\w+)`', statements[table]):
+            visit(parent, seen + (table,))
+        ordered.append(table)
+    for table in sorted(statements):
+        visit(table)
+    return [(table, statements[table]) for table in ordered]
+
+def migrate_base_schema(cursor):
+    """Tables from smart_exam_cell_*.sql (the data in the dumps is not loaded)."""
+    before = existing_tables(cursor)
+    created = []
+    for table, statement in load_base_schema():
+        cursor.execute(statement)
+        if table not in before:
+            created.append(table)
+    # Older builds created score as (course_id, score); the app needs the dump layout
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = DATABASE() AND table_name = 'score'"
+    )
+    columns = {row[0] for row in cursor.fetchall()}
+    if not {'assessment_id', 'marks_obtained'} <= columns:
+        raise MigrationError(
+            'score table has the legacy (course_id, score) layout; move its rows to '
+            '(assessment_id, marks_obtained) as in smart_exam_cell_score.sql and re-run'
+        )
+    return created
+
+def migrate_role_permission(cursor):
+    """Join table between role and permission."""
+    before = existing_tables(cursor)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS role_permission (
+            role_id INT NOT NULL,
+            permission_id INT NOT NULL,
+            PRIMARY KEY (role_id, permission_id),
+            KEY idx_role_permission_permission (permission_id),
+            CONSTRAINT role_permission_ibfk_1 FOREIGN KEY (role_id) REFERENCES role (role_id) ON DELETE CASCADE,
+            CONSTRAINT role_permission_ibfk_2 FOREIGN KEY (permission_id) REFERENCES permission (permission_id) ON DELETE CASCADE
+        )
+        """
+    )
+    return [] if 'role_permission' in before else ['role_permission']
+
+def migrate_user_session(cursor):
+    """Session table for SESSION_BACKEND=mysql."""
+    before = existing_tables(cursor)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_session (
+            token CHAR(32) PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at DOUBLE NOT NULL,
+            KEY idx_user_session_expires (expires_at)
+        )
+        """
+    )
+    return [] if 'user_session' in before else ['user_session']
+
+def migrate_hot_query_indexes(cursor):
+    """Indexes behind the grade, score, enrollment, attendance and student list queries."""
+    # Grade subqueries group score by (student, assessment) filtered on either column
+    add_index_if_missing(cursor, 'score', 'idx_score_student_assessment',
+                         'student_id, assessment_id, marks_obtained')
+    add_index_if_missing(cursor, 'score', 'idx_score_assessment_student',
+                         'assessment_id, student_id, marks_obtained')
+    add_index_if_missing(cursor, 'enrollment', 'idx_enrollment_section_student', 'section_id, student_id')
+    add_index_if_missing(cursor, 'enrollment', 'idx_enrollment_student_section', 'student_id, section_id')
+    add_index_if_missing(cursor, 'assessment', 'idx_assessment_section', 'section_id, assessment_id')
+    # Attendance upserts rely on the unique key; databases built from the old dump lack both
+    add_index_if_missing(cursor, 'attendance', 'uq_attendance_section_date_student',
+                         'section_id, class_date, student_id', unique=True)
+    add_index_if_missing(cursor, 'attendance', 'idx_attendance_student_date', 'student_id, class_date')
+    add_index_if_missing(cursor, 'student', 'idx_student_admission_year', 'admission_year')
+    add_index_if_missing(cursor, 'department', 'idx_department_name', 'name')
+    return []
+
+def migrate_history_tables(cursor):
+    """<table>_history for each of ARCHIVE_TABLES, used by archive-mode bulk deletes.
+
+    Same columns as the table (from the schema dumps) plus archived_at, keyed
+    on the original primary key, with no unique or foreign keys so archived
+    rows never conflict with or pin live ones.
+    """
+    before = existing_tables(cursor)
+    created = []
+    for table, statement in load_base_schema():
+        if table not in ARCHIVE_TABLES:
+            continue
+        columns = [line.strip().rstrip(',').replace(' AUTO_INCREMENT', '')
+                   for line in statement.split('\n') if line.strip().startswith('`')]
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS `{table}_history` (
+                {', '.join(columns)},
+                `archived_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (`{ARCHIVE_TABLES[table]}`),
+                KEY `idx_{table}_history_archived` (`archived_at`)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+            """
+        )
+        if f'{table}_history' not in before:
+            created.append(f'{table}_history')
+    return created
+
+def migrate_row_versions(cursor):
+    """version counters on student and score for optimistic concurrency.
+
+    Clients send the version they read (parse_version); update_student,
+    update_score and update_scores_batch compare it under a row lock and
+    bump it on write.
+    """
+    tables = existing_tables(cursor)
+    # History copies take whole rows, so they need the column too
+    for table in ('student', 'score', 'student_history', 'score_history'):
+        if table in tables:
+            add_column_if_missing(cursor, table, 'version', 'INT NOT NULL DEFAULT 1')
+    return []
+
+def migrate_section_result(cursor):
+    """Stored per-(section, student) results (see refresh_results), filled from current scores."""
+    before = existing_tables(cursor)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS section_result (
+            section_id INT NOT NULL,
+            student_id VARCHAR(20) NOT NULL,
+            course_id INT DEFAULT NULL,
+            assessments INT NOT NULL DEFAULT 0,
+            assessments_scored INT NOT NULL DEFAULT 0,
+            total_weight DECIMAL(9,2) DEFAULT NULL,
+            weighted_total DECIMAL(9,2) DEFAULT NULL,
+            percentage DECIMAL(6,2) DEFAULT NULL,
+            letter_grade VARCHAR(2) DEFAULT NULL,
+            grade_point TINYINT DEFAULT NULL,
+            section_rank INT DEFAULT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (section_id, student_id),
+            KEY idx_section_result_student (student_id, section_id)
+        )
+        """
+    )
+    cursor.execute("DELETE FROM section_result")
+    store_results(cursor, '1 = 1', '1 = 1', ())
+    rank_results(cursor)
+    return [] if 'section_result' in before else ['section_result']
+
+def migrate_activity_log(cursor):
+    """Recent-activity feed shared by all workers (see ActivityFeed), seeded with the latest faculty and scores."""
+    before = existing_tables(cursor)
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS activity_log (
+            activity_id BIGINT NOT NULL AUTO_INCREMENT,
+            color VARCHAR(20) NOT NULL,
+            icon VARCHAR(50) NOT NULL,
+            title VARCHAR(100) NOT NULL,
+            description VARCHAR(500) NOT NULL,
+            created_at DATETIME DEFAULT NULL,
+            PRIMARY KEY (activity_id)
+        )
+        """
+    )
+    if 'activity_log' in before:
+        return []
+    # Oldest first, so the newest seed row gets the highest id; NULL created_at reads as "Earlier"
+    cursor.execute(
+        """
+        INSERT INTO activity_log (color, icon, title, description)
+        SELECT 'orange', 'fas fa-clipboard-check', 'Score Recorded',
+               CONCAT(student_id, ' - Assessment ', assessment_id, ': ', marks_obtained)
+        FROM (SELECT score_id, student_id, assessment_id, marks_obtained
+              FROM score ORDER BY score_id DESC LIMIT 5) s
+        ORDER BY score_id
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO activity_log (color, icon, title, description)
+        SELECT 'green', 'fas fa-chalkboard-teacher', 'Faculty Added',
+               CONCAT(first_name, ' ', last_name, ', ', COALESCE(designation, ''))
+        FROM (SELECT faculty_id, first_name, last_name, designation
+              FROM faculty ORDER BY faculty_id DESC LIMIT 5) f
+        ORDER BY faculty_id
+        """
+    )
+    return ['activity_log']
+
+# (version, description, migrate(cursor) -> list of tables created); append only
+MIGRATIONS = [
+    (1, 'Base schema from smart_exam_cell_*.sql', migrate_base_schema),
+    (2, 'role_permission join table', migrate_role_permission),
+    (3, 'user_session table', migrate_user_session),
+    (4, 'Indexes for hot queries', migrate_hot_query_indexes),
+    (5, 'History tables for archive-mode bulk deletes', migrate_history_tables),
+    (6, 'Row version columns on student and score', migrate_row_versions),
+    (7, 'section_result table', migrate_section_result),
+    (8, 'activity_log table', migrate_activity_log)
+]
+
+def run_migrations():
+    """Apply pending MIGRATIONS in order; returns (versions applied, tables created).
+
+    A MySQL advisory lock serializes concurrent runs, and each version is
+    recorded in schema_migrations once applied, so later runs do no DDL.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise MigrationError('Database connection failed')
+    applied, created = [], []
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_CONFIG['lock_timeout']))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError('Timed out waiting for another migration run')
+        try:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cursor.execute("SELECT version FROM schema_migrations")
+            done = {row[0] for row in cursor.fetchall()}
+            for version, description, migrate in MIGRATIONS:
+                if version in done:
+                    continue
+                logger.info("Applying migration %s: %s", version, description)
+                created.extend(migrate(cursor))
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+                connection.commit()
+                applied.append(version)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    return applied, created
+
+@app.route('/api/setup/database', methods=['POST'])
+@require_permission('schema.migrate')
+def setup_database():
+    """Apply pending migrations and seed reference data"""
+    try:
+        applied, created = run_migrations()
+    except MigrationError as e:
+        logger.error("Migration failed: %s", e)
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        logger.exception("Migration failed")
+        return jsonify({'error': str(e)}), 500
+    seed_reference_data()
+    if created:
+        notify_write(*created)
+    return jsonify({
+        'success': True,
+        'migrations_applied': applied,
+        'tables_created': created
+    }), 200
+
+# ==================== Startup ====================
+
+# Read endpoints requested once per worker so their caches are filled before traffic
+WARMUP_PATHS = ('/api/departments', '/api/programs', '/api/courses', '/api/dashboard/stats')
+
+def seed_reference_data():
+    """Idempotent seeds that must follow the migrations."""
+    seed_departments_if_missing()
+    seed_role_permissions()
+    seed_admin_account_if_missing()
+
+def prepare_database():
+    """Migrations and seeds; run once per deployment, not once per worker.
+
+    Returns False if the migrations could not be applied.
+    """
+    try:
+        applied, created = run_migrations()
+    except Exception:
+        logger.exception("Database migration failed")
+        return False
+    if applied:
+        logger.info("Applied migrations %s (created tables: %s)", applied, ', '.join(created) or 'none')
+    seed_reference_data()
+    return True
+
+def warm_up():
+    """Open pool connections and fill the read caches of this process."""
+    started = time.perf_counter()
+    opened = DB_POOL.warm(DB_POOL_CONFIG['warm'])
+    if READ_REPLICAS is not None:
+        opened += READ_REPLICAS.warm(DB_POOL_CONFIG['warm'])
+    load_role_permissions()
+    client = app.test_client()
+    for path in WARMUP_PATHS:
+        response = client.get(path, headers={'X-Request-ID': 'warmup'})
+        if response.status_code != 200:
+            logger.warning("Warm-up request %s returned %s", path, response.status_code)
+    for summary, name in ((DASHBOARD_SUMMARY, 'Dashboard summary'), (SEARCH_INDEX, 'Search index')):
+        try:
+            summary.ensure_built()
+        except Exception:
+            logger.exception("%s warm-up failed", name)
+    logger.info("Worker %s warmed up in %.2fs (%s pooled connections)",
+                os.getpid(), time.perf_counter() - started, opened)
+
+def shutdown():
+    """Flush buffered writes and close pooled connections at worker exit."""
+    LAST_LOGIN_WRITER.flush()
+    DASHBOARD_SUMMARY.activity.flush()
+    DB_POOL.close_all()
+    if READ_REPLICAS is not None:
+        READ_REPLICAS.close_all()
+
 # ==================== Main ====================
 
 if __name__ == '__main__':
-    print("=" * 50)
-    print("College Management System - Backend Server")
-    print("=" * 50)
-    print(f"Starting Flask server on http://localhost:5000")
-    print(f"Database: {DB_CONFIG['database']} @ {DB_CONFIG['host']}")
-    print("=" * 50)
-    # Ensure default departments exist
-    seed_departments_if_missing()
-    ensure_score_table_if_missing()
-    app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
+    if sys.argv[1:] == ['setup']:
+        # Used by the production launcher (gunicorn.conf.py) before forking workers
+        sys.exit(0 if prepare_database() else 1)
+    logger.info("College Management System - Backend Server")
+    logger.info("Starting Flask server on http://localhost:5000")
+    logger.info("Database: %s @ %s", DB_CONFIG['database'], DB_CONFIG['host'])
+    prepare_database()
+    load_role_permissions()
+    app.run(debug=True, port=5000, host='0.0.0.0')
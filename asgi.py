@@ -0,0 +1,392 @@
+"""Async serving mode for the College Management System API.
+
+Run with any ASGI server, e.g.:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The read routes students poll (grades, results) and the health check are served on
+the event loop with an aiomysql pool, so thousands of idle or waiting
+clients cost a socket each rather than a thread each. Every other route is
+handed to the Flask app in app.py on a bounded thread pool, so request and
+response contracts are exactly those of app.py. Request bodies are passed to
+Flask as they arrive, so streamed uploads such as the student CSV import are
+never held in memory whole.
+"""
+import asyncio
+import io
+import os
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import aiomysql
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+from app import (app as flask_app, DB_CONFIG, DB_POOL_CONFIG, DB_QUERY_DURATION, DB_QUERY_ERRORS,
+                 HTTP_REQUEST_DURATION, RESULT_SELECT, SESSION_STORE, build_grade_query, can_read_student,
+                 grade_row, has_permission, logger, query_label)
+
+ASYNC_CONFIG = {
+    # aiomysql pool bounds; connections are shared by all native handlers
+    'pool_min': int(os.getenv('ASYNC_DB_POOL_MIN', 1)),
+    'pool_max': int(os.getenv('ASYNC_DB_POOL_MAX', 20)),
+    # Seconds to wait for a free connection before failing the request
+    'pool_timeout': float(os.getenv('ASYNC_DB_POOL_TIMEOUT', DB_POOL_CONFIG['timeout'])),
+    # Threads running Flask routes that have no native async handler
+    'wsgi_threads': int(os.getenv('ASYNC_WSGI_THREADS', 32)),
+    # Largest request body accepted (bytes)
+    'max_body': int(os.getenv('ASYNC_MAX_BODY', 64 * 1024 * 1024))
+}
+
+# Created on lifespan startup
+DB = None
+WSGI_EXECUTOR = ThreadPoolExecutor(max_workers=ASYNC_CONFIG['wsgi_threads'], thread_name_prefix='wsgi')
+
+CORS_EXPOSE_HEADERS = 'X-Next-Cursor, X-Request-ID, X-DB-Route'
+
+
+class DatabaseUnavailable(Exception):
+    """Raised when no async connection could be obtained."""
+
+
+async def fetch_all(query, args=()):
+    """Rows of query as dicts, on a pooled aiomysql connection."""
+    try:
+        connection = await asyncio.wait_for(DB.acquire(), ASYNC_CONFIG['pool_timeout'])
+    except (asyncio.TimeoutError, OSError, aiomysql.Error) as e:
+        raise DatabaseUnavailable(str(e)) from e
+    try:
+        async with connection.cursor(aiomysql.DictCursor) as cursor:
+            started = time.perf_counter()
+            try:
+                await cursor.execute(query, args)
+                rows = await cursor.fetchall()
+            except Exception:
+                DB_QUERY_ERRORS.inc((query_label(query),))
+                raise
+            DB_QUERY_DURATION.observe((query_label(query),), time.perf_counter() - started)
+            return rows
+    finally:
+        DB.release(connection)
+
+# ==================== Native Routes ====================
+
+async def get_section_grades(section_id):
+    """Async counterpart of app.get_section_grades."""
+    query = build_grade_query(
+        'e.section_id = %s',
+        'assessment_id IN (SELECT assessment_id FROM assessment WHERE section_id = %s)'
+    ) + " ORDER BY t.percentage DESC, t.student_id"
+    results = [grade_row(row) for row in await fetch_all(query, (section_id, section_id))]
+    return 200, {
+        'section_id': section_id,
+        'student_count': len(results),
+        'results': results
+    }
+
+async def get_student_grades(student_id):
+    """Async counterpart of app.get_student_grades."""
+    query = build_grade_query('e.student_id = %s', 'student_id = %s') + " ORDER BY t.section_id"
+    results = [grade_row(row) for row in await fetch_all(query, (student_id, student_id))]
+    return 200, {'student_id': student_id, 'results': results}
+
+async def get_result(section_id, student_id):
+    """Async counterpart of app.get_result."""
+    rows = await fetch_all(RESULT_SELECT + " WHERE section_id = %s AND student_id = %s", (section_id, student_id))
+    if not rows:
+        return 404, {'error': 'Result not found'}
+    return 200, grade_row(rows[0])
+
+async def get_student_results(student_id):
+    """Async counterpart of app.get_student_results."""
+    rows = await fetch_all(RESULT_SELECT + " WHERE student_id = %s ORDER BY section_id", (student_id,))
+    return 200, {'student_id': student_id, 'results': [grade_row(row) for row in rows]}
+
+async def get_section_results(section_id):
+    """Async counterpart of app.get_section_results."""
+    rows = await fetch_all(
+        RESULT_SELECT + " WHERE section_id = %s ORDER BY section_rank IS NULL, section_rank, student_id",
+        (section_id,)
+    )
+    results = [grade_row(row) for row in rows]
+    return 200, {'section_id': section_id, 'student_count': len(results), 'results': results}
+
+async def health_check():
+    """Async counterpart of app.health_check, reporting the aiomysql pool."""
+    pool = {'size': DB.size, 'in_use': DB.size - DB.freesize, 'idle': DB.freesize}
+    try:
+        await fetch_all("SELECT 1")
+    except Exception:
+        return 500, {
+            'status': 'unhealthy',
+            'database': 'disconnected',
+            'message': 'Database connection failed',
+            'pool': pool
+        }
+    return 200, {
+        'status': 'healthy',
+        'database': 'connected',
+        'message': 'Backend is running successfully',
+        'pool': pool
+    }
+
+def check_access(authorization, access, params):
+    """(status, payload) refusing the request, or None to serve it.
+
+    access is a permission code, or 'student' for the rules of
+    app.require_student_access. Blocking (session and permission lookups),
+    so it runs on the WSGI thread pool.
+    """
+    token = authorization[len('Bearer '):].strip() if authorization.startswith('Bearer ') else ''
+    try:
+        user = SESSION_STORE.get(token) if token else None
+    except Exception:
+        logger.exception("Session lookup failed")
+        user = None
+    if user is None:
+        return 401, {'error': 'Unauthorized'}
+    if access == 'student':
+        allowed = can_read_student(user, params.get('student_id'))
+    else:
+        allowed = has_permission(user, access)
+    return None if allowed else (403, {'error': 'Forbidden'})
+
+def compile_rule(rule):
+    """Regex and converters for a Flask-style rule such as '/a/<int:id>'."""
+    converters = {}
+
+    def replace(match):
+        converter, name = match.group(1), match.group(2)
+        if converter == 'int':
+            converters[name] = int
+            return f'(?P<{name}>\\d+)'
+        return f'(?P<{name}>[^/]+)'
+
+    pattern = re.sub(r'<(?:(\w+):)?(\w+)>', replace, rule)
+    return re.compile(f'^{pattern}$'), converters
+
+# (method, Flask rule, access, handler); the rule doubles as the metrics route label.
+# access mirrors the Flask route's decorator (see check_access); None is public.
+NATIVE_ROUTES = [
+    (method, rule, *compile_rule(rule), access, handler)
+    for method, rule, access, handler in (
+        ('GET', '/api/grades/sections/<int:section_id>', 'record.read', get_section_grades),
+        ('GET', '/api/grades/students/<student_id>', 'student', get_student_grades),
+        ('GET', '/api/results/<int:section_id>/<student_id>', 'student', get_result),
+        ('GET', '/api/results/students/<student_id>', 'student', get_student_results),
+        ('GET', '/api/results/sections/<int:section_id>', 'record.read', get_section_results),
+        ('GET', '/api/health', None, health_check)
+    )
+]
+
+def match_native(method, path):
+    for route_method, rule, pattern, converters, access, handler in NATIVE_ROUTES:
+        if route_method != method:
+            continue
+        match = pattern.match(path)
+        if match:
+            params = {name: converters.get(name, str)(value) for name, value in match.groupdict().items()}
+            return rule, access, handler, params
+    return None
+
+async def serve_native(scope, send, rule, access, handler, params):
+    started = time.perf_counter()
+    headers = {name.decode('latin1'): value.decode('latin1') for name, value in scope['headers']}
+    request_id = headers.get('x-request-id') or uuid.uuid4().hex[:16]
+    try:
+        refusal = None
+        if access is not None:
+            refusal = await asyncio.get_running_loop().run_in_executor(
+                WSGI_EXECUTOR, check_access, headers.get('authorization', ''), access, params)
+        status, payload = refusal or await handler(**params)
+    except DatabaseUnavailable as e:
+        logger.error("Error connecting to MySQL: %s", e)
+        status, payload = 500, {'error': 'Database connection failed'}
+    except Exception as e:
+        logger.exception("Error serving %s", rule)
+        status, payload = 500, {'error': str(e)}
+
+    body = flask_app.json.dumps(payload).encode('utf-8') + b'\n'
+    response_headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        (b'x-request-id', request_id.encode('latin1'))
+    ]
+    if 'origin' in headers:
+        # Same policy as CORS(app) in app.py
+        response_headers.append((b'access-control-allow-origin', b'*'))
+        response_headers.append((b'access-control-expose-headers', CORS_EXPOSE_HEADERS.encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+    await send({'type': 'http.response.body', 'body': body})
+    HTTP_REQUEST_DURATION.observe((scope['method'], rule, str(status)), time.perf_counter() - started)
+
+# ==================== WSGI Fallback ====================
+
+class ReceiveStream(io.RawIOBase):
+    """wsgi.input pulling the request body from the ASGI receive channel as Flask reads it.
+
+    Read on a WSGI worker thread; each receive() is run on the event loop.
+    """
+
+    def __init__(self, receive, loop, limit):
+        self._receive = receive
+        self._loop = loop
+        self._limit = limit
+        self._chunk = b''
+        self._offset = 0
+        self._size = 0
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._offset >= len(self._chunk):
+            if self._done:
+                return 0
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._done = True
+                raise ClientDisconnected()
+            self._chunk = message.get('body', b'')
+            self._offset = 0
+            self._done = not message.get('more_body')
+            self._size += len(self._chunk)
+            if self._size > self._limit:
+                self._done = True
+                raise RequestEntityTooLarge()
+        count = min(len(buffer), len(self._chunk) - self._offset)
+        buffer[:count] = self._chunk[self._offset:self._offset + count]
+        self._offset += count
+        return count
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        # The body ends where the stream does, even without a Content-Length (chunked uploads)
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1')
+        value = value.decode('latin1')
+        if name in ('content-type', 'content-length'):
+            key = name.upper().replace('-', '_')
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+async def serve_wsgi(scope, receive, send):
+    """Run the Flask app for this request on the WSGI thread pool.
+
+    The body is streamed into wsgi.input as the app reads it; a declared
+    Content-Length over max_body is refused up front, and a body that grows
+    past it fails the read with 413. The response iterable is consumed on the worker thread and each chunk is
+    sent before the next is produced, so streamed exports keep their
+    backpressure and a disconnect closes the iterable (and its connection).
+    """
+    declared = dict(scope['headers']).get(b'content-length')
+    if declared is not None and declared.isdigit() and int(declared) > ASYNC_CONFIG['max_body']:
+        await send({'type': 'http.response.start', 'status': 413, 'headers': [(b'content-length', b'0')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    loop = asyncio.get_running_loop()
+    body = io.BufferedReader(ReceiveStream(receive, loop, ASYNC_CONFIG['max_body']))
+    environ = build_environ(scope, body)
+
+    def send_from_thread(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    def run():
+        response_start = {}
+
+        def start_response(status, headers, exc_info=None):
+            response_start['message'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+            }
+
+        result = flask_app(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not chunk:
+                    continue
+                if not started:
+                    send_from_thread(response_start['message'])
+                    started = True
+                send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not started:
+                send_from_thread(response_start['message'])
+            send_from_thread({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+    await loop.run_in_executor(WSGI_EXECUTOR, run)
+
+# ==================== Application ====================
+
+async def lifespan(receive, send):
+    global DB
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                DB = await aiomysql.create_pool(
+                    host=DB_CONFIG['host'],
+                    port=DB_CONFIG['port'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    db=DB_CONFIG['database'],
+                    minsize=ASYNC_CONFIG['pool_min'],
+                    maxsize=ASYNC_CONFIG['pool_max'],
+                    pool_recycle=DB_POOL_CONFIG['max_lifetime'],
+                    autocommit=True
+                )
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            logger.info("Async mode: aiomysql pool %s-%s, %s WSGI threads", ASYNC_CONFIG['pool_min'],
+                        ASYNC_CONFIG['pool_max'], ASYNC_CONFIG['wsgi_threads'])
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if DB is not None:
+                DB.close()
+                await DB.wait_closed()
+            WSGI_EXECUTOR.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    native = match_native(scope['method'], scope['path'])
+    if native is not None:
+        await serve_native(scope, send, *native)
+    else:
+        await serve_wsgi(scope, receive, send)
@@ -0,0 +1,609 @@
+"""Benchmark suite for the College Management System API.
+
+    # Offline: synthetic data in an SQLite stand-in, requests in-process
+    python benchmark.py --backend sqlite --scale 2
+
+    # Local MySQL/MariaDB from the DB_* environment variables (dedicated database)
+    python benchmark.py --backend mysql --scale 5 --reset
+
+    # Against a running server, on data loaded by an earlier run with the same --scale/--seed
+    python benchmark.py --backend mysql --no-load --url http://localhost:5000
+
+The generator follows the smart_exam_cell_*.sql schemas: departments ->
+programs -> students, departments -> courses -> sections -> enrollments,
+sections -> assessments -> scores/attendance, plus useraccount rows for the
+login flow. It is seeded, so the same --scale and --seed always produce the
+same rows. Each scenario runs --requests requests over --concurrency threads
+and reports throughput and p50/p95/p99 latency. --output saves the results
+as JSON; --baseline compares against a saved file and exits non-zero on a
+regression beyond --tolerance.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlsplit
+
+import pymysql
+
+BENCH_PASSWORD = 'bench-password'
+
+# Per unit of --scale
+DATASET_SHAPE = {
+    'departments': 4,
+    'programs_per_department': 2,
+    'students_per_program': 60,
+    'faculty_per_department': 8,
+    'courses_per_department': 6,
+    'sections_per_course': 2,
+    'sections_per_student': 5,
+    'assessments_per_section': 3,
+    'classes_per_section': 12
+}
+
+# Referenced tables first; --reset deletes in reverse so foreign key checks stay on
+LOAD_ORDER = ('department', 'program', 'faculty', 'course', 'section', 'student', 'enrollment',
+              'assessment', 'score', 'attendance', 'useraccount')
+
+FIRST_NAMES = ('Aarav', 'Diya', 'Vihaan', 'Ananya', 'Arjun', 'Isha', 'Kabir', 'Meera', 'Rohan', 'Saanvi',
+               'Aditya', 'Kavya', 'Nikhil', 'Priya', 'Rahul', 'Sneha', 'Varun', 'Zara', 'Dev', 'Nisha')
+LAST_NAMES = ('Sharma', 'Iyer', 'Reddy', 'Patel', 'Nair', 'Gupta', 'Menon', 'Rao', 'Singh', 'Das',
+              'Kumar', 'Joshi', 'Pillai', 'Bose', 'Khan', 'Mehta', 'Verma', 'Shetty', 'Kapoor', 'Jain')
+DEPARTMENT_NAMES = ('Computer Science', 'Information Technology', 'Artificial Intelligence',
+                    'Electronics', 'Mechanical', 'Civil', 'Electrical', 'Biotechnology')
+DESIGNATIONS = ('Professor', 'Associate Professor', 'Assistant Professor', 'Lecturer')
+ASSESSMENTS = (('Quiz', 20, 10), ('Mid-term', 50, 30), ('Final', 100, 60))
+
+# ==================== Synthetic Data ====================
+
+def generate_dataset(scale=1, seed=42, password_hash=''):
+    """Rows for every benchmark table: {table: (columns, rows)}."""
+    rng = random.Random(seed)
+    shape = {key: value * scale if key == 'departments' else value for key, value in DATASET_SHAPE.items()}
+    tables = {}
+
+    departments = []
+    for dept_id in range(1, shape['departments'] + 1):
+        base = DEPARTMENT_NAMES[(dept_id - 1) % len(DEPARTMENT_NAMES)]
+        suffix = f' {(dept_id - 1) // len(DEPARTMENT_NAMES) + 1}' if dept_id > len(DEPARTMENT_NAMES) else ''
+        departments.append((dept_id, base + suffix, f'0422-{2500000 + dept_id}'))
+    tables['department'] = (('dept_id', 'name', 'office_phone'), departments)
+
+    programs = []
+    for dept_id, name, _ in departments:
+        for n, level in enumerate(('UG', 'PG')[:shape['programs_per_department']]):
+            programs.append((len(programs) + 1, f"{'B.Tech' if level == 'UG' else 'M.Tech'} {name}", level, dept_id))
+    tables['program'] = (('program_id', 'name', 'level', 'dept_id'), programs)
+
+    faculty = []
+    for dept_id, _, _ in departments:
+        for _ in range(shape['faculty_per_department']):
+            faculty_id = len(faculty) + 1
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            faculty.append((faculty_id, f'Dr. {first}', last, rng.choice(DESIGNATIONS),
+                            f'faculty{faculty_id}@college.edu', f'9{rng.randrange(10 ** 9):09d}', dept_id))
+    tables['faculty'] = (('faculty_id', 'first_name', 'last_name', 'designation', 'email', 'phone', 'dept_id'),
+                         faculty)
+    faculty_by_dept = {}
+    for row in faculty:
+        faculty_by_dept.setdefault(row[6], []).append(row[0])
+
+    courses, sections = [], []
+    sections_by_dept = {}
+    for dept_id, name, _ in departments:
+        for n in range(shape['courses_per_department']):
+            course_id = len(courses) + 1
+            courses.append((course_id, f'{name} {n + 1:02d}', rng.choice((3, 4)), dept_id))
+            for section_no in range(shape['sections_per_course']):
+                section_id = len(sections) + 1
+                sections.append((section_id, course_id, 'Fall', 2025, chr(ord('A') + section_no), 60,
+                                 rng.choice(faculty_by_dept[dept_id])))
+                sections_by_dept.setdefault(dept_id, []).append(section_id)
+    tables['course'] = (('course_id', 'title', 'credits', 'dept_id'), courses)
+    tables['section'] = (('section_id', 'course_id', 'term', 'year', 'section_no', 'capacity', 'faculty_id'),
+                         sections)
+
+    students = []
+    enrolled = {}  # section_id -> [student_id]
+    enrollments = []
+    for program_id, _, _, dept_id in programs:
+        for _ in range(shape['students_per_program']):
+            admission_year = rng.choice((2022, 2023, 2024, 2025))
+            student_id = f'S{program_id:03d}{admission_year}{len(students) + 1:06d}'
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            dob = date(admission_year - 18, 1, 1) + timedelta(days=rng.randrange(365))
+            students.append((student_id, first, last, dob.isoformat(), rng.choice(('Male', 'Female')),
+                             f'{student_id.lower()}@students.college.edu', f'8{rng.randrange(10 ** 9):09d}',
+                             f'{rng.randrange(1, 500)} Main Road', admission_year,
+                             'Active' if rng.random() < 0.95 else 'Inactive', program_id))
+            picks = rng.sample(sections_by_dept[dept_id], min(shape['sections_per_student'],
+                                                              len(sections_by_dept[dept_id])))
+            for section_id in picks:
+                enrollments.append((len(enrollments) + 1, student_id, section_id, '2025-07-15', 'Enrolled', 'Letter'))
+                enrolled.setdefault(section_id, []).append(student_id)
+    tables['student'] = (('student_id', 'first_name', 'last_name', 'dob', 'gender', 'email', 'phone', 'address',
+                          'admission_year', 'status', 'program_id'), students)
+    tables['enrollment'] = (('enrollment_id', 'student_id', 'section_id', 'enroll_date', 'status', 'grade_mode'),
+                            enrollments)
+
+    assessments, scores, attendance = [], [], []
+    term_start = date(2025, 7, 21)
+    for section_id, *_ in sections:
+        for kind, max_marks, weight in ASSESSMENTS[:shape['assessments_per_section']]:
+            assessment_id = len(assessments) + 1
+            assessments.append((assessment_id, section_id, kind, f'{kind} - Section {section_id}', max_marks,
+                                weight, (term_start + timedelta(weeks=4 * len(assessments) % 16)).isoformat()))
+            for student_id in enrolled.get(section_id, ()):
+                marks = round(min(max_marks, max(0, rng.gauss(0.7, 0.15) * max_marks)), 2)
+                scores.append((len(scores) + 1, assessment_id, student_id, marks))
+        for week in range(shape['classes_per_section']):
+            class_date = (term_start + timedelta(weeks=week)).isoformat()
+            for student_id in enrolled.get(section_id, ()):
+                roll = rng.random()
+                status = 'Present' if roll < 0.85 else 'Absent' if roll < 0.95 else 'Late'
+                attendance.append((len(attendance) + 1, section_id, student_id, class_date, status, None))
+    tables['assessment'] = (('assessment_id', 'section_id', 'type', 'title', 'max_marks', 'weight_percent',
+                             'assessment_date'), assessments)
+    tables['score'] = (('score_id', 'assessment_id', 'student_id', 'marks_obtained'), scores)
+    tables['attendance'] = (('attendance_id', 'section_id', 'student_id', 'class_date', 'status', 'remarks'),
+                            attendance)
+
+    accounts = [(1, 'bench.admin@college.edu', password_hash, 1, 'admin', None, None)]
+    for row in faculty:
+        accounts.append((len(accounts) + 1, row[4], password_hash, 1, 'faculty', str(row[0]), None))
+    for row in students:
+        accounts.append((len(accounts) + 1, row[5], password_hash, 1, 'student', row[0], None))
+    tables['useraccount'] = (('user_id', 'username', 'password_hash', 'is_active', 'person_type',
+                              'linked_person_id', 'last_login'), accounts)
+    return tables
+
+# ==================== SQLite Stand-in ====================
+
+def mysql_concat(*parts):
+    return None if any(part is None for part in parts) else ''.join(str(part) for part in parts)
+
+def mysql_date_format(value, fmt):
+    if value is None:
+        return None
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').strftime(fmt)
+
+
+class SQLiteCursor:
+    """pymysql-style cursor over sqlite3 (%s placeholders, dict or tuple rows)."""
+
+    def __init__(self, raw, as_dict):
+        self._cursor = raw.cursor()
+        self.as_dict = as_dict
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, query, args=None):
+        if args is None:
+            args = ()
+        else:
+            # pymysql only %-formats when args are given
+            query = query.replace('%s', '?').replace('%%', '%')
+            args = tuple(args) if isinstance(args, (list, tuple)) else (args,)
+        try:
+            self._cursor.execute(query, args)
+        except sqlite3.IntegrityError as e:
+            raise pymysql.err.IntegrityError(str(e)) from e
+        except sqlite3.Error as e:
+            raise pymysql.err.OperationalError(str(e)) from e
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        return self.rowcount
+
+    def executemany(self, query, seq_args):
+        total = 0
+        for args in seq_args:
+            total += max(self.execute(query, args), 0)
+        self.rowcount = total
+        return total
+
+    def _convert(self, row):
+        if row is None or not self.as_dict:
+            return row
+        return dict(zip((column[0] for column in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteConnection:
+    """The slice of pymysql's Connection API that app.py uses, over an SQLite file."""
+
+    cursorclass = pymysql.cursors.Cursor
+
+    def __init__(self, path):
+        self._raw = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._raw.create_function('CONCAT', -1, mysql_concat, deterministic=True)
+        self._raw.create_function('DATE_FORMAT', 2, mysql_date_format, deterministic=True)
+        self.open = True
+
+    def cursor(self, cursor=None):
+        cursor = cursor or self.cursorclass
+        return SQLiteCursor(self._raw, issubclass(cursor, pymysql.cursors.DictCursorMixin))
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def begin(self):
+        pass
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.open = False
+        self._raw.close()
+
+
+def sqlite_schema(statement):
+    """Translate one CREATE TABLE from the MySQL dumps into SQLite DDL."""
+    table = re.search(r'CREATE TABLE (?:IF NOT EXISTS )?`(\w+)`', statement).group(1)
+    body = statement[statement.index('(') + 1:statement.rindex(')')]
+    lines = [line.strip().rstrip(',') for line in body.strip().splitlines()]
+    auto_column = None
+    columns, extra, indexes = [], [], []
+    for line in lines:
+        if line.startswith('CONSTRAINT'):
+            continue
+        match = re.match(r'(UNIQUE )?KEY `(\w+)` \((.*)\)', line)
+        if match:
+            if match.group(1):
+                extra.append(f'UNIQUE ({match.group(3)})')
+            else:
+                indexes.append(f'CREATE INDEX `{table}_{match.group(2)}` ON `{table}` ({match.group(3)})')
+            continue
+        if line.startswith('PRIMARY KEY'):
+            extra.append(line)
+            continue
+        line = re.sub(r'\s+(COLLATE|CHARACTER SET) \w+', '', line)
+        if 'AUTO_INCREMENT' in line:
+            auto_column = line.split()[0]
+            line = f'{auto_column} INTEGER PRIMARY KEY AUTOINCREMENT'
+        columns.append(line)
+    if auto_column:
+        extra = [e for e in extra if not e.startswith('PRIMARY KEY')]
+    create = f'CREATE TABLE `{table}` (\n  ' + ',\n  '.join(columns + extra) + '\n)'
+    return [create] + indexes
+
+
+class AlterRecorder:
+    """Cursor stand-in that collects the ALTER TABLE statements of a migration as SQLite DDL."""
+
+    def __init__(self, tables=()):
+        self.tables = list(tables)
+        self.statements = []
+
+    def execute(self, query, args=None):
+        match = re.match(r'ALTER TABLE `(\w+)` ADD (UNIQUE )?KEY `(\w+)` \(([^)]*)\)', query)
+        if match:
+            table, unique, name, columns = match.groups()
+            self.statements.append(f"CREATE {unique or ''}INDEX IF NOT EXISTS `{name}` ON `{table}` ({columns})")
+            return
+        match = re.match(r'ALTER TABLE `(\w+)` ADD COLUMN (`\w+` [^,]*)', query)
+        if match:
+            self.statements.append(f'ALTER TABLE `{match.group(1)}` ADD COLUMN {match.group(2)}')
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        # existing_tables()
+        return [(table,) for table in self.tables]
+
+
+def create_sqlite_database(app_module, path):
+    """Create the dump schema plus the app's later columns and hot-query indexes in a fresh SQLite file."""
+    raw = sqlite3.connect(path)
+    raw.execute('PRAGMA journal_mode=WAL')
+    tables = []
+    for table, statement in app_module.load_base_schema():
+        for ddl in sqlite_schema(statement):
+            raw.execute(ddl)
+        tables.append(table)
+    recorder = AlterRecorder(tables)
+    app_module.migrate_row_versions(recorder)
+    app_module.migrate_hot_query_indexes(recorder)
+    for ddl in recorder.statements:
+        raw.execute(ddl)
+    raw.commit()
+    raw.close()
+
+# ==================== Loading ====================
+
+def insert_rows(connection, table, columns, rows, chunk_size=2000):
+    cursor = connection.cursor()
+    query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+             f"VALUES ({', '.join(['%s'] * len(columns))})")
+    for start in range(0, len(rows), chunk_size):
+        cursor.executemany(query, rows[start:start + chunk_size])
+    connection.commit()
+    cursor.close()
+
+def load_dataset(connection, dataset, reset=False):
+    """Insert the dataset; refuses to touch a database that already has students unless reset."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM student")
+    existing = cursor.fetchone()[0]
+    if existing and not reset:
+        raise SystemExit(f'student already has {existing} rows; use a dedicated database or pass --reset')
+    if reset:
+        for table in reversed(LOAD_ORDER):
+            cursor.execute(f"DELETE FROM {table}")
+        connection.commit()
+    cursor.close()
+    for table in LOAD_ORDER:
+        columns, rows = dataset[table]
+        started = time.perf_counter()
+        insert_rows(connection, table, columns, rows)
+        print(f'  {table:<12} {len(rows):>9,} rows  {time.perf_counter() - started:6.2f}s')
+
+# ==================== Scenarios ====================
+
+def build_scenarios(dataset):
+    """name -> fn(rng) returning (method, path, json body or None)."""
+    student_ids = [row[0] for row in dataset['student'][1]]
+    program_ids = [row[0] for row in dataset['program'][1]]
+    logins = [row[1] for row in dataset['useraccount'][1][:200]]
+    return {
+        'students_page': lambda rng: (
+            'GET', f'/api/students?limit=50&cursor={rng.choice(student_ids)}'
+                   '&fields=student_id,first_name,last_name,program_name,department_name', None),
+        'students_by_program': lambda rng: (
+            'GET', f'/api/students?program={rng.choice(program_ids)}&limit=100', None),
+        'scores_by_student': lambda rng: (
+            'GET', f'/api/scores?student_id={rng.choice(student_ids)}', None),
+        'dashboard_stats': lambda rng: ('GET', '/api/dashboard/stats', None),
+        'login': lambda rng: ('POST', '/api/login', {'email': rng.choice(logins), 'password': BENCH_PASSWORD})
+    }
+
+
+class InProcessClient:
+    """Calls the Flask app directly (no network), one test client per thread."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, body):
+        response = self.client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code
+
+
+class HTTPClient:
+    """Keep-alive HTTP client for a running server."""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+        self.https = parts.scheme == 'https'
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.connection = cls(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body):
+        data = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data else {}
+        for attempt in (1, 2):
+            if self.connection is None:
+                self._connect()
+            try:
+                self.connection.request(method, self.prefix + path, body=data, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the keep-alive connection; retry once on a new one
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_scenario(make_request, make_client, requests, concurrency, warmup, seed):
+    """Drive requests over concurrency threads; returns the result summary."""
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = make_client()
+        for _ in range(warmup):
+            client.request(*make_request(rng))
+        barrier.wait()
+        local, local_statuses = [], {}
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            method, path, body = make_request(rng)
+            started = time.perf_counter()
+            try:
+                status = client.request(method, path, body)
+            except Exception as e:
+                status = type(e).__name__
+            local.append(time.perf_counter() - started)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+# ==================== Report ====================
+
+def print_report(results):
+    print(f"\n{'scenario':<22}{'reqs':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['requests']:>8}{r['errors']:>8}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Scenarios whose p95 rose or throughput fell by more than tolerance."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if current['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} req/s")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--backend', choices=('sqlite', 'mysql'), default='sqlite',
+                        help='sqlite stand-in (offline) or the MySQL/MariaDB from DB_* variables')
+    parser.add_argument('--sqlite-path', help='SQLite file for the stand-in (default: a temporary file)')
+    parser.add_argument('--scale', type=int, default=1, help='dataset size multiplier')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='delete existing rows before loading (mysql)')
+    parser.add_argument('--no-load', action='store_true', help='reuse data loaded by an earlier run')
+    parser.add_argument('--url', help='benchmark a running server instead of calling the app in-process')
+    parser.add_argument('--scenarios', default='all', help='comma-separated scenario names')
+    parser.add_argument('--requests', type=int, default=500, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per thread')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The app reads its configuration at import time
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['DB_POOL_SIZE'] = str(max(args.concurrency, int(os.getenv('DB_POOL_SIZE', 10))))
+    os.environ.setdefault('AUTH_HASH_QUEUE', str(args.concurrency * 2))
+    if args.backend == 'sqlite':
+        sqlite_path = args.sqlite_path or os.path.join(tempfile.mkdtemp(prefix='college-bench-'), 'bench.sqlite3')
+        pymysql.connect = lambda **kwargs: SQLiteConnection(sqlite_path)
+
+    import app as app_module
+    from werkzeug.security import generate_password_hash
+
+    dataset = generate_dataset(args.scale, args.seed, generate_password_hash(BENCH_PASSWORD))
+    if not args.no_load:
+        print(f'Loading scale-{args.scale} dataset into {args.backend}')
+        if args.backend == 'sqlite':
+            if not os.path.exists(sqlite_path) or args.reset:
+                if os.path.exists(sqlite_path):
+                    os.remove(sqlite_path)
+                create_sqlite_database(app_module, sqlite_path)
+            connection = SQLiteConnection(sqlite_path)
+        else:
+            app_module.run_migrations()
+            connection = pymysql.connect(**app_module.DB_CONFIG)
+        try:
+            load_dataset(connection, dataset, reset=args.reset)
+        finally:
+            connection.close()
+
+    scenarios = build_scenarios(dataset)
+    names = list(scenarios) if args.scenarios == 'all' else [n.strip() for n in args.scenarios.split(',')]
+    unknown = [n for n in names if n not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}")
+    if args.url:
+        make_client = lambda: HTTPClient(args.url)
+    else:
+        make_client = lambda: InProcessClient(app_module.app)
+
+    results = {}
+    for name in names:
+        print(f'Running {name} ({args.requests} requests, concurrency {args.concurrency})')
+        results[name] = run_scenario(scenarios[name], make_client, args.requests, args.concurrency,
+                                     args.warmup, args.seed)
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'backend': args.backend,
+                'scale': args.scale,
+                'concurrency': args.concurrency,
+                'target': args.url or 'in-process',
+                'results': results
+            }, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print('\nRegressions beyond {:.0%}:'.format(args.tolerance))
+            for line in regressions:
+                print('  ' + line)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Production launcher for the College Management System API.
+
+    gunicorn app:app
+
+gunicorn reads this file from the working directory. The master runs the
+schema and seed checks once (`python app.py setup`) before forking, and
+never imports app.py itself, so no pool connections or background threads
+are inherited by workers. Each worker opens its pool and fills its caches
+in post_worker_init, before it accepts connections. On SIGTERM, workers
+stop accepting and finish in-flight requests for up to graceful_timeout
+seconds.
+"""
+import os
+import subprocess
+import sys
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+# Threads per worker; keep DB_POOL_SIZE >= threads so requests do not queue on the pool
+threads = int(os.getenv('WEB_THREADS', 8))
+worker_class = 'gthread'
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# Recycle workers now and then; jitter keeps them from restarting together
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 1000))
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+preload_app = False
+
+# Workers do not share memory, so per-process sessions would not survive a
+# request landing on another worker
+if workers > 1:
+    os.environ.setdefault('SESSION_BACKEND', 'sqlite')
+
+
+def on_starting(server):
+    """Run schema and seed checks once, in a child process, before forking workers."""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+    result = subprocess.run([sys.executable, app_path, 'setup'])
+    if result.returncode != 0:
+        raise RuntimeError(f'Database setup failed (exit code {result.returncode})')
+
+
+def post_worker_init(worker):
+    """Open pooled connections and fill caches before the worker takes traffic."""
+    from app import warm_up
+    warm_up()
+
+
+def worker_exit(server, worker):
+    """Flush buffered writes and close pooled connections."""
+    from app import shutdown
+    shutdown()
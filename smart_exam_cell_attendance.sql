@@ -30,8 +30,8 @@ CREATE TABLE `attendance` (
   `status` varchar(10) DEFAULT 'Present',
   `remarks` text,
   PRIMARY KEY (`attendance_id`),
-  KEY `section_id` (`section_id`),
-  KEY `student_id` (`student_id`),
+  UNIQUE KEY `uq_attendance_section_date_student` (`section_id`,`class_date`,`student_id`),
+  KEY `idx_attendance_student_date` (`student_id`,`class_date`),
   CONSTRAINT `attendance_ibfk_1` FOREIGN KEY (`section_id`) REFERENCES `section` (`section_id`),
   CONSTRAINT `attendance_ibfk_2` FOREIGN KEY (`student_id`) REFERENCES `student` (`student_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
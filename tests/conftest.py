@@ -0,0 +1,97 @@
+"""Shared fixtures: a stand-in MySQL server behind real pymysql cursor classes."""
+import os
+import sys
+from types import SimpleNamespace
+
+import pymysql
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+class FakeMySQLConnection:
+    """Enough of pymysql.connections.Connection for pymysql's own cursors.
+
+    Every statement reaches query() fully formatted, exactly as it would be
+    sent to the server. responder(sql) returns (rows, affected_rows) or
+    raises a pymysql error.
+    """
+
+    encoding = 'utf8'
+    cursorclass = pymysql.cursors.Cursor
+
+    def __init__(self, responder=None):
+        self.responder = responder or (lambda sql: ((), 0))
+        self.queries = []
+        self.commits = 0
+        self.rollbacks = 0
+        self._result = None
+
+    def escape(self, obj, mapping=None):
+        return pymysql.converters.escape_item(obj, self.encoding, mapping)
+
+    def literal(self, obj):
+        return self.escape(obj)
+
+    def cursor(self, cursor=None):
+        return (cursor or self.cursorclass)(self)
+
+    def query(self, sql, unbuffered=False):
+        if isinstance(sql, (bytes, bytearray)):
+            sql = bytes(sql).decode(self.encoding)
+        self.queries.append(sql)
+        rows, affected = self.responder(sql)
+        rows = tuple(rows)
+        self._result = SimpleNamespace(
+            affected_rows=affected if affected is not None else len(rows),
+            warning_count=0,
+            description=None,
+            insert_id=0,
+            rows=rows,
+            has_next=False
+        )
+        return self._result.affected_rows
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class _NoPool:
+    def release(self, raw, created_at, discard=False):
+        pass
+
+
+@pytest.fixture
+def app():
+    return app_module
+
+
+@pytest.fixture(autouse=True)
+def no_activity_writes(monkeypatch):
+    """Keep the activity feed's writer thread from reaching for a real server."""
+    monkeypatch.setattr(app_module.DASHBOARD_SUMMARY, 'record_activity', lambda *args: None)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """A FakeMySQLConnection that every get_db_connection() call hands out."""
+    connection = FakeMySQLConnection()
+    monkeypatch.setattr(app_module, 'get_db_connection',
+                        lambda primary=False: app_module.PooledConnection(_NoPool(), connection, 0))
+    return connection
+
+
+@pytest.fixture
+def admin_client(app, monkeypatch):
+    """Test client whose requests run as an administrator."""
+    monkeypatch.setattr(app, 'get_current_user', lambda: {'user_id': 1, 'role': 'admin'})
+    monkeypatch.setattr(app, 'has_permission', lambda user, code: True)
+    return app.app.test_client()
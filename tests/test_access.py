@@ -0,0 +1,60 @@
+import pytest
+
+STUDENT = {'user_id': 3, 'role': 'student', 'linked_person_id': 'S1'}
+FACULTY = {'user_id': 2, 'role': 'faculty', 'linked_person_id': '7'}
+
+
+@pytest.fixture
+def client_as(app, fake_db, monkeypatch):
+    """Test client acting as the given session user (None for anonymous), with default grants."""
+    monkeypatch.setattr(app, 'load_role_permissions', lambda: app.DEFAULT_ROLE_PERMISSIONS)
+    fake_db.responder = lambda sql: ((), 0)
+
+    def client(user):
+        monkeypatch.setattr(app, 'get_current_user', lambda: user)
+        return app.app.test_client()
+    return client
+
+
+READS = [
+    '/api/search?q=ann',
+    '/api/grades/sections/1',
+    '/api/grades/students/S2',
+    '/api/results/1/S2',
+    '/api/results/students/S2',
+    '/api/results/sections/1',
+    '/api/attendance?student_id=S2',
+    '/api/attendance/summary?section_id=1',
+    '/api/debug/scores'
+]
+
+
+@pytest.mark.parametrize('path', READS)
+def test_reads_need_a_session(client_as, path):
+    assert client_as(None).get(path).status_code == 401
+
+
+def test_sample_scores_need_schema_permission(client_as):
+    assert client_as(None).post('/api/sample/scores').status_code == 401
+    assert client_as(FACULTY).post('/api/sample/scores').status_code == 403
+
+
+@pytest.mark.parametrize('path', READS)
+def test_student_cannot_read_others(client_as, path):
+    assert client_as(STUDENT).get(path).status_code == 403
+
+
+@pytest.mark.parametrize('path', [
+    '/api/grades/students/S1',
+    '/api/results/1/S1',
+    '/api/results/students/S1',
+    '/api/attendance?student_id=S1',
+    '/api/attendance/summary?student_id=S1'
+])
+def test_student_reads_own_records(client_as, path):
+    assert client_as(STUDENT).get(path).status_code in (200, 404)
+
+
+@pytest.mark.parametrize('path', READS[:-1])
+def test_faculty_reads_any_record(client_as, path):
+    assert client_as(FACULTY).get(path).status_code in (200, 404)
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import threading
+
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+asgi = pytest.importorskip('asgi', exc_type=ImportError)
+
+
+def http_scope(method, path, headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'http_version': '1.1',
+            'scheme': 'http', 'server': ('test', 80), 'client': ('127.0.0.1', 1234),
+            'headers': [(name.encode(), value.encode()) for name, value in headers]}
+
+
+def call(scope, chunks, received=None):
+    """Run the ASGI app with the body split into chunks; returns (status, body, chunks received)."""
+    received = [] if received is None else received
+    sent = []
+
+    async def run():
+        pending = list(chunks)
+
+        async def receive():
+            if not pending:
+                return {'type': 'http.disconnect'}
+            chunk = pending.pop(0)
+            received.append(chunk)
+            return {'type': 'http.request', 'body': chunk, 'more_body': bool(pending)}
+
+        async def send(message):
+            sent.append(message)
+
+        await asgi.application(scope, receive, send)
+
+    asyncio.run(run())
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    body = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+    return status, body, received
+
+
+def test_wsgi_fallback_streams_chunked_body(app, admin_client, fake_db, monkeypatch):
+    monkeypatch.setattr(app, 'STUDENT_IMPORT_CHUNK_SIZE', 10)
+    received = []
+    flushed_after = []  # body chunks received when each import chunk was written
+
+    def responder(sql):
+        if sql.lstrip().startswith('INSERT INTO student'):
+            flushed_after.append(len(received))
+        return (), 1
+    fake_db.responder = responder
+    rows = [f'S{i},First,Last,s{i}@x.edu\n'.encode() for i in range(50)]
+    chunks = [b'student_id,first_name,last_name,email\n'] + rows
+
+    status, body, _ = call(
+        http_scope('POST', '/api/students/import', [('content-type', 'text/csv')]), chunks, received)
+
+    assert status == 200
+    assert app.json.loads(body)['processed'] == 50
+    assert len(received) == len(chunks)
+    # The first rows were written while most of the body was still to come
+    assert len(flushed_after) == 5 and flushed_after[0] < len(chunks) // 2
+
+
+def test_wsgi_fallback_refuses_declared_oversized_body(monkeypatch):
+    monkeypatch.setitem(asgi.ASYNC_CONFIG, 'max_body', 10)
+    status, _, received = call(
+        http_scope('POST', '/api/students/import', [('content-type', 'text/csv'), ('content-length', '11')]),
+        [b'x' * 11])
+    assert status == 413
+    assert received == []
+
+
+def read_stream(chunks, limit):
+    """Read a ReceiveStream fed with chunks from a worker thread, as serve_wsgi does."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    pending = list(chunks)
+
+    async def receive():
+        chunk = pending.pop(0)
+        return {'type': 'http.request', 'body': chunk, 'more_body': bool(pending)}
+
+    try:
+        return io.BufferedReader(asgi.ReceiveStream(receive, loop, limit)).read()
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_receive_stream_reassembles_chunks():
+    assert read_stream([b'ab', b'', b'cde', b'f'], limit=10) == b'abcdef'
+
+
+def test_receive_stream_stops_at_limit():
+    with pytest.raises(RequestEntityTooLarge):
+        read_stream([b'x' * 6, b'x' * 6], limit=10)
+
+
+class Sessions:
+    def __init__(self, users):
+        self.users = users
+
+    def get(self, token):
+        return self.users.get(token)
+
+
+@pytest.fixture
+def sessions(app, monkeypatch):
+    monkeypatch.setattr(asgi, 'SESSION_STORE', Sessions({
+        'student-token': {'user_id': 3, 'role': 'student', 'linked_person_id': 'S1'}
+    }))
+    monkeypatch.setattr(app, 'load_role_permissions', lambda: app.DEFAULT_ROLE_PERMISSIONS)
+
+
+@pytest.mark.parametrize('path, headers, status', [
+    ('/api/results/1/S1', [], 401),
+    ('/api/results/1/S1', [('authorization', 'Bearer nope')], 401),
+    ('/api/results/1/S2', [('authorization', 'Bearer student-token')], 403),
+    ('/api/grades/students/S2', [('authorization', 'Bearer student-token')], 403),
+    ('/api/grades/sections/1', [('authorization', 'Bearer student-token')], 403),
+    ('/api/results/students/S2', [('authorization', 'Bearer student-token')], 403),
+    ('/api/results/sections/1', [('authorization', 'Bearer student-token')], 403)
+])
+def test_native_routes_check_access_before_querying(sessions, path, headers, status):
+    result, body, _ = call(http_scope('GET', path, headers), [b''])
+    assert result == status
+
+
+def test_results_are_served_natively(app, sessions, monkeypatch):
+    monkeypatch.setattr(app, 'has_permission', lambda user, code: True)
+    monkeypatch.setattr(asgi, 'SESSION_STORE', Sessions({'staff-token': {'user_id': 1, 'role': 'faculty'}}))
+    queries = []
+
+    async def fetch_all(query, args=()):
+        queries.append((query, args))
+        return [{'section_id': 4, 'student_id': 'S1', 'total_weight': 100, 'weighted_total': 80,
+                 'percentage': '80.00', 'section_rank': 1}]
+    monkeypatch.setattr(asgi, 'fetch_all', fetch_all)
+    headers = [('authorization', 'Bearer staff-token')]
+
+    status, body, _ = call(http_scope('GET', '/api/results/students/S1', headers), [b''])
+    assert status == 200 and app.json.loads(body)['results'][0]['percentage'] == 80.0
+    status, body, _ = call(http_scope('GET', '/api/results/sections/4', headers), [b''])
+    assert status == 200 and app.json.loads(body)['student_count'] == 1
+
+    assert [(q.split('FROM section_result ')[1], args) for q, args in queries] == [
+        ('WHERE student_id = %s ORDER BY section_id', ('S1',)),
+        ('WHERE section_id = %s ORDER BY section_rank IS NULL, section_rank, student_id', (4,))
+    ]
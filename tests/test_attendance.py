@@ -0,0 +1,77 @@
+import pytest
+
+
+@pytest.mark.parametrize('class_date', ['2024-02-30', '02/01/2024', 20240201, ['2024-02-01']])
+def test_add_attendance_rejects_malformed_date(admin_client, fake_db, class_date):
+    response = admin_client.post('/api/attendance', json={'student_id': 'S1', 'section_id': 1,
+                                                          'class_date': class_date})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'class_date must be YYYY-MM-DD'}
+    assert not fake_db.queries
+
+
+def test_add_attendance_requires_object_body(admin_client, fake_db):
+    response = admin_client.post('/api/attendance', json=[{'student_id': 'S1'}])
+    assert response.status_code == 400
+
+
+def test_add_attendance_sends_parsed_date(admin_client, fake_db):
+    response = admin_client.post('/api/attendance', json={'student_id': 'S1', 'section_id': 1,
+                                                          'class_date': '2024-02-01'})
+    assert response.status_code == 201
+    assert "'2024-02-01'" in fake_db.queries[-1]
+
+
+def test_section_attendance_rejects_malformed_date(admin_client, fake_db):
+    response = admin_client.post('/api/attendance/bulk', json={'section_id': 1, 'class_date': 'yesterday'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'class_date must be YYYY-MM-DD'
+
+
+@pytest.mark.parametrize('bad, error', [
+    ('S2', 'records[1] must be an object'),
+    ({'status': 'Present'}, 'records[1]: student_id is required'),
+    ({'student_id': {'id': 'S2'}}, 'records[1]: student_id is required'),
+    ({'student_id': 'S2', 'status': 'Asleep'}, 'records[1]: status must be one of Present, Absent, Late, Excused')
+])
+def test_section_attendance_reports_offending_record(admin_client, fake_db, bad, error):
+    response = admin_client.post('/api/attendance/bulk', json={
+        'section_id': 1, 'class_date': '2024-02-01', 'records': [{'student_id': 'S1'}, bad]
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error, 'index': 1}
+    assert not fake_db.queries
+
+
+def test_section_attendance_returns_iso_date(admin_client, fake_db):
+    response = admin_client.post('/api/attendance/bulk', json={
+        'section_id': 1, 'class_date': '2024-02-01', 'records': [{'student_id': 'S1', 'status': 'Late'}]
+    })
+    assert response.status_code == 201
+    assert response.get_json()['class_date'] == '2024-02-01'
+
+
+@pytest.mark.parametrize('records', [[], 'S1'])
+def test_section_attendance_rejects_empty_or_non_list_records(admin_client, fake_db, records):
+    response = admin_client.post('/api/attendance/bulk', json={
+        'section_id': 1, 'class_date': '2024-02-01', 'records': records
+    })
+    assert response.status_code == 400
+    assert not fake_db.queries
+
+
+def test_section_attendance_caps_records(app, admin_client, fake_db, monkeypatch):
+    monkeypatch.setattr(app, 'ATTENDANCE_BULK_MAX_ROWS', 2)
+    response = admin_client.post('/api/attendance/bulk', json={
+        'section_id': 1, 'class_date': '2024-02-01', 'records': [{'student_id': f'S{i}'} for i in range(3)]
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'At most 2 records per request'}
+    assert not fake_db.queries
+
+
+def test_whole_section_marks_only_current_enrollments(admin_client, fake_db):
+    response = admin_client.post('/api/attendance/bulk', json={'section_id': 1, 'class_date': '2024-02-01'})
+    assert response.status_code == 201
+    insert = ' '.join(fake_db.queries[-1].split())
+    assert "WHERE e.section_id = 1 AND COALESCE(e.status, 'Enrolled') IN ('Enrolled')" in insert
@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from conftest import FakeMySQLConnection
+
+
+@pytest.fixture
+def connection():
+    """Students S1 and S2 (program 5) with stored results in section 100; one row in every other table."""
+    students = {'S1': (5, 'Active'), 'S2': (5, 'Graduated')}
+
+    def responder(sql):
+        if sql.startswith('SELECT student_id, program_id, status FROM student'):
+            ids = re.findall(r"'(\w+)'", sql)
+            return [(i, *students[i]) for i in ids if i in students], None
+        if sql.startswith('SELECT student_id FROM student'):
+            after, limit = re.search(r"student_id > '(\w*)' ORDER BY student_id LIMIT (\d+)", sql).groups()
+            return [(i,) for i in sorted(students) if i > after][:int(limit)], None
+        if sql.startswith('SELECT DISTINCT section_id FROM section_result'):
+            return [(100,)], None
+        if sql.startswith('SELECT column_name FROM information_schema.columns'):
+            return [('id',), ('name',)], None
+        if sql.startswith('SELECT `'):
+            return [(1,)], None
+        return (), 1
+    return FakeMySQLConnection(responder)
+
+
+def steps(connection):
+    """The writes issued, as 'DELETE table', 'REPLACE table_history', 'UPDATE table' or 'LOCK'."""
+    found = []
+    for sql in connection.queries:
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT section_id FROM section WHERE'):
+            found.append('LOCK')
+        match = re.match(r'(DELETE FROM|REPLACE INTO|UPDATE) `?(\w+)`?', sql)
+        if match:
+            found.append(f"{match.group(1).split()[0]} {match.group(2)}")
+    return found
+
+
+def test_students_removed_children_first_in_one_transaction(app, connection):
+    job = app.BulkDelete(connection)
+    job.remove_students(['S1', 'S2', 'S9'])
+
+    assert steps(connection) == ['LOCK', 'DELETE section_result', 'DELETE enrollment', 'DELETE attendance',
+                                 'DELETE score', 'DELETE student', 'UPDATE section_result']
+    assert connection.commits == 1
+    assert job.students == [('S1', 5, 'Active'), ('S2', 5, 'Graduated')]
+
+
+def test_archive_copies_each_table_before_deleting(app, connection):
+    app.BulkDelete(connection, archive=True).remove_students(['S1'])
+
+    assert steps(connection) == [
+        'LOCK', 'DELETE section_result',
+        'REPLACE enrollment_history', 'DELETE enrollment',
+        'REPLACE attendance_history', 'DELETE attendance',
+        'REPLACE score_history', 'DELETE score',
+        'REPLACE student_history', 'DELETE student',
+        'UPDATE section_result'
+    ]
+    copies = [q for q in connection.queries if q.startswith('REPLACE INTO `student_history`')]
+    assert copies == ["REPLACE INTO `student_history` (`id`, `name`) SELECT `id`, `name` FROM `student` "
+                      "WHERE student_id IN ('S1')"]
+
+
+def test_department_cascade_order(app, connection, monkeypatch):
+    monkeypatch.setitem(app.BULK_DELETE_CONFIG, 'student_chunk', 1)
+    job = app.BulkDelete(connection)
+    events = list(job.department(3))
+
+    student_chunk = ['LOCK', 'DELETE section_result', 'DELETE enrollment', 'DELETE attendance',
+                     'DELETE score', 'DELETE student', 'UPDATE section_result']
+    assert steps(connection) == student_chunk * 2 + [
+        'DELETE section_result', 'DELETE score', 'DELETE enrollment', 'DELETE attendance',
+        'DELETE assessment', 'DELETE section', 'DELETE course', 'DELETE program',
+        'UPDATE faculty', 'DELETE department'
+    ]
+    assert events[-1]['faculty_detached'] == 1 and events[-1]['students'] == 2
+    assert len(events) == 2 + 7 + 1
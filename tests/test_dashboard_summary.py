@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+
+def summary_responder(students, gate=None):
+    """Rebuild queries of DashboardSummary; students = {program_id: active count}."""
+    def responder(sql):
+        if gate is not None:
+            gate.wait(5)
+        if sql.startswith('SELECT dept_id, name FROM department'):
+            return [(1, 'CS')], None
+        if sql.startswith('SELECT program_id, name, dept_id FROM program'):
+            return [(10, 'BE CS', 1), (11, 'ME CS', 1)], None
+        if sql.startswith('SELECT program_id, COUNT(*) FROM student'):
+            assert "status = 'Active'" in sql
+            return list(students.items()), None
+        return (), None
+    return responder
+
+
+@pytest.fixture
+def summary(app, fake_db):
+    fake_db.responder = summary_responder({10: 3})
+    summary = app.DashboardSummary(refresh_interval=300)
+    summary.ensure_built()
+    return summary
+
+
+def test_stale_summary_rebuilds_in_background_and_keeps_serving(app, fake_db, summary):
+    gate = threading.Event()
+    fake_db.responder = summary_responder({10: 5}, gate)
+    summary.invalidate()
+
+    # The rebuild is blocked on the database, yet the read returns the previous aggregates
+    snapshot = summary.snapshot()
+    assert snapshot['students_by_program'][10] == 3
+
+    gate.set()
+    with summary._build_lock:  # held by the background rebuild until it finishes
+        pass
+    assert summary.snapshot()['students_by_program'][10] == 5
+
+
+def test_deltas_count_active_students_only(summary):
+    summary.student_added(11, 'Active')
+    summary.student_added(11, 'Inactive')
+    summary.student_removed(10, 'Graduated')
+    snapshot = summary.snapshot()
+    assert snapshot['students_by_program'] == {10: 3, 11: 1}
+    assert snapshot['students_by_department'][1] == 4
+
+
+def test_delta_racing_a_rebuild_schedules_an_early_retry(app, fake_db):
+    summary = app.DashboardSummary(refresh_interval=300)
+
+    def responder(sql):
+        if sql.startswith('SELECT program_id, COUNT(*) FROM student'):
+            summary.student_added(10, 'Active')
+        return summary_responder({10: 3})(sql)
+    fake_db.responder = responder
+    summary.ensure_built()
+
+    age = app.time.monotonic() - summary._built_at
+    assert 300 - app.DASHBOARD_SUMMARY_RETRY <= age < 300
+
+
+def test_activity_feed_merges_stored_rows_with_unwritten_entries(app, fake_db):
+    feed = app.ActivityFeed(size=3, flush_interval=60, refresh_interval=60)
+    fake_db.responder = lambda sql: ([
+        ('green', 'i', 'Faculty Added', 'from another worker', datetime(2026, 1, 2, 3, 4, 5)),
+        ('orange', 'i', 'Score Recorded', 'seeded', None),
+        ('orange', 'i', 'Score Recorded', 'oldest', None)
+    ], None)
+    with feed._lock:
+        # As if recorded here and not yet flushed, without starting the writer thread
+        feed._pending.append({'color': 'red', 'icon': 'i', 'title': 'Student Deleted',
+                              'description': 'local', 'at': 1.0})
+
+    feed.refresh()
+
+    entries = feed.entries()
+    assert [e['description'] for e in entries] == ['local', 'from another worker', 'seeded']
+    assert entries[1]['at'] == datetime(2026, 1, 2, 3, 4, 5).timestamp()
+    assert entries[2]['at'] is None
+
+
+def test_activity_flush_writes_buffer_once(app, fake_db):
+    feed = app.ActivityFeed(size=5, flush_interval=60, refresh_interval=60)
+    with feed._lock:
+        feed._pending.append({'color': 'red', 'icon': 'i', 'title': 't', 'description': 'd', 'at': 1.0})
+    feed.flush()
+    feed.flush()
+    inserts = [q for q in fake_db.queries if q.startswith('INSERT INTO activity_log')]
+    assert len(inserts) == 1 and fake_db.commits == 1
@@ -0,0 +1,60 @@
+import pymysql
+
+from conftest import FakeMySQLConnection
+
+
+def timed_cursor(app, connection, cursor_class=pymysql.cursors.Cursor):
+    return app.timed_cursor_class(cursor_class)(connection)
+
+
+def histogram_count(histogram, label):
+    series = histogram._series.get((label,))
+    return series[2] if series else 0
+
+
+def test_executemany_insert_values_is_timed_by_template(app):
+    connection = FakeMySQLConnection(lambda sql: ((), 3))
+    cursor = timed_cursor(app, connection)
+    before = histogram_count(app.DB_QUERY_DURATION, 'INSERT score')
+
+    rows = cursor.executemany(
+        "INSERT INTO score (student_id, assessment_id, marks_obtained) VALUES (%s, %s, %s)",
+        [('S1', 1, 5), ('S2', 1, 6), ('S3', 1, 7)]
+    )
+
+    assert rows == 3
+    # pymysql sends the batch as one multi-row statement built in a bytearray
+    assert len(connection.queries) == 1
+    assert connection.queries[0].count('),(') == 2
+    assert histogram_count(app.DB_QUERY_DURATION, 'INSERT score') == before + 1
+
+
+def test_executemany_failure_counts_error_under_template_label(app):
+    def responder(sql):
+        raise pymysql.err.IntegrityError(1062, "Duplicate entry 'a@x' for key 'email'")
+
+    cursor = timed_cursor(app, FakeMySQLConnection(responder))
+    before = app.DB_QUERY_ERRORS._values.get(('INSERT student',), 0)
+    try:
+        cursor.executemany("INSERT INTO student (student_id, email) VALUES (%s, %s)", [('S1', 'a@x')])
+    except pymysql.err.IntegrityError:
+        pass
+    else:
+        raise AssertionError('IntegrityError was not raised')
+    assert app.DB_QUERY_ERRORS._values[('INSERT student',)] == before + 1
+
+
+def test_executemany_without_values_clause_runs_row_by_row(app):
+    connection = FakeMySQLConnection(lambda sql: ((), 1))
+    cursor = timed_cursor(app, connection, pymysql.cursors.DictCursor)
+    before = histogram_count(app.DB_QUERY_DURATION, 'UPDATE score')
+
+    cursor.executemany("UPDATE score SET marks_obtained=%s WHERE score_id=%s", [(1, 1), (2, 2)])
+
+    assert len(connection.queries) == 2
+    assert histogram_count(app.DB_QUERY_DURATION, 'UPDATE score') == before + 2
+
+
+def test_query_label_accepts_formatted_bytes(app):
+    assert app.query_label(bytearray(b"INSERT INTO `role` (name) VALUES ('admin')")) == 'INSERT role'
+    assert app.query_label(b"select 1") == 'SELECT'
@@ -0,0 +1,72 @@
+import re
+
+import pytest
+
+from conftest import FakeMySQLConnection
+
+
+@pytest.fixture
+def cursor():
+    """A cursor on a connection where assessment 1 and 2 are in section 100, 3 in section 200."""
+    sections = {1: 100, 2: 100, 3: 200}
+
+    def responder(sql):
+        if sql.startswith('SELECT assessment_id, section_id FROM assessment'):
+            ids = [int(v) for v in re.search(r'IN \(([^)]*)\)', sql).group(1).split(', ')]
+            return [(i, sections[i]) for i in ids if i in sections], None
+        return (), 1
+    return FakeMySQLConnection(responder).cursor()
+
+
+def statements(cursor, prefix):
+    return [' '.join(q.split()) for q in cursor.connection.queries if q.lstrip().startswith(prefix)]
+
+
+def test_refresh_recomputes_only_affected_students_per_section(app, cursor):
+    app.refresh_results(cursor, [('S1', 1), ('S2', 2), ('S1', 3), ('S3', 9), (None, 1)])
+
+    assert statements(cursor, 'SELECT section_id FROM section') == [
+        'SELECT section_id FROM section WHERE section_id IN (100, 200) ORDER BY section_id FOR UPDATE']
+    assert statements(cursor, 'DELETE') == [
+        "DELETE FROM section_result WHERE section_id = 100 AND student_id IN ('S1', 'S2')",
+        "DELETE FROM section_result WHERE section_id = 200 AND student_id IN ('S1')"]
+    inserts = statements(cursor, 'INSERT INTO section_result')
+    assert len(inserts) == 2
+    assert "e.section_id = 100 AND e.student_id IN ('S1', 'S2')" in inserts[0]
+    assert "e.section_id = 200 AND e.student_id IN ('S1')" in inserts[1]
+    ranks = statements(cursor, 'UPDATE section_result')
+    assert len(ranks) == 1 and 'WHERE section_id IN (100, 200)' in ranks[0]
+
+
+def test_score_moved_between_students_refreshes_both(app, cursor):
+    app.refresh_results(cursor, [('S1', 1), ('S2', 1)])
+
+    assert statements(cursor, 'DELETE') == [
+        "DELETE FROM section_result WHERE section_id = 100 AND student_id IN ('S1', 'S2')"]
+    assert 'WHERE section_id IN (100)' in statements(cursor, 'UPDATE section_result')[0]
+
+
+def test_score_moved_between_sections_reranks_both(app, cursor):
+    app.refresh_results(cursor, [('S1', 2), ('S1', 3)])
+
+    assert [q.split(' AND ')[0] for q in statements(cursor, 'DELETE')] == [
+        'DELETE FROM section_result WHERE section_id = 100',
+        'DELETE FROM section_result WHERE section_id = 200']
+    assert 'WHERE section_id IN (100, 200)' in statements(cursor, 'UPDATE section_result')[0]
+
+
+def test_refresh_without_known_assessments_writes_nothing(app, cursor):
+    app.refresh_results(cursor, [('S1', 9)])
+    app.refresh_results(cursor, [])
+
+    assert [q.split()[0] for q in cursor.connection.queries] == ['SELECT']
+
+
+def test_rank_results_scopes_to_sections(app, cursor):
+    app.rank_results(cursor, [200])
+    app.rank_results(cursor)
+
+    scoped, everything = statements(cursor, 'UPDATE section_result')
+    assert 'WHERE section_id IN (200)' in scoped
+    assert 'WHERE section_id IN' not in everything
+    assert 'RANK() OVER (PARTITION BY section_id ORDER BY percentage DESC)' in everything
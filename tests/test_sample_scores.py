@@ -0,0 +1,31 @@
+def fk_statements(fake_db):
+    return [q for q in fake_db.queries if 'FOREIGN_KEY_CHECKS' in q]
+
+
+def test_sample_scores_restore_fk_checks_when_refresh_fails(admin_client, fake_db):
+    def responder(sql):
+        if sql.startswith('SELECT assessment_id, section_id FROM assessment'):
+            raise RuntimeError('refresh failed')
+        return (), 1
+    fake_db.responder = responder
+
+    response = admin_client.post('/api/sample/scores')
+
+    assert response.status_code == 500
+    assert fk_statements(fake_db) == ['SET FOREIGN_KEY_CHECKS = 0', 'SET FOREIGN_KEY_CHECKS = 1']
+
+
+def test_sample_scores_refresh_only_inserted_rows(admin_client, fake_db):
+    def responder(sql):
+        if "('STU001', 3," in sql and sql.lstrip().startswith('INSERT INTO score'):
+            raise RuntimeError('row failed')
+        return (), 1
+    fake_db.responder = responder
+
+    response = admin_client.post('/api/sample/scores')
+
+    assert response.status_code == 201
+    assert response.get_json()['added_count'] == 4
+    assert fk_statements(fake_db)[-1] == 'SET FOREIGN_KEY_CHECKS = 1'
+    refresh = next(q for q in fake_db.queries if q.startswith('SELECT assessment_id, section_id FROM assessment'))
+    assert refresh.endswith('IN (1, 2)')
@@ -0,0 +1,106 @@
+import re
+
+import pytest
+
+
+def in_list(sql):
+    """Integers inside the first IN (...) of sql."""
+    return [int(v) for v in re.search(r'IN \(([^)]*)\)', sql).group(1).split(', ')]
+
+
+@pytest.fixture
+def score_db(app, fake_db):
+    """Scores {score_id: (version, assessment_id, student_id, marks)}; assessment 1 max 10, 2 max 5."""
+    fake_db.scores = {7: (3, 1, 'S1', 8), 8: (1, 1, 'S2', 4)}
+    assessments = {1: (10, 100), 2: (5, 200)}
+
+    def responder(sql):
+        if sql.startswith('SELECT score_id, version'):
+            return [(i, *fake_db.scores[i]) for i in in_list(sql) if i in fake_db.scores], None
+        if sql.startswith('SELECT student_id, assessment_id, version, marks_obtained FROM score'):
+            score_id = int(re.search(r'score_id=(\d+)', sql).group(1))
+            row = fake_db.scores.get(score_id)
+            return ([(row[2], row[1], row[0], row[3])] if row else []), None
+        if sql.startswith('SELECT assessment_id, max_marks FROM assessment'):
+            return [(i, assessments[i][0]) for i in in_list(sql) if i in assessments], None
+        if sql.startswith('SELECT assessment_id, section_id FROM assessment'):
+            return [(i, assessments[i][1]) for i in in_list(sql) if i in assessments], None
+        return (), 1
+    fake_db.responder = responder
+    return fake_db
+
+
+def updates(db):
+    return [q for q in db.queries if q.startswith('UPDATE score')]
+
+
+def test_batch_conflict_is_409_and_nothing_is_written(admin_client, score_db):
+    response = admin_client.patch('/api/scores', json=[
+        {'score_id': 7, 'marks_obtained': 9, 'version': 3},
+        {'score_id': 8, 'marks_obtained': 5, 'version': 0}
+    ])
+
+    assert response.status_code == 409
+    assert response.get_json()['results'] == [{'item': 2, 'score_id': 8, 'status': 'conflict', 'version': 1}]
+    assert updates(score_db) == []
+    assert (score_db.commits, score_db.rollbacks) == (0, 1)
+
+
+def test_batch_rolls_back_chunks_already_written(app, admin_client, score_db, monkeypatch):
+    monkeypatch.setattr(app, 'SCORE_BULK_CHUNK_SIZE', 1)
+
+    response = admin_client.patch('/api/scores', json=[
+        {'score_id': 7, 'marks_obtained': 9},
+        {'score_id': 8, 'marks_obtained': 5, 'version': 0}
+    ])
+
+    assert response.status_code == 409
+    # The first chunk's UPDATE ran; the rollback discards it with the rest
+    assert len(updates(score_db)) == 1
+    assert (score_db.commits, score_db.rollbacks) == (0, 1)
+    assert not any(q.startswith('DELETE FROM section_result') for q in score_db.queries)
+
+
+def test_batch_checks_marks_against_the_assessment_moved_to(admin_client, score_db):
+    # 8 marks fit assessment 1 (max 10) but not assessment 2 (max 5)
+    response = admin_client.patch('/api/scores', json=[{'score_id': 7, 'assessment_id': 2}])
+
+    assert response.status_code == 400
+    assert response.get_json()['results'][0]['error'] == 'marks_obtained must be between 0 and 5'
+    limits = [q for q in score_db.queries if q.startswith('SELECT assessment_id, max_marks')]
+    assert limits and limits[0].endswith('LOCK IN SHARE MODE') and updates(score_db) == []
+
+
+def test_batch_rejects_unknown_assessment(admin_client, score_db):
+    response = admin_client.patch('/api/scores', json=[{'score_id': 7, 'assessment_id': 9, 'marks_obtained': 1}])
+
+    assert response.status_code == 400
+    assert response.get_json()['results'][0]['error'] == 'Unknown assessment_id: 9'
+    assert updates(score_db) == []
+
+
+@pytest.mark.parametrize('marks', ['nan', 'inf', '-inf'])
+def test_non_finite_marks_are_rejected(admin_client, score_db, marks):
+    response = admin_client.patch('/api/scores', json=[{'score_id': 7, 'marks_obtained': marks}])
+
+    assert response.status_code == 400
+    assert score_db.queries == []
+
+
+def test_put_checks_range_in_the_transaction(admin_client, score_db):
+    response = admin_client.put('/api/scores/8', json={'marks_obtained': 11})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'marks_obtained must be between 0 and 10'}
+    assert updates(score_db) == [] and score_db.rollbacks == 1
+
+
+def test_put_within_range_updates_and_refreshes_both_results(admin_client, score_db):
+    response = admin_client.put('/api/scores/8', json={'assessment_id': 2, 'version': 1})
+
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'version': 2}
+    assert len(updates(score_db)) == 1 and score_db.commits == 1
+    refreshed = [q for q in score_db.queries if q.startswith('DELETE FROM section_result')]
+    assert refreshed == ["DELETE FROM section_result WHERE section_id = 100 AND student_id IN ('S2')",
+                         "DELETE FROM section_result WHERE section_id = 200 AND student_id IN ('S2')"]
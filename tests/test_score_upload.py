@@ -0,0 +1,53 @@
+import re
+
+import pytest
+
+
+@pytest.fixture
+def score_db(app, fake_db):
+    """Students S1-S3, assessment 1 (max 10) and existing score rows {score_id: (student_id, assessment_id)}."""
+    app.REFERENCE_CACHE.invalidate('student_ids')
+    app.REFERENCE_CACHE.invalidate('assessment_max_marks')
+    fake_db.scores = {7: ('S1', 1), 8: ('S1', 1)}
+
+    def responder(sql):
+        if sql.startswith('SELECT student_id FROM student'):
+            return [('S1',), ('S2',), ('S3',)], None
+        if sql.startswith('SELECT assessment_id, max_marks FROM assessment'):
+            return [(1, 10)], None
+        if sql.startswith('SELECT score_id, student_id, assessment_id FROM score'):
+            pairs = set(re.findall(r"\('(\w+)', (\d+)\)", sql))
+            return [(score_id, sid, aid) for score_id, (sid, aid) in fake_db.scores.items()
+                    if (sid, str(aid)) in pairs], None
+        if sql.startswith('SELECT assessment_id, section_id FROM assessment'):
+            return (), None
+        return (), 1
+    fake_db.responder = responder
+    return fake_db
+
+
+def test_bulk_upload_updates_scores_already_recorded(admin_client, score_db):
+    response = admin_client.post('/api/scores/bulk', json=[
+        {'student_id': 'S1', 'assessment_id': 1, 'marks_obtained': 4},
+        {'student_id': 'S2', 'assessment_id': 1, 'marks_obtained': 9}
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert (body['accepted'], body['inserted'], body['updated']) == (2, 1, 1)
+    assert [r['status'] for r in body['results']] == ['updated', 'accepted']
+    updates = [q for q in score_db.queries if q.startswith('UPDATE score')]
+    inserts = [q for q in score_db.queries if q.lstrip().startswith('INSERT INTO score')]
+    # Both copies of S1's score get the corrected (lower) mark
+    assert len(updates) == 1 and 'WHEN 7 THEN 4' in updates[0] and 'WHEN 8 THEN 4' in updates[0]
+    assert len(inserts) == 1 and "'S2'" in inserts[0] and "'S1'" not in inserts[0]
+
+
+def test_bulk_upload_still_rejects_duplicates_within_upload(admin_client, score_db):
+    body = admin_client.post('/api/scores/bulk', json=[
+        {'student_id': 'S3', 'assessment_id': 1, 'marks_obtained': 4},
+        {'student_id': 'S3', 'assessment_id': 1, 'marks_obtained': 5}
+    ]).get_json()
+
+    assert body['inserted'] == 1
+    assert body['results'][1] == {'row': 2, 'status': 'rejected', 'error': 'Duplicate student/assessment in upload'}
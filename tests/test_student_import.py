@@ -0,0 +1,64 @@
+import re
+
+CSV_HEADER = 'student_id,first_name,last_name,email\n'
+
+
+def student_db(fake_db, existing):
+    """Answer the import's queries from existing = {student_id: email}."""
+    def responder(sql):
+        if sql.startswith('SELECT program_id, name FROM program'):
+            return (), 0
+        if sql.startswith('SELECT student_id, email FROM student'):
+            # Case-insensitive, like the table's collation
+            keys = {key.lower() for key in re.findall(r"'([^']*)'", sql)}
+            return [(sid, email) for sid, email in existing.items()
+                    if sid.lower() in keys or email.lower() in keys], None
+        if sql.lstrip().startswith('INSERT INTO student'):
+            return (), sql.count('),(') + 1
+        return (), 0
+    fake_db.responder = responder
+    return fake_db
+
+
+def upserted_ids(fake_db):
+    ids = []
+    for sql in fake_db.queries:
+        if sql.lstrip().startswith('INSERT INTO student'):
+            ids += re.findall(r"\('(\w+)', '", sql)
+    return ids
+
+
+def test_import_rejects_email_owned_by_another_student(admin_client, fake_db):
+    student_db(fake_db, {'S1': 'ann@x.edu'})
+    body = CSV_HEADER + 'S2,Bob,Ray,ANN@x.edu\nS3,Cy,Oh,cy@x.edu\n'
+
+    response = admin_client.post('/api/students/import', data=body, content_type='text/csv')
+
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['written'] == 1
+    assert summary['failed'] == 1
+    assert summary['errors'] == [{'row': 1, 'student_id': 'S2', 'error': 'Duplicate email'}]
+    assert upserted_ids(fake_db) == ['S3']
+
+
+def test_import_allows_email_released_earlier_in_the_chunk(admin_client, fake_db):
+    student_db(fake_db, {'S1': 'ann@x.edu'})
+    # S1 moves to a new address, then S2 takes the old one; a third row reuses S2's
+    body = CSV_HEADER + 'S1,Ann,Lee,ann.lee@x.edu\nS2,Bob,Ray,ann@x.edu\nS3,Cy,Oh,ann@x.edu\n'
+
+    summary = admin_client.post('/api/students/import', data=body, content_type='text/csv').get_json()
+
+    assert summary['written'] == 2
+    assert [e['student_id'] for e in summary['errors']] == ['S3']
+    assert upserted_ids(fake_db) == ['S1', 'S2']
+
+
+def test_import_updates_own_row_with_same_email(admin_client, fake_db):
+    student_db(fake_db, {'S1': 'ann@x.edu'})
+    body = CSV_HEADER + 'S1,Anna,Lee,ann@x.edu\n'
+
+    summary = admin_client.post('/api/students/import', data=body, content_type='text/csv').get_json()
+
+    assert summary['written'] == 1
+    assert summary['failed'] == 0